@@ -7,6 +7,7 @@ from analytics.configs import (
     ADC_CONFIG_TEMPLATE,
     METRICS_CONFIG_TEMPLATE,
     PROCESSING_CONFIG_TEMPLATE,
+    RECORDING_CONFIG_TEMPLATE,
     LoggerConfig,
 )
 
@@ -16,6 +17,7 @@ base_config_template = {
     "adc": ADC_CONFIG_TEMPLATE,
     "metrics": METRICS_CONFIG_TEMPLATE,
     "processing": PROCESSING_CONFIG_TEMPLATE,
+    "recording": RECORDING_CONFIG_TEMPLATE,
 }
 
 config = confuse.LazyConfig(__name__, __name__)
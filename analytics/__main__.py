@@ -1,4 +1,5 @@
 import analytics
+import atexit
 import logging
 from analytics import config
 from analytics.gpm.constants import *
@@ -6,12 +7,17 @@ from analytics.metrics.exporter import start_metrics_server
 from analytics.processing.filters import EmgProcessor
 from analytics.adc.visualization import CalibrationVisualizer, EmgVisualizer
 from analytics.adc.constants import *
+from analytics.adc.acquisition import start_acquisition_process
+from analytics.recording.writer import start_session_recorder
 from threading import Thread
 
 logger = logging.getLogger(__name__)
 adc_config = config["adc"]
 
-if adc_config["use_mock_adc"]:
+if adc_config["replay_file"].get():
+    logger.info("Replaying a recording instead of reading the ADC.")
+    from analytics.adc.replayreader import ReplayAdcReader as Reader
+elif adc_config["use_mock_adc"]:
     logger.info("Using mock ADC.")
     from analytics.adc.mockreader import MockAdcReader as Reader
 else:
@@ -20,9 +26,19 @@ else:
 
 def main():
     analytics.initialize_config_and_logging()
-    adc_reader = Reader()
-    Thread(target=adc_reader.start_reading).start()
-    emg_processor = EmgProcessor(adc_reader)
+    recorder = start_session_recorder(NUM_CHANNELS, adc_config["sample_rate_in_hz"].as_number())
+    if recorder is not None:
+        atexit.register(recorder.close)
+    separate_process = adc_config["acquisition_mode"].get() == "process"
+    if separate_process:
+        _, adc_reader = start_acquisition_process(Reader)
+    else:
+        adc_reader = Reader()
+    if recorder is not None:
+        adc_reader.add_block_listener(recorder.record_block)
+    if not separate_process:
+        Thread(target=adc_reader.start_reading).start()
+    emg_processor = EmgProcessor(adc_reader, recorder)
 
     if USE_CALIBRATION_VISUALIZER:
         # the matplotlib GUI demands to be in the main thread
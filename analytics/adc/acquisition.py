@@ -0,0 +1,193 @@
+import atexit
+import logging
+import multiprocessing
+import threading
+import numpy as np
+import analytics
+from analytics.adc.basereader import BaseAdcReader, configured_buffer_size
+from analytics.adc.constants import NUM_CHANNELS
+from analytics.adc.scheduler import SamplingScheduler
+from analytics.common.sharedarray import SharedArray
+from analytics.common.sharedringbuffer import SharedRingBuffer
+from analytics.metrics.exporter import bind_sampling_metrics
+
+logger = logging.getLogger(__name__)
+
+# spawn rather than fork, the parent may already be running threads
+_context = multiprocessing.get_context("spawn")
+
+
+class SharedSamplingStats:
+    """
+    Statistics of the acquisition process's `SamplingScheduler`, published into shared memory
+    after every block. It has the attributes `bind_sampling_metrics` reads, so the ADC gauges
+    are exported by the consumer process running the metrics server.
+    """
+
+    FIELDS = ("rate_in_hz", "achieved_rate_in_hz", "overruns", "skipped_samples", "mean_jitter", "max_jitter")
+
+    def __init__(self, spec: dict = None):
+        """
+        :param spec: `spec()` of the stats to attach to, new stats are created if None
+        """
+        if spec is None:
+            self._shared = SharedArray((len(self.FIELDS),))
+            self._shared.array[:] = 0
+        else:
+            self._shared = SharedArray.attach(spec)
+        self._values = self._shared.array
+
+    def spec(self) -> dict:
+        return self._shared.spec()
+
+    def publish(self, scheduler: SamplingScheduler):
+        values = self._values
+        values[0] = scheduler.rate_in_hz or 0
+        values[1] = scheduler.achieved_rate_in_hz
+        values[2] = scheduler.overruns
+        values[3] = scheduler.skipped_samples
+        values[4] = scheduler.mean_jitter
+        values[5] = scheduler.max_jitter
+
+    @property
+    def rate_in_hz(self) -> float:
+        return float(self._values[0])
+
+    @property
+    def achieved_rate_in_hz(self) -> float:
+        return float(self._values[1])
+
+    @property
+    def overruns(self) -> int:
+        return int(self._values[2])
+
+    @property
+    def skipped_samples(self) -> int:
+        return int(self._values[3])
+
+    @property
+    def mean_jitter(self) -> float:
+        return float(self._values[4])
+
+    @property
+    def max_jitter(self) -> float:
+        return float(self._values[5])
+
+    def close(self):
+        self._values = None
+        self._shared.close()
+
+    def unlink(self):
+        self._shared.unlink()
+
+
+class RemoteAdcReader(BaseAdcReader):
+    """
+    Consumer-side view of an ADC reader running in a dedicated acquisition process. The buffers
+    are read-only zero-copy views of the acquisition process's shared memory, so existing
+    callers keep using `get_current_buffers`, `wait_for_samples` and friends unchanged. The
+    ADC gauges are bound to the acquisition process's scheduler statistics.
+    """
+
+    def __init__(self, buffer_specs, full, new_samples):
+        super().__init__()
+        self.use_shared_buffers(
+            SharedRingBuffer.attach(buffer_specs["buffer"]),
+            SharedRingBuffer.attach(buffer_specs["timestamps"]),
+            full,
+            new_samples,
+        )
+        self.sampling_stats = SharedSamplingStats(buffer_specs["sampling_stats"])
+        bind_sampling_metrics(self.sampling_stats)
+        self._follower = None
+
+    def add_block_listener(self, listener):
+        """
+        Registers `listener` as `BaseAdcReader.add_block_listener` does. Blocks are read back
+        from the shared buffers by a thread of this process, so listeners run there rather than
+        in the acquisition process, and miss samples overwritten before the thread got to them.
+        """
+        super().add_block_listener(listener)
+        if self._follower is None:
+            self._follower = threading.Thread(target=self._follow_blocks, name="BlockFollower", daemon=True)
+            self._follower.start()
+
+    def _follow_blocks(self):
+        position = 0
+        while True:
+            # samples are published before their timestamps, so waiting on the timestamps
+            # ensures both are there
+            with self._new_samples:
+                self._new_samples.wait_for(lambda: self.timestamps.total_written > position)
+            timestamps, start = self.timestamps.snapshot_since(position)
+            block, first_sample = self.buffer.snapshot_since(start)
+            # newer samples may be in already, or may have overwritten the oldest ones
+            timestamps = timestamps[first_sample - start :]
+            block = block[: len(timestamps)]
+            position = first_sample + len(block)
+            if len(block) == 0:
+                continue
+            for listener in self._block_listeners:
+                listener(block, first_sample, timestamps)
+
+    def start_reading(self):
+        raise RuntimeError("Samples are read by the acquisition process")
+
+    def _read_block(self, num_samples: int) -> np.ndarray:
+        raise RuntimeError("Samples are read by the acquisition process")
+
+
+def _run_acquisition(reader_cls, buffer_specs, full, new_samples):
+    analytics.initialize_config_and_logging()
+    reader = reader_cls()
+    # the acquisition process is the only writer
+    reader.use_shared_buffers(
+        SharedRingBuffer.attach(buffer_specs["buffer"], writable=True),
+        SharedRingBuffer.attach(buffer_specs["timestamps"], writable=True),
+        full,
+        new_samples,
+    )
+    sampling_stats = SharedSamplingStats(buffer_specs["sampling_stats"])
+    reader.add_block_listener(lambda *_: sampling_stats.publish(reader.scheduler))
+    reader.start_reading()
+
+
+def start_acquisition_process(reader_cls) -> tuple[multiprocessing.Process, RemoteAdcReader]:
+    """
+    Starts `reader_cls` reading the ADC in its own process, writing into shared memory ring
+    buffers. Acquisition timing is then unaffected by the GIL contention of processing, metrics
+    and GUI threads in this process.
+
+    :param reader_cls: The `BaseAdcReader` subclass to run in the acquisition process
+    :return: (acquisition process, reader attached to its buffers)
+    """
+    buffer_size = configured_buffer_size()
+    buffer = SharedRingBuffer(buffer_size, channels=NUM_CHANNELS)
+    timestamps = SharedRingBuffer(buffer_size)
+    sampling_stats = SharedSamplingStats()
+    buffer_specs = {
+        "buffer": buffer.spec(),
+        "timestamps": timestamps.spec(),
+        "sampling_stats": sampling_stats.spec(),
+    }
+    full = _context.Event()
+    new_samples = _context.Condition()
+
+    process = _context.Process(
+        target=_run_acquisition,
+        args=(reader_cls, buffer_specs, full, new_samples),
+        name="acquisition",
+        daemon=True,
+    )
+    process.start()
+    logger.info(f"Started acquisition process pid={process.pid} with {reader_cls.__name__}")
+
+    def cleanup():
+        process.terminate()
+        process.join()
+        for shared in (buffer, timestamps, sampling_stats):
+            shared.close()
+            shared.unlink()
+
+    atexit.register(cleanup)
+    return process, RemoteAdcReader(buffer_specs, full, new_samples)
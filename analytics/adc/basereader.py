@@ -1,11 +1,12 @@
-import time
 import logging
-from analytics.common.circularlist import CircularList
-from typing import Generator
-from analytics import config
+import threading
 import numpy as np
+from analytics.common.ringbuffer import RingBuffer
+from analytics import config
 from abc import ABC, abstractmethod
-from analytics.common.decorators import retryable
+from analytics.adc.constants import NUM_CHANNELS, INNER_CHANNEL, OUTER_CHANNEL
+from analytics.adc.scheduler import SamplingScheduler
+from analytics.metrics.exporter import bind_sampling_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,15 @@ class BufferNotFull(Exception):
     pass
 
 
+def configured_buffer_size() -> int:
+    """Size of the sample buffers, large enough for both the inner and outer windows"""
+    adc_config = config["adc"]
+    return max(
+        adc_config["inner_read_buffer_size"].as_number(),
+        adc_config["outer_read_buffer_size"].as_number(),
+    )
+
+
 class BaseAdcReader(ABC):
     """Base class encapsulating shared logic for the real and mock ADC readers"""
 
@@ -22,34 +32,126 @@ class BaseAdcReader(ABC):
         logger.info(f"ADC reader configs: {self.config}")
         self._inner_read_buffer_size = self.config["inner_read_buffer_size"].as_number()
         self._outer_read_buffer_size = self.config["outer_read_buffer_size"].as_number()
-        self._sleep_duration = self.config["sleep_between_reads_in_seconds"].as_number()
-        self.inner_buf = CircularList(self._inner_read_buffer_size)
-        self.outer_buf = CircularList(self._outer_read_buffer_size)
-        self._chan0 = None
-        self._chan1 = None
+        self.sample_rate = self.config["sample_rate_in_hz"].as_number()
+        self._max_batch_size = self.config["max_batch_size"].as_number()
+        buffer_size = configured_buffer_size()
+        # both muscles share one (samples x channels) buffer, column 0 is inner and 1 is outer
+        self.buffer = RingBuffer(buffer_size, channels=NUM_CHANNELS)
+        # monotonic acquisition time of every sample in `buffer`
+        self.timestamps = RingBuffer(buffer_size)
+        self.scheduler = self._make_scheduler()
+        self._full = threading.Event()
+        self._new_samples = threading.Condition()
+        self._block_listeners = []
+
+    def add_block_listener(self, listener):
+        """
+        Registers `listener(block, first_sample, timestamps)` to be called from the reader
+        thread with every newly acquired block, e.g. `SessionRecorder.record_block`. Listeners
+        must return quickly and must not modify the block.
+        """
+        self._block_listeners.append(listener)
+
+    def use_shared_buffers(self, buffer, timestamps, full, new_samples):
+        """
+        Swaps in buffers and synchronization primitives shared with other processes, see
+        `analytics.adc.acquisition`.
+
+        :param buffer: `SharedRingBuffer` replacing `buffer`
+        :param timestamps: `SharedRingBuffer` replacing `timestamps`
+        :param full: `multiprocessing.Event` set once the buffers are full
+        :param new_samples: `multiprocessing.Condition` notified after every published block
+        """
+        self.buffer = buffer
+        self.timestamps = timestamps
+        self._full = full
+        self._new_samples = new_samples
+
+    def _make_scheduler(self) -> SamplingScheduler:
+        return SamplingScheduler(self.sample_rate, self._max_batch_size)
 
     def start_reading(self):
         """
-        Will continually read from the ADC, appending new values to the internal buffers.
-        Notice that since we are using a `CircularList` type, the buffer size remains constant
-        and old enough values get discarded.
+        Will continually read from the ADC at `sample_rate_in_hz`, appending new values to the
+        internal buffers. Notice that since we are using a `RingBuffer` type, the buffer size
+        remains constant and old enough values get discarded. Returns once the source runs out
+        of samples, which only finite sources such as recordings do.
         """
-        inner_adc_value = self._read_adc(self._chan0)
-        outer_adc_value = self._read_adc(self._chan1)
         logger.info("Starting to read ADC values for both inner and outer muscles.")
+        bind_sampling_metrics(self.scheduler)
+        self.scheduler.start()
         while True:
-            self.inner_buf.append(next(inner_adc_value))
-            self.outer_buf.append(next(outer_adc_value))
-            time.sleep(self._sleep_duration)
+            num_samples = self.scheduler.wait()
+            block_start = self.scheduler.clock()
+            block = self._read_block(num_samples)
+            if len(block) == 0:
+                logger.info("ADC source exhausted, stopping reads.")
+                return
+            self._publish(block, block_start, self.scheduler.clock())
 
     @abstractmethod
-    def _read_adc(self, channel) -> Generator[float, None, None]:
-        None
-
-    @retryable(base_delay_in_seconds=0.1, logger=logger)
-    def get_current_buffers(self):
-        """Get current state of buffers, converted to an numpy Array"""
-        inner, outer = self.inner_buf, self.outer_buf
-        if not inner.is_full() or not outer.is_full():
+    def _read_block(self, num_samples: int) -> np.ndarray:
+        """
+        Reads `num_samples` samples for every channel and returns them as a (samples x channels)
+        array, with fewer or no samples only once a finite source runs out.
+        """
+
+    def _publish(self, block: np.ndarray, block_start: float, block_end: float):
+        """
+        Appends a freshly read block to the buffers, stamping its samples with monotonic times
+        spread evenly over the interval the block was read in.
+        """
+        first_sample = self.buffer.total_written
+        self.buffer.extend(block)
+        if len(block) == 1:
+            timestamps = np.array([block_end])
+        else:
+            timestamps = np.linspace(block_start, block_end, len(block))
+        self.timestamps.extend(timestamps)
+        for listener in self._block_listeners:
+            listener(block, first_sample, timestamps)
+        if not self._full.is_set() and self.is_full():
+            self._full.set()
+        with self._new_samples:
+            self._new_samples.notify_all()
+
+    def wait_until_full(self, timeout=None) -> bool:
+        """
+        Blocks until the buffers have filled up for the first time.
+
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely
+        :return: True if the buffers are full, False if the wait timed out
+        """
+        return self._full.wait(timeout)
+
+    def wait_for_samples(self, position: int, timeout=None) -> bool:
+        """
+        Blocks until the reader has written at least `position` samples in total, i.e. until
+        the sample with absolute index `position - 1` is available in `buffer`.
+
+        :param position: Sample watermark to wait for
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely
+        :return: True if the watermark was reached, False if the wait timed out
+        """
+        with self._new_samples:
+            return self._new_samples.wait_for(
+                lambda: self.buffer.total_written >= position, timeout
+            )
+
+    def get_current_buffers(self, timeout=None):
+        """
+        Get current state of buffers, converted to an numpy Array. Blocks until the buffers
+        are full, and never blocks the reader thread or other consumers.
+
+        :param timeout: Maximum number of seconds to wait for the buffers to fill
+        """
+        if not self.wait_until_full(timeout):
             raise BufferNotFull("At least one of the buffers is not full yet")
-        return (np.array(inner), np.array(outer))
+        snapshot = self.buffer.snapshot()
+        return (
+            snapshot[-self._inner_read_buffer_size :, INNER_CHANNEL],
+            snapshot[-self._outer_read_buffer_size :, OUTER_CHANNEL],
+        )
+
+    def is_full(self) -> bool:
+        return self.buffer.is_full()
@@ -1,4 +1,15 @@
 GRAPH_DIMENSION_NROWS = 2
 GRAPH_DIMENSION_NCOLS = 2
 USE_CALIBRATION_VISUALIZER = True
-USE_EMG_VISUALIZER = True
\ No newline at end of file
+USE_EMG_VISUALIZER = True
+
+# Layout of the shared sample buffer (samples x channels)
+NUM_CHANNELS = 2
+INNER_CHANNEL = 0
+OUTER_CHANNEL = 1
+
+# MCP3008 SPI protocol, see section 6.1 of the datasheet
+MCP3008_BAUDRATE = 1000000
+MCP3008_START_BIT = 0x01
+MCP3008_SINGLE_ENDED = 0x08
+MCP3008_TRANSFER_SIZE = 3
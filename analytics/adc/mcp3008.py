@@ -0,0 +1,87 @@
+import itertools
+import numpy as np
+from analytics.adc.constants import (
+    MCP3008_BAUDRATE,
+    MCP3008_START_BIT,
+    MCP3008_SINGLE_ENDED,
+    MCP3008_TRANSFER_SIZE,
+)
+
+
+class Mcp3008:
+    """
+    Reads several MCP3008 channels straight off the SPI bus, bypassing the per-sample object
+    overhead of `adafruit_mcp3xxx.AnalogIn`. The bus is locked and configured once per block and
+    every conversion is a single `write_readinto` from a precomputed command frame into a
+    precomputed slice of a preallocated receive buffer; decoding to 10-bit codes is done afterwards for the whole
+    block at once.
+
+    The MCP3008 needs chip select to be toggled between conversions, so each channel still costs
+    one 3-byte transfer, but nothing is allocated per sample.
+    """
+
+    def __init__(self, spi, cs, channels, baudrate=MCP3008_BAUDRATE, block_size=64):
+        """
+        :param spi: A `busio.SPI`-like bus supporting try_lock/unlock/configure/write_readinto
+        :param cs: A `digitalio.DigitalInOut`-like chip select pin
+        :param channels: Single-ended MCP3008 channels (0-7) to read, in output column order
+        :param baudrate: SPI clock rate
+        :param block_size: Initial number of samples the receive buffer has room for
+        """
+        self._spi = spi
+        self._cs = cs
+        self._cs.switch_to_output(value=True)
+        self._baudrate = baudrate
+        self.channels = tuple(channels)
+        self._tx = [
+            bytes((MCP3008_START_BIT, (MCP3008_SINGLE_ENDED | channel) << 4, 0x00))
+            for channel in self.channels
+        ]
+        self._allocate(block_size)
+
+    def _allocate(self, block_size):
+        frame_size = MCP3008_TRANSFER_SIZE * len(self.channels)
+        self._rx = bytearray(frame_size * block_size)
+        self._rx_view = memoryview(self._rx)
+        self._rx_frames = np.frombuffer(self._rx, dtype=np.uint8).reshape(
+            block_size, len(self.channels), MCP3008_TRANSFER_SIZE
+        )
+        # (command, receive slice) of every transfer of a block, in order, so that the read loop
+        # does not even create memoryview slices
+        self._transfers = [
+            (command, self._rx_view[offset : offset + MCP3008_TRANSFER_SIZE])
+            for offset, command in zip(
+                range(0, len(self._rx), MCP3008_TRANSFER_SIZE), itertools.cycle(self._tx)
+            )
+        ]
+        self._block_size = block_size
+
+    def read_block(self, num_samples: int, out=None) -> np.ndarray:
+        """
+        Reads `num_samples` conversions of every configured channel.
+
+        :param num_samples: Number of samples per channel
+        :param out: Optional preallocated (num_samples x channels) integer array to decode into
+        :return: (num_samples x channels) array of raw 10-bit codes
+        """
+        if num_samples > self._block_size:
+            self._allocate(num_samples)
+        spi, cs = self._spi, self._cs
+        transfers = itertools.islice(self._transfers, num_samples * len(self.channels))
+        while not spi.try_lock():
+            pass
+        try:
+            spi.configure(baudrate=self._baudrate, polarity=0, phase=0)
+            for command, rx in transfers:
+                cs.value = False
+                spi.write_readinto(command, rx)
+                cs.value = True
+        finally:
+            spi.unlock()
+
+        frames = self._rx_frames[:num_samples]
+        if out is None:
+            out = np.empty((num_samples, len(self.channels)), dtype=np.uint16)
+        np.left_shift(frames[..., 1] & 0x03, 8, out=out, dtype=out.dtype)
+        out |= frames[..., 2]
+        return out
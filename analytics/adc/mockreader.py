@@ -1,7 +1,7 @@
-import random
 import logging
-from typing import Generator
 from analytics.adc.basereader import BaseAdcReader
+from analytics.adc.constants import NUM_CHANNELS
+from analytics.adc.synthetic import SyntheticEmgGenerator
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -12,16 +12,24 @@ class MockAdcReader(BaseAdcReader):
 
     def __init__(self):
         super().__init__()
-        self._chan0 = "outer muscle"
-        self._chan1 = "inner muscle"
         self._buffer_size = self.config["mock_reader_state_buffer_size"].as_number()
+        # channels beyond the inner and outer muscle are simulated but not buffered
+        channels = self.config["mock_channels"].as_number()
+        if channels < NUM_CHANNELS:
+            raise ValueError(f"The mock ADC needs at least {NUM_CHANNELS} channels")
+        schedule = self.config["mock_schedule"].get()
+        if schedule is not None:
+            schedule = [(int(length), levels) for length, levels in schedule]
+        self._generator = SyntheticEmgGenerator(
+            self.sample_rate,
+            channels=channels,
+            seed=self.config["mock_seed"].get(),
+            schedule=schedule,
+            segment_length=self._buffer_size,
+            co_contraction=self.config["mock_co_contraction"].as_number(),
+            noise_floor=self.config["mock_noise_floor"].as_number(),
+            hum_amplitude=self.config["mock_hum_amplitude"].as_number(),
+        )
 
-    def _read_adc(self, _) -> Generator[float, None, None]:
-        burst = np.random.uniform(-1, 1, size=self._buffer_size)
-        quiet = np.random.uniform(-0.05, 0.05, size=self._buffer_size)
-        mock_emg_actions = {"activated": burst, "resting": quiet}
-        while True:
-            current_action = random.choice(list(mock_emg_actions))
-            # logger.info(f"Pilot's {channel} is currently in state={current_action}")
-            for i in mock_emg_actions[current_action]:
-                yield i
+    def _read_block(self, num_samples: int) -> np.ndarray:
+        return self._generator.generate(num_samples)[:, :NUM_CHANNELS]
@@ -3,9 +3,12 @@ import board
 import busio
 import digitalio
 import logging
+import numpy as np
 from typing import Generator
 from adafruit_mcp3xxx.analog_in import AnalogIn
 from analytics.adc.basereader import BaseAdcReader
+from analytics.adc.constants import INNER_CHANNEL, NUM_CHANNELS, OUTER_CHANNEL
+from analytics.adc.mcp3008 import Mcp3008
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +20,28 @@ class AdcReader(BaseAdcReader):
         spi = busio.SPI(clock=board.SCK, MISO=board.MISO, MOSI=board.MOSI)
         # creates the chip select
         cs = digitalio.DigitalInOut(board.D22)
+        self._raw_spi_reads = self.config["raw_spi_reads"].get(bool)
+        if self._raw_spi_reads:
+            logger.info("Reading MCP3008 channels directly over SPI.")
+            # inner muscle on pin 0, outer muscle on pin 1
+            self._mcp = Mcp3008(spi, cs, (MCP.P0, MCP.P1), block_size=self._max_batch_size)
+            return
         self._mcp = MCP.MCP3008(spi, cs)
         # create an Ananlog input channel on pin 0
         self._chan0 = AnalogIn(self._mcp, MCP.P0)
         # create an Ananlog input channel on pin 0
         self._chan1 = AnalogIn(self._mcp, MCP.P1)
+        self._channel_readers = (self._read_adc(self._chan0), self._read_adc(self._chan1))
+
+    def _read_block(self, num_samples: int) -> np.ndarray:
+        if self._raw_spi_reads:
+            return self._mcp.read_block(num_samples)
+        inner, outer = self._channel_readers
+        block = np.empty((num_samples, NUM_CHANNELS))
+        for i in range(num_samples):
+            block[i, INNER_CHANNEL] = next(inner)
+            block[i, OUTER_CHANNEL] = next(outer)
+        return block
 
     def _read_adc(self, channel) -> Generator[float, None, None]:
         while True:
@@ -0,0 +1,46 @@
+import logging
+import numpy as np
+from analytics.adc.basereader import BaseAdcReader
+from analytics.adc.scheduler import SamplingScheduler
+from analytics.data import load_recording
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayAdcReader(BaseAdcReader):
+    """
+    Replays a recording into the buffers in place of the ADC. The recording is treated as
+    sampled at `sample_rate_in_hz` and played back in real time (`replay_speed` 1), N times
+    faster (`replay_speed` N) or as fast as possible (`replay_speed` 0).
+    """
+
+    def __init__(self):
+        super().__init__()
+        path = self.config["replay_file"].as_filename()
+        self._channels = self.config["replay_channels"].get(list)
+        self._loop = self.config["replay_loop"].get(bool)
+        recording = load_recording(path).samples
+        if max(self._channels) >= recording.shape[1]:
+            raise ValueError(
+                f"Recording {path} has {recording.shape[1]} channels, "
+                f"cannot replay channels {self._channels}"
+            )
+        self._recording = recording
+        self._cursor = 0
+        logger.info(f"Replaying {len(recording)} samples of channels {self._channels} from {path}")
+
+    def _make_scheduler(self) -> SamplingScheduler:
+        speed = self.config["replay_speed"].as_number()
+        rate = None if speed == 0 else self.sample_rate * speed
+        return SamplingScheduler(rate, self._max_batch_size)
+
+    def _read_block(self, num_samples: int) -> np.ndarray:
+        recording, channels = self._recording, self._channels
+        if not self._loop:
+            block = recording[self._cursor : self._cursor + num_samples, channels]
+            self._cursor += len(block)
+            return block
+        # wrap around to the start of the recording as many times as needed
+        indices = (self._cursor + np.arange(num_samples)) % len(recording)
+        self._cursor = (self._cursor + num_samples) % len(recording)
+        return recording[np.ix_(indices, channels)]
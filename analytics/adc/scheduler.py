@@ -0,0 +1,107 @@
+import math
+import time
+from pydantic import BaseModel, ConfigDict
+
+
+class SchedulerStats(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    target_rate_in_hz: float
+    achieved_rate_in_hz: float
+    samples: int
+    ticks: int
+    overruns: int
+    skipped_samples: int
+    mean_jitter_in_seconds: float
+    max_jitter_in_seconds: float
+
+
+class SamplingScheduler:
+    """
+    Paces sampling at a fixed rate using absolute deadlines (start + k * period), so read latency
+    and sleep jitter never accumulate into drift. When the caller falls behind, `wait` reports
+    how many samples are due so they can be read in one batch; anything beyond `max_batch_size`
+    is skipped and counted rather than letting the backlog grow without bound.
+    """
+
+    def __init__(
+        self,
+        rate_in_hz: float,
+        max_batch_size: int = 64,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        """
+        :param rate_in_hz: Target sample rate, or None to run as fast as possible
+        :param max_batch_size: Maximum number of samples reported due by a single `wait`
+        :param clock: Monotonic clock returning seconds, overridable for testing
+        :param sleep: Sleep function, overridable for testing
+        """
+        if rate_in_hz is not None and rate_in_hz <= 0:
+            raise ValueError("Sample rate must be positive.")
+        self.rate_in_hz = rate_in_hz
+        self.period = None if rate_in_hz is None else 1.0 / rate_in_hz
+        self.max_batch_size = max_batch_size
+        self.clock = clock
+        self._sleep = sleep
+        self.start()
+
+    def start(self):
+        """(Re)starts the schedule with the first sample due now"""
+        self._start_time = self.clock()
+        self._next_sample = 0
+        self.samples = 0
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped_samples = 0
+        self._jitter_sum = 0.0
+        self.max_jitter = 0.0
+
+    def wait(self) -> int:
+        """
+        Blocks until the next sample is due and returns how many samples should be read now
+        (between 1 and `max_batch_size`).
+        """
+        self.ticks += 1
+        if self.period is None:
+            self.samples += self.max_batch_size
+            return self.max_batch_size
+
+        deadline = self._start_time + self._next_sample * self.period
+        now = self.clock()
+        if now < deadline:
+            self._sleep(deadline - now)
+            now = self.clock()
+        lateness = now - deadline
+        self._jitter_sum += lateness
+        self.max_jitter = max(self.max_jitter, lateness)
+
+        due = 1 + math.floor(lateness / self.period)
+        if due > 1:
+            self.overruns += 1
+        batch = min(due, self.max_batch_size)
+        self.skipped_samples += due - batch
+        self._next_sample += due
+        self.samples += batch
+        return batch
+
+    @property
+    def achieved_rate_in_hz(self) -> float:
+        elapsed = self.clock() - self._start_time
+        return self.samples / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def mean_jitter(self) -> float:
+        return self._jitter_sum / self.ticks if self.ticks else 0.0
+
+    def stats(self) -> SchedulerStats:
+        return SchedulerStats(
+            target_rate_in_hz=self.rate_in_hz or math.inf,
+            achieved_rate_in_hz=self.achieved_rate_in_hz,
+            samples=self.samples,
+            ticks=self.ticks,
+            overruns=self.overruns,
+            skipped_samples=self.skipped_samples,
+            mean_jitter_in_seconds=self.mean_jitter,
+            max_jitter_in_seconds=self.max_jitter,
+        )
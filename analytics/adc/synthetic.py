@@ -0,0 +1,118 @@
+import numpy as np
+from analytics.processing.iir import SosFilter, design_bandpass
+
+# Surface EMG carries most of its power between ~20 and ~450 Hz
+EMG_BAND_IN_HZ = (20, 450)
+
+
+class SyntheticEmgGenerator:
+    """
+    Generates reproducible, band-limited synthetic EMG in (samples x channels) blocks. Muscle
+    activity is bandpass-filtered Gaussian noise scaled by a per-channel activation level, on top
+    of a white noise floor and optional mains hum, which every channel picks up with its own phase
+    and strength. Activation levels follow either a fixed
+    schedule or, by default, random resting/activated segments. Filter state and hum phase carry
+    across blocks, so any block size produces the same stream.
+    """
+
+    def __init__(
+        self,
+        sample_rate,
+        channels=2,
+        seed=None,
+        schedule=None,
+        segment_length=100,
+        activation_amplitude=1.0,
+        co_contraction=0.0,
+        noise_floor=0.05,
+        hum_amplitude=0.0,
+        hum_freq=60,
+    ):
+        """
+        :param sample_rate: Simulated sample rate in Hz
+        :param channels: Number of channels to generate
+        :param seed: Seed for the random generator, None for a non-reproducible stream
+        :param schedule: Optional list of (num_samples, levels) segments, where `levels` holds one
+                         activation level between 0 and 1 per channel. The schedule repeats.
+                         Raises ValueError if a segment does not have a level for every channel.
+        :param segment_length: Length in samples of random segments when no schedule is given
+        :param activation_amplitude: Standard deviation of a fully activated channel
+        :param co_contraction: Fraction of the strongest other channel's activation that leaks
+                               into each channel
+        :param noise_floor: Standard deviation of the white noise present on every channel
+        :param hum_amplitude: Amplitude of the mains hum on the channel picking up the most of it,
+                              the others pick up between half and all of it
+        :param hum_freq: Mains frequency in Hz
+        """
+        if schedule is not None and any(len(levels) != channels for _, levels in schedule):
+            raise ValueError(f"Every schedule segment needs {channels} activation levels")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        # independent streams, so the output does not depend on how it is split into blocks
+        activity_seed, noise_seed, schedule_seed, hum_seed = np.random.SeedSequence(seed).spawn(4)
+        self._activity_rng = np.random.default_rng(activity_seed)
+        self._noise_rng = np.random.default_rng(noise_seed)
+        self._schedule_rng = np.random.default_rng(schedule_seed)
+        self._schedule = schedule
+        self._segment_length = segment_length
+        self._activation_amplitude = activation_amplitude
+        self._co_contraction = co_contraction
+        self._noise_floor = noise_floor
+        self._hum_amplitude = hum_amplitude
+        self._hum_step = 2 * np.pi * hum_freq / sample_rate
+        # electrodes sit at different distances and angles to the mains wiring
+        hum_rng = np.random.default_rng(hum_seed)
+        self._hum_phases = hum_rng.uniform(0, 2 * np.pi, channels)
+        self._hum_gains = hum_rng.uniform(0.5, 1.0, channels)
+        self._hum_gains /= self._hum_gains.max()
+        lowpass = min(EMG_BAND_IN_HZ[1], 0.45 * sample_rate)
+        sos = design_bandpass(sample_rate, EMG_BAND_IN_HZ[0], lowpass, 4)
+        self._band = SosFilter(sos, channels)
+        # the band-limited noise has a lower variance than its white noise input
+        self._band_gain = 1 / np.sqrt((lowpass - EMG_BAND_IN_HZ[0]) / (sample_rate / 2))
+        self._segment = 0
+        self._segment_remaining = 0
+        self._levels = np.zeros(channels)
+        self.total_generated = 0
+
+    def _next_segment(self):
+        if self._schedule is not None:
+            length, levels = self._schedule[self._segment % len(self._schedule)]
+            self._levels = np.asarray(levels, dtype=np.float64)
+        else:
+            length = self._segment_length
+            self._levels = self._schedule_rng.integers(0, 2, size=self.channels).astype(float)
+        if self._co_contraction and self.channels > 1:
+            levels = self._levels
+            others = np.array([np.delete(levels, c).max() for c in range(self.channels)])
+            self._levels = np.maximum(levels, self._co_contraction * others)
+        self._segment += 1
+        self._segment_remaining = length
+
+    def activation_levels(self, num_samples) -> np.ndarray:
+        """Advances the schedule by `num_samples` and returns the (samples x channels) levels"""
+        levels = np.empty((num_samples, self.channels))
+        filled = 0
+        while filled < num_samples:
+            if self._segment_remaining == 0:
+                self._next_segment()
+            take = min(self._segment_remaining, num_samples - filled)
+            levels[filled : filled + take] = self._levels
+            self._segment_remaining -= take
+            filled += take
+        return levels
+
+    def generate(self, num_samples) -> np.ndarray:
+        """
+        :param num_samples: Number of samples per channel
+        :return: (samples x channels) block of synthetic EMG
+        """
+        shape = (num_samples, self.channels)
+        activity = self._band.process(self._activity_rng.standard_normal(shape))
+        block = self._band_gain * activity * self.activation_levels(num_samples) * self._activation_amplitude
+        block += self._noise_floor * self._noise_rng.standard_normal(shape)
+        if self._hum_amplitude:
+            phase = (self.total_generated + np.arange(num_samples)) * self._hum_step
+            block += self._hum_amplitude * self._hum_gains * np.sin(phase[:, np.newaxis] + self._hum_phases)
+        self.total_generated += num_samples
+        return block
@@ -52,7 +52,7 @@ class EmgVisualizer:
 
     def _make_plot(self, buffer, index, title):
         plt.subplot(GRAPH_DIMENSION_NROWS, GRAPH_DIMENSION_NCOLS, index)
-        time_buf = np.array([i / 1000 for i in range(0, len(buffer), 1)])
+        time_buf = np.arange(len(buffer)) / self._adc_reader.sample_rate
         plt.plot(time_buf, buffer)
         plt.xlabel("Time (sec)")
         plt.ylabel("EMG (a.u.)")
@@ -129,7 +129,7 @@ class CalibrationVisualizer:
 
     def _make_plot(self, buffer, index, title):
         plt.subplot(GRAPH_DIMENSION_NROWS, GRAPH_DIMENSION_NCOLS, index)
-        time_buf = np.array([i / 1000 for i in range(0, len(buffer), 1)])
+        time_buf = np.arange(len(buffer)) / self._adc_reader.sample_rate
         plt.plot(time_buf, buffer)
         plt.xlabel("Time (sec)")
         plt.ylabel("EMG (a.u.)")
@@ -0,0 +1,170 @@
+import time
+import numpy as np
+
+
+class InvalidSize(Exception):
+    pass
+
+
+class RingBuffer(object):
+    """
+    A preallocated, fixed-dtype ring buffer backed by a single numpy array. Samples are stored
+    along the first axis, so a multichannel buffer has shape (size, channels) and a single-channel
+    buffer (channels=None) has shape (size,). Writes never reallocate; once the buffer is full the
+    oldest samples are overwritten.
+
+    The buffer supports a single writer and any number of concurrent readers without locks, using
+    a sequence lock: the writer bumps `sequence` to an odd value before touching the storage and
+    back to an even value afterwards, and `snapshot` retries its copy until it observes the same
+    even sequence before and after. Readers therefore never block the writer or each other, and
+    never see a torn snapshot.
+    """
+
+    def __init__(self, size, channels=None, dtype=np.float64):
+        if size <= 0:
+            raise InvalidSize("A buffer cannot have a negative or zero size.")
+        self.size = size
+        self.channels = channels
+        shape = (size,) if channels is None else (size, channels)
+        self._data = np.zeros(shape, dtype=dtype)
+        # index of the slot the next sample will be written to
+        self.index = 0
+        # total number of samples ever written, never wraps
+        self.total_written = 0
+        # odd while a write is in progress
+        self.sequence = 0
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._data.dtype
+
+    @property
+    def count(self) -> int:
+        """Number of valid samples currently held by the buffer"""
+        return min(self.total_written, self.size)
+
+    def append(self, value):
+        """Appends a single sample (a scalar, or one value per channel)"""
+        self.sequence += 1
+        self._data[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.total_written += 1
+        self.sequence += 1
+
+    def extend(self, block):
+        """
+        Appends a block of samples in bulk. `block` must have shape (n,) for a single-channel
+        buffer or (n, channels) for a multichannel one. If the block is larger than the buffer
+        only its newest `size` samples are kept.
+
+        :param block: Array-like of samples ordered oldest -> newest
+        """
+        block = np.asarray(block, dtype=self._data.dtype)
+        n = len(block)
+        if n == 0:
+            return
+        self.sequence += 1
+        if n >= self.size:
+            self._data[:] = block[n - self.size :]
+            self.index = 0
+        else:
+            head = min(n, self.size - self.index)
+            self._data[self.index : self.index + head] = block[:head]
+            self._data[: n - head] = block[head:]
+            self.index = (self.index + n) % self.size
+        self.total_written += n
+        self.sequence += 1
+
+    def views(self, n=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the newest `n` samples (all valid samples by default) as a pair of zero-copy views
+        (older, newer) into the underlying storage. Concatenating the two yields the samples in
+        order. The views alias live storage and will change under further writes, so they are
+        only safe to use from the writer thread; concurrent readers should use `snapshot`.
+
+        :param n: Number of most recent samples to return
+        """
+        count = self.count
+        n = count if n is None else min(n, count)
+        start = (self.index - n) % self.size
+        if n == 0:
+            return self._data[:0], self._data[:0]
+        if start + n <= self.size:
+            return self._data[start : start + n], self._data[:0]
+        return self._data[start:], self._data[: self.index]
+
+    def snapshot(self, n=None, out=None) -> np.ndarray:
+        """
+        Returns the newest `n` samples (all valid samples by default) ordered oldest -> newest
+        with exactly one copy. Safe to call concurrently with a writer.
+
+        :param n: Number of most recent samples to return
+        :param out: Optional preallocated array to copy into, must have room for `n` samples
+        """
+        while True:
+            sequence = self.sequence
+            if sequence & 1:
+                # a write is in progress, yield to the writer
+                time.sleep(0)
+                continue
+            result = self._copy(n, out)
+            if self.sequence == sequence:
+                return result
+
+    def snapshot_since(self, position, out=None) -> tuple[np.ndarray, int]:
+        """
+        Returns every sample written since the absolute sample index `position` (as counted by
+        `total_written`), with exactly one copy. Safe to call concurrently with a writer.
+
+        :param position: Absolute index of the first sample wanted
+        :param out: Optional preallocated array to copy into
+        :return: (samples, start) where `start` is the absolute index of the first returned
+                 sample. `start` is later than `position` if those samples were overwritten.
+        """
+        while True:
+            sequence = self.sequence
+            if sequence & 1:
+                time.sleep(0)
+                continue
+            total = self.total_written
+            start = min(max(position, total - self.size), total)
+            result = self._copy(total - start, out)
+            if self.sequence == sequence:
+                return result, start
+
+    def _copy(self, n, out):
+        older, newer = self.views(n)
+        total = len(older) + len(newer)
+        if out is None:
+            out = np.empty((total,) + self._data.shape[1:], dtype=self._data.dtype)
+        result = out[:total]
+        result[: len(older)] = older
+        result[len(older) :] = newer
+        return result
+
+    def __getitem__(self, key):
+        if self.is_full():
+            return self._data[(key + self.index) % self.size]
+        return self._data[: self.count][key]
+
+    def __len__(self):
+        return self.size
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """
+        This method is needed to satisfy the `array-like` bound required by the
+        `np.array` method.
+        """
+        result = self.snapshot()
+        return result if dtype is None else result.astype(dtype, copy=False)
+
+    def __repr__(self):
+        return (
+            self.snapshot().tolist().__repr__()
+            + " ("
+            + str(self.count)
+            + "/{} items)".format(self.size)
+        )
+
+    def is_full(self) -> bool:
+        return self.total_written >= self.size
@@ -0,0 +1,59 @@
+import sys
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+
+
+def attach_shared_memory(name) -> SharedMemory:
+    """Attaches to an existing shared memory block without taking ownership of it"""
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    # before 3.13 attaching also registers the block with the resource tracker. Processes started
+    # through multiprocessing share the creator's tracker, where registrations are a set, so the
+    # extra registration is harmless and the creator's `unlink` still clears it.
+    return SharedMemory(name=name)
+
+
+class SharedArray:
+    """
+    A NumPy array in a `multiprocessing.shared_memory` block, for handing large read-mostly
+    arrays to worker processes without pickling them. Pass `spec()` to the workers and
+    `attach` there. `array` is only valid while its `SharedArray` is referenced. The creating
+    process owns the block and must `unlink` it once done.
+    """
+
+    def __init__(self, shape, dtype=np.float64, name=None, create=True):
+        """
+        :param shape: Shape of the array
+        :param dtype: Dtype of the array
+        :param name: Name of the block to attach to, or to create (random if None)
+        :param create: Whether to create the block, or attach to an existing one
+        """
+        nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        if create:
+            self._shm = SharedMemory(name=name, create=True, size=nbytes)
+        else:
+            self._shm = attach_shared_memory(name)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+
+    @classmethod
+    def copy_of(cls, array: np.ndarray) -> "SharedArray":
+        """Creates a shared copy of `array`"""
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    def spec(self) -> dict:
+        """Everything another process needs to attach to this array"""
+        return {"shape": self.array.shape, "dtype": self.array.dtype.str, "name": self._shm.name}
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SharedArray":
+        return cls(create=False, **spec)
+
+    def close(self):
+        # numpy views must be released before the mapping can be closed
+        self.array = None
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
@@ -0,0 +1,133 @@
+import multiprocessing
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from analytics.common.sharedarray import attach_shared_memory
+from analytics.common.ringbuffer import InvalidSize, RingBuffer
+
+# Header layout: int64 [sequence, total_written, index], padded to a cache line
+_HEADER_FIELDS = 3
+_HEADER_SIZE = 64
+_SEQUENCE, _TOTAL_WRITTEN, _INDEX = range(_HEADER_FIELDS)
+
+# locks are handed to spawned processes, see `analytics.adc.acquisition`
+_context = multiprocessing.get_context("spawn")
+
+
+def _header_field(field):
+    def get(self):
+        return int(self._header[field])
+
+    def set(self, value):
+        self._header[field] = value
+
+    return property(get, set)
+
+
+class SharedRingBuffer(RingBuffer):
+    """
+    A `RingBuffer` whose storage and header live in a `multiprocessing.shared_memory` block, so a
+    writer in one process can publish samples that other processes read through zero-copy NumPy
+    views. The header holds the write index and sample count as plain int64s.
+
+    Unlike threads of one process, processes on different cores get no ordering guarantees from
+    the GIL, and stores through NumPy views come with no memory barriers. On weakly ordered CPUs
+    such as the Pi's ARM cores a reader could therefore observe an even `sequence` or a new
+    `total_written` before the samples written ahead of it, and the sequence lock alone would
+    return torn copies. Writes and copies instead hold a shared `multiprocessing.Lock`, whose
+    semaphore operations are full barriers. Both only hold it for the copy of a block, so the
+    writer waits at most for one snapshot. Reading `total_written` alone, e.g. to wait for a
+    watermark, needs no lock as an aligned int64 is never torn, and the samples are then read
+    through `snapshot_since`.
+
+    The creating process owns the block and must call `unlink` once all processes are done.
+    Attached readers should call `close` when they are done with it.
+    """
+
+    sequence = _header_field(_SEQUENCE)
+    total_written = _header_field(_TOTAL_WRITTEN)
+    index = _header_field(_INDEX)
+
+    def __init__(
+        self, size, channels=None, dtype=np.float64, name=None, create=True, writable=None, lock=None
+    ):
+        """
+        :param size: Number of samples the buffer holds
+        :param channels: Number of channels, None for a single-channel buffer
+        :param dtype: Sample dtype
+        :param name: Name of the shared memory block to attach to, or to create (random if None)
+        :param create: Whether to create the block, or attach to an existing one
+        :param writable: Whether this process may write, defaults to `create`. There must only
+                         ever be a single writer.
+        :param lock: Lock shared by every process using the block, created along with the block
+                     and required when attaching
+        """
+        if size <= 0:
+            raise InvalidSize("A buffer cannot have a negative or zero size.")
+        if lock is None:
+            if not create:
+                raise ValueError("Attaching to a shared ring buffer requires its lock")
+            lock = _context.Lock()
+        self._lock = lock
+        self.size = size
+        self.channels = channels
+        shape = (size,) if channels is None else (size, channels)
+        nbytes = _HEADER_SIZE + int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if create:
+            self._shm = SharedMemory(name=name, create=True, size=nbytes)
+        else:
+            self._shm = attach_shared_memory(name)
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self._shm.buf)
+        self._data = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=_HEADER_SIZE)
+        if create:
+            self._header[:] = 0
+        self.writable = create if writable is None else writable
+        if not self.writable:
+            self._header.setflags(write=False)
+            self._data.setflags(write=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def spec(self) -> dict:
+        """
+        Everything another process needs to attach to this buffer. It holds the lock, so it can
+        only be handed to a process when starting it.
+        """
+        return {
+            "size": self.size,
+            "channels": self.channels,
+            "dtype": self._data.dtype.str,
+            "name": self.name,
+            "lock": self._lock,
+        }
+
+    @classmethod
+    def attach(cls, spec: dict, writable=False) -> "SharedRingBuffer":
+        """Attaches to the buffer described by `spec` (see `spec`), read-only by default"""
+        return cls(create=False, writable=writable, **spec)
+
+    def append(self, value):
+        with self._lock:
+            super().append(value)
+
+    def extend(self, block):
+        with self._lock:
+            super().extend(block)
+
+    def snapshot(self, n=None, out=None) -> np.ndarray:
+        with self._lock:
+            return super().snapshot(n, out)
+
+    def snapshot_since(self, position, out=None) -> tuple[np.ndarray, int]:
+        with self._lock:
+            return super().snapshot_since(position, out)
+
+    def close(self):
+        # numpy views must be released before the mapping can be closed
+        self._header = self._data = None
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
@@ -7,6 +7,7 @@ from .gpmclientconfig import GPM_CLIENT_CONFIG_TEMPLATE
 from .adcconfig import ADC_CONFIG_TEMPLATE
 from .metricsconfig import METRICS_CONFIG_TEMPLATE
 from .processingconfig import PROCESSING_CONFIG_TEMPLATE
+from .recordingconfig import RECORDING_CONFIG_TEMPLATE
 
 __all__ = [
     "LoggerConfig",
@@ -15,4 +16,5 @@ __all__ = [
     "ADC_CONFIG_TEMPLATE",
     "METRICS_CONFIG_TEMPLATE",
     "PROCESSING_CONFIG_TEMPLATE",
+    "RECORDING_CONFIG_TEMPLATE",
 ]
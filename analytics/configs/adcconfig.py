@@ -6,6 +6,26 @@ ADC_CONFIG_TEMPLATE = {
     "inner_read_buffer_size": confuse.Optional(int, 2000),
     "outer_read_buffer_size": confuse.Optional(int, 2000),
     "mock_reader_state_buffer_size": confuse.Optional(int, 100),
-    "sleep_between_reads_in_seconds": confuse.Optional(int, 0.1),
+    # set to get a reproducible mock signal
+    "mock_seed": confuse.Optional(int, None),
+    # simulated channels, the first two are the inner and outer muscle
+    "mock_channels": confuse.Optional(int, 2),
+    # repeating [num_samples, [activation level per channel]] segments, random segments if null
+    "mock_schedule": confuse.Optional(list, None),
+    "mock_co_contraction": confuse.Optional(float, 0.1),
+    "mock_noise_floor": confuse.Optional(float, 0.05),
+    "mock_hum_amplitude": confuse.Optional(float, 0.0),
+    "sample_rate_in_hz": confuse.Optional(int, 1000),
+    "max_batch_size": confuse.Optional(int, 64),
     "use_mock_adc": confuse.Optional(bool, False),
+    "raw_spi_reads": confuse.Optional(bool, False),
+    # "process" reads the ADC in a dedicated process writing to shared memory
+    "acquisition_mode": confuse.Optional(confuse.OneOf(["thread", "process"]), "thread"),
+    # replays a recording instead of reading the ADC when set
+    "replay_file": confuse.Optional(str, None),
+    # 1 is real time, N is N times faster and 0 is as fast as possible
+    "replay_speed": confuse.Optional(float, 1.0),
+    # recording columns replayed as the inner and outer muscle
+    "replay_channels": confuse.Optional(confuse.Sequence(int), [0, 1]),
+    "replay_loop": confuse.Optional(bool, True),
 }
@@ -6,4 +6,12 @@ GPM_CLIENT_CONFIG_TEMPLATE = {
     "host": confuse.Optional(str, "127.0.0.1"),
     "port": confuse.Optional(int, 4760),
     "read_buffer_size": confuse.Optional(int, 1024),
+    # requests the async client sends before waiting for responses
+    "max_in_flight_requests": confuse.Optional(int, 64),
+    # resources with commands waiting for the dispatcher, the oldest is dropped beyond this
+    "command_queue_size": confuse.Optional(int, 8),
+    # seconds to wait for GPM to acknowledge a command before reconnecting
+    "ack_timeout_in_seconds": confuse.Optional(float, 1.0),
+    "reconnect_base_delay_in_seconds": confuse.Optional(float, 0.5),
+    "reconnect_max_delay_in_seconds": confuse.Optional(float, 10.0),
 }
@@ -3,5 +3,32 @@ import confuse
 ### This file defines config options for the `processing` module
 
 PROCESSING_CONFIG_TEMPLATE = {
-    "sleep_between_processing_in_seconds": confuse.Optional(int, 5)
+    "hop_size_in_samples": confuse.Optional(int, 50),
+    # resample acquired samples onto a uniform grid at `adc.sample_rate_in_hz` by their timestamps
+    "resample_to_sample_rate": confuse.Optional(bool, False),
+    "enable_filters": confuse.Optional(bool, False),
+    "highpass_freq_in_hz": confuse.Optional(int, 20),
+    "lowpass_freq_in_hz": confuse.Optional(int, 450),
+    "bandpass_order": confuse.Optional(int, 4),
+    # set to 0 to disable the notch filter
+    "notch_freq_in_hz": confuse.Optional(int, 60),
+    "notch_quality": confuse.Optional(int, 30),
+    # set to 0 to disable envelope smoothing
+    "smoothing_window_in_samples": confuse.Optional(int, 0),
+    "use_rms_envelope": confuse.Optional(bool, False),
+    # decimate the processed samples by this factor with a polyphase FIR filter, 1 disables it
+    "decimation_factor": confuse.Optional(int, 1),
+    # "before_envelope" decimates the filtered samples so that the envelope runs at the lower rate
+    "decimation_placement": confuse.Optional(confuse.OneOf(["after_envelope", "before_envelope"]), "after_envelope"),
+    # quantile of each calibration phase used as the muscle maximum, 1 uses the true maximum
+    "calibration_quantile": confuse.Optional(float, 1.0),
+    # Welch PSD of the acquired samples, disabled at 0, e.g. 256 to export spectral features
+    "spectral_segment_size_in_samples": confuse.Optional(int, 0),
+    "spectral_segments_averaged": confuse.Optional(int, 8),
+    "spectral_bands_in_hz": confuse.Optional(list, [[20, 50], [50, 150], [150, 450]]),
+    # "classifier" decides on grips with the model in `classifier_model_file` instead of thresholds
+    "decision_stage": confuse.Optional(confuse.OneOf(["thresholds", "classifier"]), "thresholds"),
+    "classifier_model_file": confuse.Optional(confuse.Filename(), None),
+    # number of consecutive windows a grip must be predicted for before it is sent
+    "classifier_min_consecutive_windows": confuse.Optional(int, 2),
 }
@@ -0,0 +1,11 @@
+import confuse
+
+### This file defines config options for the `recording` module
+
+RECORDING_CONFIG_TEMPLATE = {
+    "enabled": confuse.Optional(bool, False),
+    "directory": confuse.Optional(confuse.Filename(), "recordings"),
+    "chunk_size_in_samples": confuse.Optional(int, 4096),
+    # blocks and events waiting for the writer thread, further ones are dropped
+    "queue_size": confuse.Optional(int, 256),
+}
@@ -0,0 +1,13 @@
+"""
+Loading of the recordings in `data/`
+"""
+
+from .loader import Recording, load_directory, load_recording, parse_recording, recording_key
+
+__all__ = [
+    "Recording",
+    "load_directory",
+    "load_recording",
+    "parse_recording",
+    "recording_key",
+]
@@ -0,0 +1,18 @@
+# Myo armband captures (`0.csv`-`3.csv`): every row holds 8 consecutive samples of 8 channels,
+# then the gesture label of the row
+MYO_CHANNELS = 8
+MYO_SAMPLES_PER_ROW = 8
+MYO_ROW_LENGTH = MYO_CHANNELS * MYO_SAMPLES_PER_ROW + 1
+
+# OpenBCI GUI exports (`chathilnewdata.csv`):
+# "Sample Index; EXG Channel 0; Timestamp; Timestamp (Formatted)"
+OPENBCI_DELIMITER = ";"
+OPENBCI_NUMERIC_COLUMNS = 3
+OPENBCI_SAMPLE_COLUMN = 1
+OPENBCI_TIMESTAMP_COLUMN = 2
+
+# Parsed recordings are cached as `.npy` files in this directory next to the recording
+CACHE_DIR = ".cache"
+# file in every cache holding the absolute path of the recording it was parsed from
+CACHE_SOURCE_FILE = "source.txt"
+RECORDING_EXTENSIONS = (".csv", ".txt")
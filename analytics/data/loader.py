@@ -0,0 +1,185 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import warnings
+import numpy as np
+from typing import NamedTuple, Optional
+from analytics.data.constants import (
+    CACHE_DIR,
+    CACHE_SOURCE_FILE,
+    MYO_CHANNELS,
+    MYO_ROW_LENGTH,
+    MYO_SAMPLES_PER_ROW,
+    OPENBCI_DELIMITER,
+    OPENBCI_NUMERIC_COLUMNS,
+    OPENBCI_SAMPLE_COLUMN,
+    OPENBCI_TIMESTAMP_COLUMN,
+    RECORDING_EXTENSIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+# matches the trailing formatted timestamp of every OpenBCI row
+_OPENBCI_FORMATTED_TIMESTAMP = re.compile(rf"{OPENBCI_DELIMITER}[^{OPENBCI_DELIMITER}\n]*$", re.M)
+
+
+class Recording(NamedTuple):
+    """A recording normalized to a common layout, whatever format it was stored in"""
+
+    # (samples x channels) float64 array
+    samples: np.ndarray
+    # acquisition time of every sample in seconds, None if the format does not store it
+    timestamps: Optional[np.ndarray]
+    # integer label of every sample, None if the recording is unlabelled
+    labels: Optional[np.ndarray]
+
+
+def _parse_numbers(text: str, sep: str) -> np.ndarray:
+    # `fromstring` parses separated text in C, far faster than `loadtxt`, but it stops at the
+    # first malformed value and returns the values before it with only a deprecation warning
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        values = np.fromstring(text, dtype=np.float64, sep=sep)
+    expected = text.count(sep) + 1 if sep.strip() else len(text.split())
+    if len(values) != expected:
+        raise ValueError(f"Malformed value after {len(values)} of {expected} values")
+    return values
+
+
+def _parse_myo(text: str) -> Recording:
+    rows = _parse_numbers(text.replace("\n", ","), ",").reshape(-1, MYO_ROW_LENGTH)
+    samples = rows[:, :-1].reshape(-1, MYO_CHANNELS)
+    labels = np.repeat(rows[:, -1].astype(np.int64), MYO_SAMPLES_PER_ROW)
+    return Recording(samples, None, labels)
+
+
+def _parse_openbci(text: str) -> Recording:
+    body = text.split("\n", 1)[1]
+    # drop the formatted timestamp, which duplicates the numeric one
+    body = _OPENBCI_FORMATTED_TIMESTAMP.sub("", body)
+    values = _parse_numbers(body.replace(OPENBCI_DELIMITER, ",").replace("\n", ","), ",")
+    values = values.reshape(-1, OPENBCI_NUMERIC_COLUMNS)
+    return Recording(
+        values[:, OPENBCI_SAMPLE_COLUMN : OPENBCI_SAMPLE_COLUMN + 1],
+        values[:, OPENBCI_TIMESTAMP_COLUMN],
+        None,
+    )
+
+
+def _parse_csv(text: str, num_columns: int) -> Recording:
+    values = _parse_numbers(text.replace("\n", ","), ",").reshape(-1, num_columns)
+    return Recording(values, None, None)
+
+
+def _parse_single_column(text: str) -> Recording:
+    # any whitespace separates values
+    return Recording(_parse_numbers(text, " ")[:, np.newaxis], None, None)
+
+
+def parse_recording(path) -> Recording:
+    """
+    Parses a text recording from `data/`, detecting its format from the first line. Supports
+    Myo captures, OpenBCI GUI exports, plain comma-separated samples and one sample per line.
+
+    :param path: Path to the recording
+    """
+    with open(path) as f:
+        text = f.read().strip()
+    first_line = text.split("\n", 1)[0]
+    if OPENBCI_DELIMITER in first_line:
+        return _parse_openbci(text)
+    if "," in first_line:
+        num_columns = first_line.count(",") + 1
+        if num_columns == MYO_ROW_LENGTH:
+            return _parse_myo(text)
+        return _parse_csv(text, num_columns)
+    return _parse_single_column(text)
+
+
+def recording_key(path) -> str:
+    """
+    Key identifying a version of a recording by its path, size and modification time, so that
+    finding its cache only takes a `stat` rather than reading the whole recording
+    """
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _save_cache(recording: Recording, cache_path, source):
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    for field, values in recording._asdict().items():
+        if values is not None:
+            np.save(os.path.join(tmp_path, f"{field}.npy"), values)
+    with open(os.path.join(tmp_path, CACHE_SOURCE_FILE), "w") as f:
+        f.write(source)
+    try:
+        os.rename(tmp_path, cache_path)
+    except OSError:
+        # another process cached it first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def _prune_caches(cache_dir, cache_path, source):
+    """Removes the caches of earlier versions of the recording at `source`"""
+    current = os.path.basename(cache_path)
+    prefix = f"{os.path.basename(source)}."
+    for name in os.listdir(cache_dir):
+        if name == current or not name.startswith(prefix) or name.endswith(".tmp"):
+            continue
+        stale_path = os.path.join(cache_dir, name)
+        try:
+            with open(os.path.join(stale_path, CACHE_SOURCE_FILE)) as f:
+                # a recording with the same name elsewhere may share `cache_dir`
+                if f.read() != source:
+                    continue
+        except OSError:
+            continue
+        logger.info(f"Removing stale cache {stale_path}")
+        shutil.rmtree(stale_path, ignore_errors=True)
+
+
+def _load_cache(cache_path) -> Recording:
+    def load(field):
+        field_path = os.path.join(cache_path, f"{field}.npy")
+        return np.load(field_path, mmap_mode="r") if os.path.exists(field_path) else None
+
+    return Recording(*map(load, Recording._fields))
+
+
+def load_recording(path, cache_dir=None) -> Recording:
+    """
+    Loads a recording as read-only memory-mapped arrays. The recording is parsed once and cached
+    as `.npy` files keyed on its path, size and modification time, so later loads only map the
+    binary cache instead of re-parsing text. Caching a changed recording removes the caches of
+    its earlier versions.
+
+    :param path: Path to the recording
+    :param cache_dir: Directory holding the caches, defaults to `.cache` next to `path`
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    cache_path = os.path.join(cache_dir, f"{os.path.basename(path)}.{recording_key(path)}")
+    if not os.path.isdir(cache_path):
+        logger.info(f"Caching recording {path} to {cache_path}")
+        os.makedirs(cache_dir, exist_ok=True)
+        source = os.path.abspath(path)
+        _save_cache(parse_recording(path), cache_path, source)
+        _prune_caches(cache_dir, cache_path, source)
+    return _load_cache(cache_path)
+
+
+def load_directory(directory, cache_dir=None) -> dict[str, Recording]:
+    """
+    Loads every recording in `directory`, see `load_recording`.
+
+    :return: Recordings by file name
+    """
+    return {
+        name: load_recording(os.path.join(directory, name), cache_dir)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(RECORDING_EXTENSIONS)
+    }
@@ -0,0 +1,168 @@
+import asyncio
+import collections
+import logging
+import socket
+import analytics.protobuf.sgcp_pb2 as sgcp
+from analytics import config
+from analytics.gpm.client import GpmOfflineError
+from analytics.gpm.codec import encode_request, request_frame
+from analytics.gpm.constants import MAESTRO_RESOURCE
+from analytics.gpm.framing import FrameBuffer, frame
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncClient:
+    """
+    asyncio client for GPM with proper length-prefixed framing in both directions. Responses are
+    received into a reusable buffer with `sock_recv_into` and decoded from memoryviews of it.
+    Requests are pipelined: any number may be in flight on the connection at once, and as SGCP
+    responses carry no request id, GPM answering in order lets every response resolve the
+    oldest request still waiting for one.
+    """
+
+    def __init__(
+        self, host: str = None, port: int = None, read_buffer_size: int = None, max_in_flight: int = None
+    ):
+        """
+        :param host: GPM host, `gpm.host` by default
+        :param port: GPM port, `gpm.port` by default
+        :param read_buffer_size: Initial size of the receive buffer, `gpm.read_buffer_size` by default
+        :param max_in_flight: Requests sent before waiting for responses, `gpm.max_in_flight_requests` by default
+        """
+        gpm_config = config["gpm"]
+        self.host = host or gpm_config["host"].as_str()
+        self.port = port or gpm_config["port"].as_number()
+        self._frames = FrameBuffer(read_buffer_size or gpm_config["read_buffer_size"].as_number())
+        self._max_in_flight = asyncio.Semaphore(max_in_flight or gpm_config["max_in_flight_requests"].as_number())
+        self._socket = None
+        self._reader = None
+        # futures of the requests sent, oldest first
+        self._in_flight = collections.deque()
+        self._send_lock = asyncio.Lock()
+        self._error = None
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        # commands are tiny and latency bound, do not let Nagle hold them back
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            await loop.sock_connect(sock, (self.host, self.port))
+        except OSError as e:
+            sock.close()
+            raise GpmOfflineError(f"Connecting to GPM at {self.host}:{self.port} failed: {e}") from e
+        self._socket = sock
+        self._error = None
+        self._reader = asyncio.create_task(self._read_responses())
+        logger.info(f"Connected to GPM at {self.host}:{self.port}")
+
+    @property
+    def connected(self) -> bool:
+        return self._socket is not None and self._error is None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    async def send_frame(self, data: bytes) -> asyncio.Future:
+        """
+        Sends an already framed request without waiting for its response.
+
+        :param data: Length-prefixed serialized `sgcp.Request`
+        :return: Future resolving to the decoded `sgcp.Response`
+        """
+        if not self.connected:
+            raise GpmOfflineError(f"Not connected to GPM: {self._error}")
+        await self._max_in_flight.acquire()
+        async with self._send_lock:
+            # the connection may have failed while waiting, and no response would ever come
+            if not self.connected:
+                self._max_in_flight.release()
+                raise GpmOfflineError(f"Not connected to GPM: {self._error}")
+            future = asyncio.get_running_loop().create_future()
+            future.add_done_callback(lambda _: self._max_in_flight.release())
+            # queued under the lock, so that the queue order is the order requests are written in
+            self._in_flight.append(future)
+            try:
+                await asyncio.get_running_loop().sock_sendall(self._socket, data)
+            except OSError as e:
+                self._fail(GpmOfflineError(f"Sending to GPM failed: {e}"))
+        return future
+
+    async def send_request(self, request: sgcp.Request) -> sgcp.Response:
+        """Sends `request` and waits for its response, other requests may be in flight meanwhile"""
+        return await (await self.send_frame(frame(request.SerializeToString())))
+
+    async def send_message(self, resource: str, task_code: str) -> sgcp.Response:
+        """
+        Sends a SGCP request to GPM and waits for its response
+
+        :param resource: Name of the SGCP resource
+        :param task_code: Name of the task_code associated to `resource`
+        """
+        return await (await self.send_frame(request_frame(resource, task_code)))
+
+    async def send_maestro_data(self, task_code: str, targets=(), channels=()) -> sgcp.Response:
+        """
+        Sends a Maestro request with `TaskData` and waits for its response
+
+        :param task_code: Name of the Maestro task
+        :param targets: `maestro.TaskData.targets`
+        :param channels: `maestro.TaskData.channels`
+        """
+        data = encode_request(MAESTRO_RESOURCE, task_code, targets, channels)
+        return await (await self.send_frame(data))
+
+    async def _read_responses(self):
+        loop = asyncio.get_running_loop()
+        frames = self._frames
+        try:
+            while True:
+                received = await loop.sock_recv_into(self._socket, frames.writable())
+                if received == 0:
+                    raise GpmOfflineError("GPM closed the connection")
+                frames.commit(received)
+                for payload in frames.frames():
+                    # parsed straight from the memoryview, without copying the payload
+                    response = sgcp.Response.FromString(payload)
+                    if not self._in_flight:
+                        logger.warning(f"Dropping unsolicited GPM response {response}")
+                        continue
+                    future = self._in_flight.popleft()
+                    if not future.done():
+                        future.set_result(response)
+        except asyncio.CancelledError:
+            self._fail(GpmOfflineError("Client closed"))
+            raise
+        except Exception as e:
+            logger.error(f"Reading GPM responses failed: {e}")
+            self._fail(e if isinstance(e, GpmOfflineError) else GpmOfflineError(str(e)))
+
+    def _fail(self, error: Exception):
+        """Fails every request in flight, their responses can no longer be matched"""
+        self._error = error
+        while self._in_flight:
+            future = self._in_flight.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
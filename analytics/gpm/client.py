@@ -1,7 +1,7 @@
 import socket
 import logging
-import analytics.protobuf.sgcp_pb2 as sgcp
 from analytics import config
+from analytics.gpm.codec import request_frame
 from analytics.gpm.constants import PREFIX_LENGTH_SIZE
 from analytics.common.loggerutils import detail_trace
 from analytics.common.decorators import retryable
@@ -20,21 +20,26 @@ class Client:
     """
 
     @retryable(base_delay_in_seconds=1, logger=logger, max_retries=3)
-    def __init__(self):
+    def __init__(self, host: str = None, port: int = None):
+        """
+        :param host: GPM host, `gpm.host` by default
+        :param port: GPM port, `gpm.port` by default
+        """
         self.config = config["gpm"]
         logger.info(f"GPM client configs: {self.config}")
+        host = host or self.config["host"].as_str()
+        port = port or self.config["port"].as_number()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect(
-                (self.config["host"].as_str(), self.config["port"].as_number())
-            )
+            self.socket.connect((host, port))
         except ConnectionRefusedError:
+            self.socket.close()
             raise GpmOfflineError("Connection refused. Is GPM up and running?")
         self.READ_BUFFER_SIZE = self.config["read_buffer_size"].as_number()
 
-    def send_message(self, resource: str, task_code: str):
+    def send_message(self, resource: str, task_code: str) -> bytes:
         """
-        Sends a SGCP request to GPM
+        Sends a SGCP request to GPM and returns its length-prefixed response
 
         :param resource: Name of the SGCP resource
         :param task_code: Name of the task_code associated to `resource`
@@ -44,19 +49,33 @@ class Client:
             logger,
             log_start=True,
         ) as trace_step:
-            request = sgcp.Request()
-            request.resource = sgcp.Resource.Value(resource)
-            request.taskCode = task_code
-            # despite the name, `SerializeToString` returns the `bytes` type
-            buf = request.SerializeToString()
-            # prefix (64-bit) length to the protobuf frame to enable streaming
-            buf_len = len(buf).to_bytes(PREFIX_LENGTH_SIZE)
-            self.socket.sendall(buf_len + buf)
+            # commands are framed once and reused, see `analytics.gpm.codec`
+            self.socket.sendall(request_frame(resource, task_code))
             trace_step("sent_message")
-            data = self.recv()
+            data = self.recv_frame()
             trace_step("received_response")
             return data
 
+    def recv_frame(self) -> bytes:
+        """
+        Reads one length-prefixed response, however the stream splits it. Reading a fixed
+        number of bytes instead returns partial responses, or leaves part of one to be read
+        as the response to the next request.
+        """
+        prefix = self._recv_exactly(PREFIX_LENGTH_SIZE)
+        return prefix + self._recv_exactly(int.from_bytes(prefix, "big"))
+
+    def _recv_exactly(self, num_bytes: int) -> bytes:
+        data = bytearray(num_bytes)
+        view = memoryview(data)
+        received = 0
+        while received < num_bytes:
+            count = self.socket.recv_into(view[received:])
+            if count == 0:
+                raise GpmOfflineError("GPM closed the connection")
+            received += count
+        return bytes(data)
+
     def recv(self, num_bytes=None) -> bytes:
         """
         Reads num_bytes from underlying TCP stream. This is a blocking function and will wait until
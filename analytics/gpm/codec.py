@@ -0,0 +1,53 @@
+import analytics.protobuf.sgcp_pb2 as sgcp
+from analytics.gpm.constants import (
+    MAESTRO_CLOSE_FIST,
+    MAESTRO_OPEN_FIST,
+    MAESTRO_RESOURCE,
+)
+from analytics.gpm.framing import frame
+
+RESOURCES = {name: value for name, value in sgcp.Resource.items()}
+# commands sent on every decision, framed once at import
+STATIC_COMMANDS = ((MAESTRO_RESOURCE, MAESTRO_OPEN_FIST), (MAESTRO_RESOURCE, MAESTRO_CLOSE_FIST))
+
+
+def encode_request(resource: str, task_code: str, targets=None, channels=None) -> bytes:
+    """
+    Framed `sgcp.Request`, serialized by the protobuf runtime. Filling a fresh message with
+    `extend` is faster than assigning a `TaskData`, and than copying into a reusable buffer,
+    see `benchmarks/bench_sgcp.py`.
+
+    :param resource: Name of the SGCP resource
+    :param task_code: Name of the task_code associated to `resource`
+    :param targets: `maestro.TaskData.targets`, any sequence of ints including NumPy arrays,
+                    no `maestroData` if both `targets` and `channels` are None
+    :param channels: `maestro.TaskData.channels`, as `targets`
+    """
+    request = sgcp.Request(resource=RESOURCES[resource], taskCode=task_code)
+    if targets is not None or channels is not None:
+        if resource != MAESTRO_RESOURCE:
+            raise ValueError(f"Only {MAESTRO_RESOURCE} requests carry targets and channels")
+        data = request.maestroData
+        if targets is not None:
+            data.targets.extend(targets)
+        if channels is not None:
+            data.channels.extend(channels)
+        if not data.targets and not data.channels:
+            # sent even when empty, like an assigned `TaskData`
+            data.SetInParent()
+    return frame(request.SerializeToString())
+
+
+_static_frames = {command: encode_request(*command) for command in STATIC_COMMANDS}
+
+
+def request_frame(resource: str, task_code: str) -> bytes:
+    """
+    Framed request without task data, e.g. a Maestro grip command. Frames are encoded once and
+    the same `bytes` is returned on every later call.
+    """
+    key = (resource, task_code)
+    frame = _static_frames.get(key)
+    if frame is None:
+        frame = _static_frames[key] = encode_request(resource, task_code)
+    return frame
@@ -0,0 +1,222 @@
+import asyncio
+import collections
+import logging
+import random
+import threading
+import time
+import analytics.protobuf.sgcp_pb2 as sgcp
+from pydantic import BaseModel, ConfigDict
+from analytics import config
+from analytics.gpm.asyncclient import AsyncClient
+from analytics.gpm.client import GpmOfflineError
+from analytics.gpm.codec import request_frame
+from analytics.metrics.exporter import (
+    GPM_COMMAND_LATENCY,
+    GPM_COMMANDS_COALESCED,
+    GPM_COMMANDS_DROPPED,
+    GPM_RECONNECTS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DispatcherStats(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    submitted: int
+    acknowledged: int
+    coalesced: int
+    dropped: int
+    failed: int
+    reconnects: int
+    pending: int
+    mean_latency_in_seconds: float
+    max_latency_in_seconds: float
+
+
+class CommandDispatcher:
+    """
+    Sends GPM commands from its own thread running an asyncio event loop, so that callers never
+    block on GPM. Commands wait in a bounded queue holding the latest command of each resource:
+    a command superseded before it was sent, e.g. an OPEN_FIST followed by a CLOSE_FIST while GPM
+    is slow, is coalesced away. Frames are encoded once per command. The connection is made and
+    re-made in the background with exponential backoff, and the time from submitting a command
+    until GPM acknowledges it is recorded.
+    """
+
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        queue_size: int = None,
+        ack_timeout: float = None,
+        base_delay: float = None,
+        max_delay: float = None,
+    ):
+        """
+        :param host: GPM host, `gpm.host` by default
+        :param port: GPM port, `gpm.port` by default
+        :param queue_size: Number of resources with pending commands, `gpm.command_queue_size` by default
+        :param ack_timeout: Seconds to wait for a response before reconnecting
+        :param base_delay: First reconnection delay in seconds, doubled on every failed attempt
+        :param max_delay: Longest reconnection delay in seconds
+        """
+        gpm_config = config["gpm"]
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size or gpm_config["command_queue_size"].as_number()
+        self.ack_timeout = ack_timeout or gpm_config["ack_timeout_in_seconds"].as_number()
+        self.base_delay = base_delay or gpm_config["reconnect_base_delay_in_seconds"].as_number()
+        self.max_delay = max_delay or gpm_config["reconnect_max_delay_in_seconds"].as_number()
+        # (frame, submission time) of the latest unsent command of each resource, oldest first
+        self._pending = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wakeup = None
+        self._thread = None
+        self._running = False
+        self.submitted = 0
+        self.acknowledged = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+        self.reconnects = 0
+        self._latency_sum = 0.0
+        self.max_latency = 0.0
+
+    def start(self):
+        self._running = True
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), name="GpmDispatcher", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self, timeout=None):
+        """Stops sending, commands still pending are dropped"""
+        self._running = False
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, resource: str, task_code: str):
+        """
+        Queues a command without blocking, replacing any unsent command of the same resource.
+
+        :param resource: Name of the SGCP resource
+        :param task_code: Name of the task_code associated to `resource`
+        """
+        data = request_frame(resource, task_code)
+        with self._lock:
+            self.submitted += 1
+            if resource in self._pending:
+                del self._pending[resource]
+                self.coalesced += 1
+                GPM_COMMANDS_COALESCED.inc()
+            elif len(self._pending) >= self.queue_size:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+                GPM_COMMANDS_DROPPED.inc()
+            self._pending[resource] = (data, time.monotonic())
+        self._wake()
+
+    def _wake(self):
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # the loop was closed by `stop` meanwhile, nothing is waiting anymore
+            pass
+
+    def _run(self, started: threading.Event):
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.new_event_loop()
+        started.set()
+        try:
+            self._loop.run_until_complete(self._dispatch())
+        finally:
+            loop, self._loop = self._loop, None
+            loop.close()
+
+    async def _connect(self, attempt: int) -> AsyncClient:
+        """Connects to GPM, retrying with exponential backoff until connected or stopped"""
+        while self._running:
+            client = AsyncClient(self.host, self.port)
+            try:
+                await client.connect()
+                return client
+            except GpmOfflineError as e:
+                delay = min(self.max_delay, self.base_delay * 2**attempt) * random.uniform(0.5, 1)
+                attempt += 1
+                logger.warning(f"GPM connection attempt {attempt} failed: {e}, retrying in {delay:.2f} seconds")
+                try:
+                    await asyncio.wait_for(self._stopped(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        return None
+
+    async def _stopped(self):
+        while self._running:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    @staticmethod
+    async def _send(client: AsyncClient, data: bytes) -> sgcp.Response:
+        return await (await client.send_frame(data))
+
+    async def _dispatch(self):
+        client = await self._connect(0)
+        while self._running:
+            with self._lock:
+                command = self._pending.popitem(last=False) if self._pending else None
+            if command is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            resource, (data, submitted_at) = command
+            try:
+                response = await asyncio.wait_for(self._send(client, data), self.ack_timeout)
+            except (GpmOfflineError, asyncio.TimeoutError) as e:
+                self.failed += 1
+                logger.error(f"Sending command to GPM failed: {e}, reconnecting")
+                with self._lock:
+                    # retry the command after reconnecting, unless it was superseded meanwhile
+                    if resource not in self._pending:
+                        self._pending[resource] = (data, submitted_at)
+                        self._pending.move_to_end(resource, last=False)
+                await client.close()
+                self.reconnects += 1
+                GPM_RECONNECTS.inc()
+                client = await self._connect(1)
+                continue
+            latency = time.monotonic() - submitted_at
+            self.acknowledged += 1
+            self._latency_sum += latency
+            self.max_latency = max(self.max_latency, latency)
+            GPM_COMMAND_LATENCY.observe(latency)
+            logger.debug(f"GPM acknowledged command after {latency:.4f} seconds: {response}")
+        if client is not None:
+            await client.close()
+
+    def stats(self) -> DispatcherStats:
+        with self._lock:
+            pending = len(self._pending)
+        return DispatcherStats(
+            submitted=self.submitted,
+            acknowledged=self.acknowledged,
+            coalesced=self.coalesced,
+            dropped=self.dropped,
+            failed=self.failed,
+            reconnects=self.reconnects,
+            pending=pending,
+            mean_latency_in_seconds=self._latency_sum / self.acknowledged if self.acknowledged else 0.0,
+            max_latency_in_seconds=self.max_latency,
+        )
+
+
+def start_command_dispatcher() -> CommandDispatcher:
+    """Starts a `CommandDispatcher` to the configured GPM"""
+    dispatcher = CommandDispatcher()
+    dispatcher.start()
+    return dispatcher
@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import logging
+import random
+import socket
+import threading
+import time
+import analytics.protobuf.sgcp_pb2 as sgcp
+from pydantic import BaseModel, ConfigDict
+from analytics.gpm.framing import FrameBuffer, frame
+
+logger = logging.getLogger(__name__)
+
+# queued in place of a response to drop the connection, or to stop answering once answered
+_DROP = object()
+_CLOSE = object()
+
+
+class EmulatorStats(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    connections: int
+    requests: int
+    responses: int
+    dropped_connections: int
+
+
+class GpmEmulator:
+    """
+    Local stand-in for GPM speaking length-prefixed SGCP, to exercise and load test the clients
+    without the real GPM. Every request is answered with a `sgcp.Response` after `delay` plus up
+    to `jitter` seconds. Requests on a connection are handled concurrently, as pipelining clients
+    expect, but answered in the order they arrived. Connections can be dropped at random instead
+    of answering, and responses can be written in random fragments to exercise reassembly.
+    The server runs its own asyncio event loop on a background thread.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        delay: float = 0.0,
+        jitter: float = 0.0,
+        drop_probability: float = 0.0,
+        partial_writes: bool = False,
+        status_code: int = 200,
+        seed: int = None,
+    ):
+        """
+        :param host: Address to listen on
+        :param port: Port to listen on, any free port if 0, see `port` once started
+        :param delay: Seconds between receiving a request and answering it
+        :param jitter: Upper bound of uniformly distributed seconds added to `delay`
+        :param drop_probability: Probability of closing the connection instead of answering a request
+        :param partial_writes: Whether to write every response in randomly sized fragments
+        :param status_code: `sgcp.Response.statusCode` of every response
+        :param seed: Seed of the jitter, drops and fragment sizes
+        """
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.jitter = jitter
+        self.drop_probability = drop_probability
+        self.partial_writes = partial_writes
+        self.status_code = status_code
+        self._random = random.Random(seed)
+        self._loop = None
+        self._server = None
+        self._writers = set()
+        self._thread = None
+        self._error = None
+        self.task_codes = []
+        self.connections = 0
+        self.requests = 0
+        self.responses = 0
+        self.dropped_connections = 0
+
+    def start(self):
+        """Starts listening, re-raising the error if the server could not be started"""
+        started = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(started,), name="GpmEmulator", daemon=True)
+        self._thread.start()
+        started.wait()
+        if self._error is not None:
+            self._thread.join()
+            raise self._error
+        logger.info(f"GPM emulator listening on {self.host}:{self.port}")
+
+    def stop(self, timeout=None):
+        """Stops listening and aborts every open connection"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._shutdown)
+        self.join(timeout)
+
+    def join(self, timeout=None):
+        """Waits until the emulator is stopped"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _shutdown(self):
+        if self._server is not None:
+            self._server.close()
+        for writer in self._writers:
+            writer.transport.abort()
+
+    def _run(self, started: threading.Event):
+        self._loop = asyncio.new_event_loop()
+        try:
+            try:
+                self._server = self._loop.run_until_complete(
+                    asyncio.start_server(self._serve, self.host, self.port)
+                )
+            except OSError as e:
+                self._error = e
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_until_complete(self._server.serve_forever())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            started.set()
+            # let the aborted connections finish
+            pending = asyncio.all_tasks(self._loop)
+            if pending:
+                self._loop.run_until_complete(asyncio.wait(pending))
+            self._loop.close()
+
+    def _response(self, request: sgcp.Request) -> bytes:
+        return frame(sgcp.Response(statusCode=self.status_code, message=request.taskCode).SerializeToString())
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._writers.add(writer)
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # (time due, response) of every request received and not answered yet, in order
+        responses = asyncio.Queue()
+        responder = asyncio.create_task(self._respond(responses, writer))
+        frames = FrameBuffer(1024)
+        try:
+            while not responder.done():
+                buffer = frames.writable()
+                data = await reader.read(len(buffer))
+                if not data:
+                    break
+                buffer[: len(data)] = data
+                frames.commit(len(data))
+                for payload in frames.frames():
+                    request = sgcp.Request.FromString(payload)
+                    self.requests += 1
+                    self.task_codes.append(request.taskCode)
+                    if self._random.random() < self.drop_probability:
+                        responses.put_nowait(_DROP)
+                        continue
+                    due = time.monotonic() + self.delay + self._random.uniform(0, self.jitter)
+                    responses.put_nowait((due, self._response(request)))
+        except ConnectionError:
+            pass
+        finally:
+            # answer what was received before the client stopped sending
+            responses.put_nowait(_CLOSE)
+            await responder
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _respond(self, responses: asyncio.Queue, writer: asyncio.StreamWriter):
+        last_due = 0.0
+        try:
+            while True:
+                item = await responses.get()
+                if item is _CLOSE:
+                    return
+                if item is _DROP:
+                    logger.debug("GPM emulator dropping connection")
+                    self.dropped_connections += 1
+                    writer.transport.abort()
+                    return
+                due, response = item
+                # never answer before an earlier request
+                last_due = max(last_due, due)
+                wait = last_due - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                if self.partial_writes:
+                    start = 0
+                    while start < len(response):
+                        end = start + self._random.randint(1, len(response) - start)
+                        writer.write(response[start:end])
+                        await writer.drain()
+                        # give the fragment its own segment
+                        await asyncio.sleep(0)
+                        start = end
+                else:
+                    writer.write(response)
+                    await writer.drain()
+                self.responses += 1
+        except ConnectionError:
+            pass
+
+    def stats(self) -> EmulatorStats:
+        return EmulatorStats(
+            connections=self.connections,
+            requests=self.requests,
+            responses=self.responses,
+            dropped_connections=self.dropped_connections,
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves a local GPM stand-in answering every SGCP request")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4760)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds before answering a request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Upper bound of random seconds added to --delay")
+    parser.add_argument("--drop-probability", type=float, default=0.0, help="Probability of dropping the connection instead of answering")
+    parser.add_argument("--partial-writes", action="store_true", help="Write responses in random fragments")
+    parser.add_argument("--status-code", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    emulator = GpmEmulator(
+        args.host,
+        args.port,
+        args.delay,
+        args.jitter,
+        args.drop_probability,
+        args.partial_writes,
+        args.status_code,
+        args.seed,
+    )
+    emulator.start()
+    try:
+        emulator.join()
+    except KeyboardInterrupt:
+        emulator.stop()
+    logger.info(f"GPM emulator stopped: {emulator.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from analytics.gpm.constants import PREFIX_LENGTH_SIZE
+
+
+class FrameTooLarge(Exception):
+    pass
+
+
+def frame(payload: bytes) -> bytes:
+    """Prefixes `payload` with its big-endian 64-bit length, the SGCP stream framing"""
+    return len(payload).to_bytes(PREFIX_LENGTH_SIZE, "big") + payload
+
+
+class FrameBuffer:
+    """
+    Reassembles length-prefixed SGCP frames from a byte stream. Bytes are received straight
+    into a reusable buffer (see `writable`), and payloads are returned as memoryviews into it,
+    so neither reading nor splitting frames copies the stream. Reads may hold partial frames
+    or several concatenated frames.
+    """
+
+    def __init__(self, size: int, max_frame_size: int = 1 << 24):
+        """
+        :param size: Initial buffer size, grown to fit larger frames
+        :param max_frame_size: Largest accepted payload, longer prefixes are treated as corrupt
+        """
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self.max_frame_size = max_frame_size
+        # the unparsed bytes are `_buffer[_start:_end]`
+        self._start = 0
+        self._end = 0
+
+    def writable(self) -> memoryview:
+        """
+        Free space to receive into, e.g. with `socket.recv_into`, followed by `commit`. Payloads
+        returned earlier are invalidated, as their bytes may be moved to make room.
+        """
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buffer):
+            # move the partial frame to the front, growing the buffer if it fills it
+            pending = self._end - self._start
+            if self._start == 0:
+                self._grow(2 * len(self._buffer))
+            else:
+                self._view[:pending] = self._view[self._start : self._end]
+                self._start, self._end = 0, pending
+        return self._view[self._end :]
+
+    def commit(self, num_bytes: int):
+        """Marks `num_bytes` received into `writable()` as part of the stream"""
+        self._end += num_bytes
+
+    def frames(self):
+        """Yields the payload of every complete frame received, as memoryviews into the buffer"""
+        while self._end - self._start >= PREFIX_LENGTH_SIZE:
+            prefix_end = self._start + PREFIX_LENGTH_SIZE
+            length = int.from_bytes(self._view[self._start : prefix_end], "big")
+            if length > self.max_frame_size:
+                raise FrameTooLarge(f"Frame of {length} bytes exceeds {self.max_frame_size} bytes")
+            if prefix_end + length > self._end:
+                if PREFIX_LENGTH_SIZE + length > len(self._buffer):
+                    self._grow(PREFIX_LENGTH_SIZE + length)
+                return
+            self._start = prefix_end + length
+            yield self._view[prefix_end : self._start]
+
+    def _grow(self, size: int):
+        pending = self._end - self._start
+        buffer = bytearray(max(size, pending))
+        buffer[:pending] = self._view[self._start : self._end]
+        self._buffer, self._view = buffer, memoryview(buffer)
+        self._start, self._end = 0, pending
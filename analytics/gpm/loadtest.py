@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import logging
+import time
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from analytics.gpm.asyncclient import AsyncClient
+from analytics.gpm.client import Client, GpmOfflineError
+from analytics.gpm.constants import MAESTRO_OPEN_FIST, MAESTRO_RESOURCE
+from analytics.gpm.emulator import GpmEmulator
+
+logger = logging.getLogger(__name__)
+
+CLIENTS = ("client", "asyncclient")
+
+
+class LoadResult(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    client: str
+    requests: int
+    errors: int
+    duration_in_seconds: float
+    requests_per_second: float
+    p50_latency_in_seconds: float
+    p99_latency_in_seconds: float
+    p999_latency_in_seconds: float
+    max_latency_in_seconds: float
+
+
+def summarize(client: str, latencies, errors: int, duration: float) -> LoadResult:
+    """
+    :param client: Name of the client measured
+    :param latencies: Seconds from sending every successful request until its response
+    :param errors: Number of failed requests
+    :param duration: Seconds the whole run took
+    """
+    latencies = np.asarray(latencies, dtype=np.float64)
+    p50, p99, p999, maximum = np.percentile(latencies, [50, 99, 99.9, 100]) if len(latencies) else (0.0,) * 4
+    return LoadResult(
+        client=client,
+        requests=len(latencies),
+        errors=errors,
+        duration_in_seconds=duration,
+        requests_per_second=len(latencies) / duration if duration > 0 else 0.0,
+        p50_latency_in_seconds=p50,
+        p99_latency_in_seconds=p99,
+        p999_latency_in_seconds=p999,
+        max_latency_in_seconds=maximum,
+    )
+
+
+def run_client(
+    host: str, port: int, requests: int, resource: str = MAESTRO_RESOURCE, task_code: str = MAESTRO_OPEN_FIST
+) -> LoadResult:
+    """
+    Sends `requests` requests one after the other with the blocking `Client`, reconnecting
+    whenever the connection fails
+    """
+    latencies = []
+    errors = 0
+    client = Client(host, port)
+    start = time.perf_counter()
+    for _ in range(requests):
+        sent_at = time.perf_counter()
+        try:
+            client.send_message(resource, task_code)
+        except (GpmOfflineError, OSError) as e:
+            logger.debug(f"Request failed: {e}, reconnecting")
+            errors += 1
+            client.close()
+            client = Client(host, port)
+            continue
+        latencies.append(time.perf_counter() - sent_at)
+    duration = time.perf_counter() - start
+    client.close()
+    return summarize("client", latencies, errors, duration)
+
+
+async def _run_async_client(host, port, requests, concurrency, resource, task_code) -> LoadResult:
+    latencies = []
+    errors = 0
+    remaining = requests
+    client = AsyncClient(host, port)
+    await client.connect()
+    reconnecting = asyncio.Lock()
+
+    async def worker():
+        nonlocal client, errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            sent_at = time.perf_counter()
+            try:
+                await client.send_message(resource, task_code)
+            except GpmOfflineError as e:
+                errors += 1
+                async with reconnecting:
+                    if not client.connected:
+                        logger.debug(f"Request failed: {e}, reconnecting")
+                        await client.close()
+                        client = AsyncClient(host, port)
+                        await client.connect()
+                continue
+            latencies.append(time.perf_counter() - sent_at)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+    await client.close()
+    return summarize("asyncclient", latencies, errors, duration)
+
+
+def run_async_client(
+    host: str,
+    port: int,
+    requests: int,
+    concurrency: int = 16,
+    resource: str = MAESTRO_RESOURCE,
+    task_code: str = MAESTRO_OPEN_FIST,
+) -> LoadResult:
+    """
+    Sends `requests` requests with the pipelining `AsyncClient`, keeping up to `concurrency` in
+    flight, and reconnecting whenever the connection fails
+    """
+    return asyncio.run(_run_async_client(host, port, requests, concurrency, resource, task_code))
+
+
+def run(client: str, host: str, port: int, requests: int, concurrency: int = 16) -> LoadResult:
+    """Load tests the client named `client`, one of `CLIENTS`"""
+    if client == "client":
+        return run_client(host, port, requests)
+    if client == "asyncclient":
+        return run_async_client(host, port, requests, concurrency)
+    raise ValueError(f"Unknown client {client}, expected one of {CLIENTS}")
+
+
+def format_result(result: LoadResult) -> str:
+    return (
+        f"{result.client:12s} {result.requests_per_second:10.0f} req/s  "
+        f"p50 {result.p50_latency_in_seconds * 1e6:8.0f} us  "
+        f"p99 {result.p99_latency_in_seconds * 1e6:8.0f} us  "
+        f"p999 {result.p999_latency_in_seconds * 1e6:8.0f} us  "
+        f"({result.requests} ok, {result.errors} failed)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures throughput and latency percentiles of the GPM clients, against a local "
+        "GPM emulator unless --port is given"
+    )
+    parser.add_argument("--clients", nargs="+", choices=CLIENTS, default=list(CLIENTS))
+    parser.add_argument("--requests", type=int, default=10000, help="Requests sent by every client")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests the async client keeps in flight")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Port of a running GPM, starts an emulator if unset")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds the emulator waits before answering")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Upper bound of random seconds added to --delay")
+    parser.add_argument("--drop-probability", type=float, default=0.0, help="Probability of the emulator dropping the connection")
+    parser.add_argument("--partial-writes", action="store_true", help="Have the emulator write responses in random fragments")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    # the clients log every request at INFO, which would dominate the latencies measured
+    logging.basicConfig(level=logging.WARNING)
+
+    emulator = None
+    port = args.port
+    if port is None:
+        emulator = GpmEmulator(
+            args.host,
+            0,
+            args.delay,
+            args.jitter,
+            args.drop_probability,
+            args.partial_writes,
+            seed=args.seed,
+        )
+        emulator.start()
+        port = emulator.port
+    try:
+        for client in args.clients:
+            print(format_result(run(client, args.host, port, args.requests, args.concurrency)))
+    finally:
+        if emulator is not None:
+            emulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,81 @@
 import logging
-from prometheus_client import start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from analytics import config
 
 ### This file contains the Prometheus exporter server and our metric definitions
 
 logger = logging.getLogger(__name__)
 
+ADC_TARGET_RATE = Gauge("adc_target_rate_hz", "Configured ADC sample rate")
+ADC_ACHIEVED_RATE = Gauge("adc_achieved_rate_hz", "Average ADC sample rate since start")
+ADC_OVERRUNS = Gauge(
+    "adc_overruns", "Number of sampling deadlines missed by at least one period"
+)
+ADC_SKIPPED_SAMPLES = Gauge(
+    "adc_skipped_samples", "Number of samples dropped because the reader fell too far behind"
+)
+ADC_MEAN_JITTER = Gauge("adc_mean_jitter_seconds", "Mean lateness of sampling wake-ups")
+ADC_MAX_JITTER = Gauge("adc_max_jitter_seconds", "Worst lateness of sampling wake-ups")
+
+PROCESSING_HOPS = Counter("processing_hops", "Number of processing hops run")
+PROCESSING_MISSED_HOPS = Counter(
+    "processing_missed_hops", "Number of hops merged into a later one because processing lagged"
+)
+PROCESSING_DROPPED_SAMPLES = Counter(
+    "processing_dropped_samples", "Number of samples overwritten before they were processed"
+)
+PROCESSING_HOP_LATENCY = Histogram(
+    "processing_hop_latency_seconds",
+    "Time from acquiring the sample that completes a hop until the hop is processed",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0),
+)
+
+PROCESSING_RESAMPLED_GAPS = Counter(
+    "processing_resampled_gaps", "Number of gaps between samples interpolated across by resampling"
+)
+PROCESSING_RESAMPLED_DUPLICATES = Counter(
+    "processing_resampled_duplicates",
+    "Number of samples dropped by resampling for repeating or going back in time",
+)
+
+PROCESSING_MEAN_FREQUENCY = Gauge(
+    "processing_mean_frequency_hz", "Power-weighted mean frequency of the latest PSD", ["channel"]
+)
+PROCESSING_MEDIAN_FREQUENCY = Gauge(
+    "processing_median_frequency_hz", "Frequency splitting the power of the latest PSD in halves", ["channel"]
+)
+PROCESSING_BAND_POWER = Gauge(
+    "processing_band_power", "Power of the latest PSD within a frequency band", ["channel", "band"]
+)
+
+GPM_COMMAND_LATENCY = Histogram(
+    "gpm_command_latency_seconds",
+    "Time from submitting a command to the dispatcher until GPM acknowledges it",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0),
+)
+GPM_COMMANDS_COALESCED = Counter(
+    "gpm_commands_coalesced", "Number of commands replaced by a later one before they were sent"
+)
+GPM_COMMANDS_DROPPED = Counter(
+    "gpm_commands_dropped", "Number of commands dropped because the command queue was full"
+)
+GPM_RECONNECTS = Counter("gpm_reconnects", "Number of times the connection to GPM was re-established")
+
+
+def bind_sampling_metrics(scheduler):
+    """
+    Points the ADC gauges at `scheduler`. Values are read lazily on scrape, so this adds no cost
+    to the sampling loop.
+
+    :param scheduler: The `SamplingScheduler` driving the ADC reader
+    """
+    ADC_TARGET_RATE.set_function(lambda: scheduler.rate_in_hz or 0)
+    ADC_ACHIEVED_RATE.set_function(lambda: scheduler.achieved_rate_in_hz)
+    ADC_OVERRUNS.set_function(lambda: scheduler.overruns)
+    ADC_SKIPPED_SAMPLES.set_function(lambda: scheduler.skipped_samples)
+    ADC_MEAN_JITTER.set_function(lambda: scheduler.mean_jitter)
+    ADC_MAX_JITTER.set_function(lambda: scheduler.max_jitter)
+
 
 def start_metrics_server():
     METRICS_PORT = config["metrics"]["port"].as_number()
@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+from analytics.adc.constants import INNER_CHANNEL, OUTER_CHANNEL, NUM_CHANNELS
+from analytics.common.sharedarray import SharedArray
+from analytics.data import load_recording, recording_key
+from analytics.data.constants import CACHE_DIR
+from analytics.processing.constants import (
+    INNER_THRESHOLD,
+    OUTER_THRESHOLD,
+    INNER_LOWER_THRESHOLD,
+    OUTER_LOWER_THRESHOLD,
+)
+from analytics.processing.envelope import MovingAverage
+from analytics.processing.evaluation import (
+    evaluate_state_machine,
+    preprocess_batch,
+    window_maximums_at,
+)
+from analytics.processing.iir import make_emg_filter
+from analytics.processing.pipeline import ActivationStateMachine, EmgPipeline
+from analytics.recording.constants import EVENT_ACTIVATE
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_FILE = "autotune.json"
+
+
+class Preprocessing(NamedTuple):
+    smoothing_window: int
+    # 0 disables the bandpass filter
+    highpass_freq: float
+    lowpass_freq: float
+
+
+class Thresholds(NamedTuple):
+    inner_threshold: float
+    outer_threshold: float
+    inner_lower_threshold: float
+    outer_lower_threshold: float
+
+
+class Score(NamedTuple):
+    false_activations: int
+    missed_activations: int
+    # fraction of decisions where the arm state differs from the labelled one
+    mismatch: float
+
+
+class Settings(NamedTuple):
+    """Everything besides the grid point that determines a score"""
+
+    sample_rate: float
+    inner_window_size: int
+    outer_window_size: int
+    hop_size: int
+    channels: tuple[int, int]
+    activation_labels: tuple[int, ...]
+    calibration_quantile: float
+
+
+def score_decisions(states, transitions, target) -> Score:
+    """
+    Scores the decisions made on one recording against the labelled arm state.
+
+    :param states: Activation state after each decision
+    :param transitions: `EVENT_*` for state changes or 0, after each decision
+    :param target: Whether the arm should be activated at each decision
+    """
+    false_activations = int(np.count_nonzero((transitions == EVENT_ACTIVATE) & ~target))
+    # every labelled activation during which the arm never activated is missed
+    starts = np.flatnonzero(target & ~np.concatenate(([False], target[:-1])))
+    ends = np.flatnonzero(target & ~np.concatenate((target[1:], [False]))) + 1
+    activated = np.concatenate(([0], np.cumsum(states)))
+    missed_activations = int(np.count_nonzero(activated[ends] == activated[starts]))
+    mismatch = float(np.mean(states != target)) if len(states) else 0.0
+    return Score(false_activations, missed_activations, mismatch)
+
+
+# datasets attached in each worker process: (samples, labels) `SharedArray` pairs
+_datasets = []
+
+
+def _attach_datasets(specs):
+    for sample_spec, label_spec in specs:
+        _datasets.append((SharedArray.attach(sample_spec), SharedArray.attach(label_spec)))
+
+
+def _make_pipeline(preprocessing: Preprocessing, settings: Settings) -> EmgPipeline:
+    filter = None
+    if preprocessing.highpass_freq > 0:
+        # keep the corner below Nyquist for low-rate recordings such as the Myo captures
+        lowpass = min(preprocessing.lowpass_freq, 0.45 * settings.sample_rate)
+        filter = make_emg_filter(settings.sample_rate, NUM_CHANNELS, preprocessing.highpass_freq, lowpass)
+    envelope = None
+    if preprocessing.smoothing_window > 0:
+        envelope = MovingAverage(preprocessing.smoothing_window, NUM_CHANNELS)
+    return EmgPipeline(settings.inner_window_size, settings.outer_window_size, filter, envelope)
+
+
+def _evaluate(preprocessing: Preprocessing, grid: list[Thresholds], settings: Settings) -> list[Score]:
+    """
+    Scores every threshold combination of `grid` for one preprocessing combination, summed over
+    all datasets. The window maxima only depend on the preprocessing, so they are computed once
+    and only the state machine runs per threshold combination.
+    """
+    runs = []
+    for shared_samples, shared_labels in _datasets:
+        samples, labels = shared_samples.array, shared_labels.array
+        pipeline = _make_pipeline(preprocessing, settings)
+        warmup = max(settings.inner_window_size, settings.outer_window_size)
+        processed = preprocess_batch(samples, pipeline, warmup, settings.hop_size)
+        ends = np.arange(warmup + settings.hop_size, len(processed) + 1, settings.hop_size)
+        maximums = np.column_stack(
+            (
+                window_maximums_at(processed[:, INNER_CHANNEL], settings.inner_window_size, ends),
+                window_maximums_at(processed[:, OUTER_CHANNEL], settings.outer_window_size, ends),
+            )
+        )
+        target = np.isin(labels[ends - 1], settings.activation_labels)
+        runs.append((maximums, target))
+    # one calibration over all datasets, as every gesture is performed by the same arm
+    calibrated = np.quantile(np.concatenate([m for m, _ in runs]), settings.calibration_quantile, axis=0)
+
+    scores = []
+    for thresholds in grid:
+        total = np.zeros(3)
+        for maximums, target in runs:
+            machine = ActivationStateMachine(*calibrated)
+            (
+                machine.inner_threshold,
+                machine.outer_threshold,
+                machine.inner_lower_threshold,
+                machine.outer_lower_threshold,
+            ) = thresholds
+            states, transitions = evaluate_state_machine(maximums, machine)
+            total += score_decisions(states, transitions, target)
+        scores.append(Score(int(total[0]), int(total[1]), float(total[2]) / len(runs)))
+    return scores
+
+
+def _point_key(dataset_keys, settings: Settings, preprocessing, thresholds) -> str:
+    description = [dataset_keys, settings, preprocessing, thresholds]
+    return hashlib.sha1(json.dumps(description).encode()).hexdigest()
+
+
+def autotune(
+    paths,
+    settings: Settings,
+    preprocessing_grid: list[Preprocessing],
+    threshold_grid: list[Thresholds],
+    cache_path=None,
+    max_workers=None,
+) -> list[tuple[Preprocessing, Thresholds, Score]]:
+    """
+    Scores every combination of `preprocessing_grid` and `threshold_grid` on the labelled
+    recordings at `paths`, fanning the preprocessing combinations out over a process pool.
+    Recordings are copied once into shared memory that every worker maps, rather than being
+    pickled per task. Scores are cached in `cache_path`, keyed on the recordings' versions, the
+    settings and the grid point, so re-runs only evaluate new grid points.
+
+    :return: (preprocessing, thresholds, score) for every grid point, best first
+    """
+    dataset_keys = [recording_key(path) for path in paths]
+    cache = {}
+    if cache_path is not None and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+    grid = list(itertools.product(preprocessing_grid, threshold_grid))
+    keys = [_point_key(dataset_keys, settings, *point) for point in grid]
+    missing = {}
+    for (preprocessing, thresholds), key in zip(grid, keys):
+        if key not in cache:
+            missing.setdefault(preprocessing, []).append(thresholds)
+    logger.info(f"Evaluating {sum(map(len, missing.values()))} of {len(grid)} grid points")
+
+    if missing:
+        shared = []
+        try:
+            for path in paths:
+                recording = load_recording(path)
+                if recording.labels is None:
+                    raise ValueError(f"Recording {path} is not labelled")
+                samples = np.ascontiguousarray(recording.samples[:, list(settings.channels)])
+                shared.append((SharedArray.copy_of(samples), SharedArray.copy_of(np.asarray(recording.labels))))
+            specs = [(samples.spec(), labels.spec()) for samples, labels in shared]
+            with ProcessPoolExecutor(
+                max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_attach_datasets,
+                initargs=(specs,),
+            ) as executor:
+                futures = {
+                    preprocessing: executor.submit(_evaluate, preprocessing, thresholds, settings)
+                    for preprocessing, thresholds in missing.items()
+                }
+                for preprocessing, future in futures.items():
+                    for thresholds, score in zip(missing[preprocessing], future.result()):
+                        cache[_point_key(dataset_keys, settings, preprocessing, thresholds)] = score
+        finally:
+            for arrays in shared:
+                for array in arrays:
+                    array.close()
+                    array.unlink()
+        if cache_path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump(cache, f)
+
+    results = [(*point, Score(*cache[key])) for point, key in zip(grid, keys)]
+    return sorted(results, key=lambda result: (result[2][0] + result[2][1], result[2][2]))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sweeps the activation thresholds and preprocessing over labelled recordings"
+    )
+    parser.add_argument("recordings", nargs="+", help="Labelled recordings, e.g. data/[0-3].csv")
+    parser.add_argument("--activation-labels", type=int, nargs="+", required=True,
+                        help="Labels during which the grip should be activated")
+    parser.add_argument("--channels", type=int, nargs=2, default=(0, 1), help="Inner and outer columns")
+    parser.add_argument("--sample-rate", type=float, default=200, help="Sample rate of the recordings")
+    parser.add_argument("--window", type=int, nargs=2, default=(200, 200), help="Inner and outer window sizes")
+    parser.add_argument("--hop-size", type=int, default=50)
+    parser.add_argument("--calibration-quantile", type=float, default=1.0)
+    parser.add_argument("--inner-threshold", type=float, nargs="+", default=[0.5, 0.65, INNER_THRESHOLD])
+    parser.add_argument("--outer-threshold", type=float, nargs="+", default=[0.5, 0.65, OUTER_THRESHOLD])
+    parser.add_argument("--inner-lower-threshold", type=float, nargs="+", default=[0.3, INNER_LOWER_THRESHOLD, 0.6])
+    parser.add_argument("--outer-lower-threshold", type=float, nargs="+", default=[1.0, OUTER_LOWER_THRESHOLD, 2.0])
+    parser.add_argument("--smoothing-window", type=int, nargs="+", default=[0, 25, 50])
+    parser.add_argument("--highpass", type=float, nargs="+", default=[0, 20], help="0 disables filtering")
+    parser.add_argument("--lowpass", type=float, nargs="+", default=[450])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    settings = Settings(
+        args.sample_rate,
+        *args.window,
+        args.hop_size,
+        tuple(args.channels),
+        tuple(args.activation_labels),
+        args.calibration_quantile,
+    )
+    preprocessing_grid = [
+        Preprocessing(*point)
+        for point in itertools.product(args.smoothing_window, args.highpass, args.lowpass)
+    ]
+    threshold_grid = [
+        Thresholds(*point)
+        for point in itertools.product(
+            args.inner_threshold, args.outer_threshold, args.inner_lower_threshold, args.outer_lower_threshold
+        )
+    ]
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(args.recordings[0])), CACHE_DIR, RESULT_CACHE_FILE)
+    results = autotune(args.recordings, settings, preprocessing_grid, threshold_grid, cache_path, args.workers)
+    for preprocessing, thresholds, score in results[: args.top]:
+        print(f"{score}\n    {preprocessing}\n    {thresholds}")
+
+
+if __name__ == "__main__":
+    main()
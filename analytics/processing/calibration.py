@@ -0,0 +1,110 @@
+import numpy as np
+
+# ratio between the capacities of consecutive levels, as in KLL
+CAPACITY_DECAY = 2 / 3
+
+
+class QuantileSketch:
+    """
+    A fixed-memory streaming quantile sketch (a simplified KLL sketch). Values are added to
+    level 0; whenever a level holds as many items as its capacity it is sorted and every other
+    item (with a random offset) is promoted to the next level with twice the weight. The top
+    level keeps `capacity` items and every level below it keeps `CAPACITY_DECAY` times as many
+    as the level above, so all levels together hold at most about 3 * `capacity` items besides
+    the latest block, however many values were added. Updates are vectorized over blocks.
+    """
+
+    def __init__(self, capacity: int = 256, seed: int = 0):
+        """
+        :param capacity: Number of items kept by the top level, larger is more accurate
+        :param seed: Seed for the compaction offsets, so results are reproducible
+        """
+        self.capacity = capacity
+        self.count = 0
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _level_capacity(self, level: int) -> int:
+        depth = len(self._levels) - 1 - level
+        return max(2, int(np.ceil(self.capacity * CAPACITY_DECAY**depth)))
+
+    def update(self, values: np.ndarray):
+        """Adds a 1D block of values to the sketch"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        self.count += len(values)
+        self._levels[0] = np.concatenate((self._levels[0], values))
+        self._compact()
+
+    def _compact(self):
+        level = 0
+        while level < len(self._levels):
+            if len(self._levels[level]) < self._level_capacity(level):
+                level += 1
+                continue
+            items = np.sort(self._levels[level])
+            # an odd item out stays behind so no weight is lost
+            keep = items[-1:] if len(items) % 2 else items[:0]
+            items = items[: len(items) - len(keep)]
+            promoted = items[self._rng.integers(2) :: 2]
+            self._levels[level] = keep
+            if level + 1 == len(self._levels):
+                self._levels.append(promoted)
+                # a new top level shrinks the capacities of every level below it
+                level = 0
+            else:
+                self._levels[level + 1] = np.concatenate((self._levels[level + 1], promoted))
+                level += 1
+
+    def quantile(self, q):
+        """
+        :param q: Quantile or array of quantiles between 0 and 1
+        :return: Approximate value(s) at `q`, NaN if the sketch is empty
+        """
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else float("nan")
+        items = np.concatenate(self._levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2.0**i) for i, level in enumerate(self._levels)]
+        )
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(q) * cumulative[-1]
+        indices = np.minimum(np.searchsorted(cumulative, ranks), len(items) - 1)
+        return items[order][indices]
+
+
+class PhaseStatistics:
+    """Incrementally maintained statistics of every channel over one calibration phase"""
+
+    def __init__(self, channels: int, capacity: int = 256):
+        self.count = 0
+        self.maximum = np.full(channels, -np.inf)
+        self.sketches = [QuantileSketch(capacity, seed=c) for c in range(channels)]
+
+    def update(self, block: np.ndarray):
+        """
+        :param block: (samples x channels) array of new samples
+        """
+        if len(block) == 0:
+            return
+        self.count += len(block)
+        np.maximum(self.maximum, block.max(axis=0), out=self.maximum)
+        for sketch, column in zip(self.sketches, block.T):
+            sketch.update(column)
+
+    def include_maximum(self, maximum):
+        """
+        Counts `maximum` of every channel towards `maximum` only, e.g. that of samples before
+        the phase, without adding a sample to the quantile sketches or to `count`
+        """
+        np.maximum(self.maximum, maximum, out=self.maximum)
+
+    def quantile(self, q) -> np.ndarray:
+        """
+        :return: Approximate quantile `q` of every channel, or the exact maximum when q == 1
+        """
+        if q >= 1:
+            return self.maximum.copy()
+        return np.array([sketch.quantile(q) for sketch in self.sketches])
@@ -0,0 +1,311 @@
+import argparse
+import json
+import logging
+import numpy as np
+import analytics
+from analytics import config
+from analytics.data import load_recording
+from analytics.processing.constants import DEFAULT_RECORDING_GRIPS
+from analytics.processing.features import NUM_FEATURES, FeatureExtractor, extract_features, num_windows
+from analytics.processing.pipeline import EmgPipeline, pipeline_from_config, preprocessing_settings
+from analytics.protobuf.maestro_pb2 import Grip
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_KINDS = ("lda", "softmax")
+
+
+class GripClassifier:
+    """
+    Linear classifier mapping windowed time-domain features (see `extract_features`) to grips.
+    The feature standardization is folded into the weights when training, so scoring a batch of
+    windows is a single matrix product. Features are computed on the output of the `EmgPipeline`,
+    so windows are in processed samples.
+    """
+
+    def __init__(self, weights, bias, labels, grips, window: int, step: int, threshold=0.0, preprocessing=None):
+        """
+        :param weights: (features * channels x classes) weights
+        :param bias: Bias of every class
+        :param labels: Recording label of every class
+        :param grips: Name of the `Grip` of every class
+        :param window: Feature window length in samples
+        :param step: Number of samples between the starts of consecutive windows
+        :param threshold: Amplitude threshold of the ZC, SSC and WAMP features
+        :param preprocessing: `preprocessing_settings` of the samples trained on, None if unknown
+        """
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.bias = np.asarray(bias, dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.grips = np.asarray(grips, dtype=str)
+        for grip in self.grips:
+            # raises for unknown grips
+            Grip.Value(grip)
+        self.window = int(window)
+        self.step = int(step)
+        self.threshold = float(threshold)
+        self.preprocessing = preprocessing
+
+    @property
+    def channels(self) -> int:
+        return len(self.weights) // NUM_FEATURES
+
+    def decision_function(self, features: np.ndarray) -> np.ndarray:
+        """
+        :param features: (windows x features * channels) feature matrix
+        :return: (windows x classes) class scores
+        """
+        return features @ self.weights + self.bias
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """:return: Index of the most likely class of every window"""
+        return np.argmax(self.decision_function(features), axis=1)
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """:return: (windows x classes) class probabilities"""
+        scores = self.decision_function(features)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def save(self, path):
+        """Saves the model as an uncompressed `.npz` file, which loads without any parsing"""
+        np.savez(
+            path,
+            weights=self.weights,
+            bias=self.bias,
+            labels=self.labels,
+            grips=self.grips,
+            settings=np.array([self.window, self.step, self.threshold]),
+            preprocessing=np.array(json.dumps(self.preprocessing)),
+        )
+
+    @classmethod
+    def load(cls, path) -> "GripClassifier":
+        with np.load(path, allow_pickle=False) as model:
+            window, step, threshold = model["settings"]
+            preprocessing = json.loads(str(model["preprocessing"])) if "preprocessing" in model.files else None
+            return cls(
+                model["weights"], model["bias"], model["labels"], model["grips"], window, step, threshold, preprocessing
+            )
+
+
+def windowed_dataset(samples: np.ndarray, labels: np.ndarray, window: int, step: int, threshold=0.0):
+    """
+    Features and labels of every window of a labelled recording. Windows spanning a change of
+    label are dropped, as they mix two gestures.
+
+    :return: (windows x features * channels) features, label of every window
+    """
+    features = extract_features(samples, window, step, threshold)
+    starts = np.arange(num_windows(len(samples), window, step)) * step
+    first, last = labels[starts], labels[starts + window - 1]
+    steady = first == last
+    return features[steady], np.asarray(last[steady], dtype=np.int64)
+
+
+def preprocess_labelled(pipeline: EmgPipeline, samples: np.ndarray, labels: np.ndarray):
+    """
+    Runs a labelled recording through `pipeline`, as the live loop does before classifying
+
+    :return: (samples x channels) processed samples, label of every processed sample
+    """
+    processed = pipeline.preprocess(samples)
+    # the decimator keeps every `factor`th sample, the first one included
+    return processed, labels[:: pipeline.decimation_factor][: len(processed)]
+
+
+def _standardization(features: np.ndarray):
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0)
+    # constant features, e.g. counts that never trigger, are left unscaled
+    scale[scale == 0] = 1.0
+    return mean, scale
+
+
+def fit_lda(features: np.ndarray, targets: np.ndarray, num_classes: int, shrinkage=0.1):
+    """
+    Linear discriminant analysis with a pooled covariance shrunk towards its average variance.
+
+    :param features: (windows x features) standardized features
+    :param targets: Class index of every window
+    :return: (features x classes) weights, bias of every class
+    """
+    counts = np.bincount(targets, minlength=num_classes)
+    means = np.zeros((num_classes, features.shape[1]))
+    np.add.at(means, targets, features)
+    means /= np.maximum(counts, 1)[:, np.newaxis]
+    centered = features - means[targets]
+    covariance = centered.T @ centered / max(len(features) - num_classes, 1)
+    dimension = len(covariance)
+    covariance = (1 - shrinkage) * covariance + shrinkage * np.trace(covariance) / dimension * np.eye(dimension)
+    weights = np.linalg.solve(covariance, means.T)
+    priors = np.maximum(counts, 1) / max(len(targets), 1)
+    bias = -0.5 * np.einsum("ij,ji->i", means, weights) + np.log(priors)
+    return weights, bias
+
+
+def fit_softmax(features: np.ndarray, targets: np.ndarray, num_classes: int, l2=1e-3, iterations=500, learning_rate=0.5):
+    """
+    Multinomial logistic regression trained by full-batch gradient descent.
+
+    :param features: (windows x features) standardized features
+    :param targets: Class index of every window
+    :return: (features x classes) weights, bias of every class
+    """
+    weights = np.zeros((features.shape[1], num_classes))
+    bias = np.zeros(num_classes)
+    one_hot = np.eye(num_classes)[targets]
+    for _ in range(iterations):
+        scores = features @ weights + bias
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        error = (probabilities - one_hot) / len(features)
+        weights -= learning_rate * (features.T @ error + l2 * weights)
+        bias -= learning_rate * error.sum(axis=0)
+    return weights, bias
+
+
+def train(features: np.ndarray, labels: np.ndarray, grips: dict, window: int, step: int, threshold=0.0, kind="lda", preprocessing=None, **fit_args) -> GripClassifier:
+    """
+    Trains a classifier on windowed features, see `windowed_dataset`.
+
+    :param grips: Name of the `Grip` of each label, labels missing from it map to no grip
+    :param kind: One of `CLASSIFIER_KINDS`
+    :param preprocessing: `preprocessing_settings` of the samples the features were computed on
+    :param fit_args: Extra arguments of `fit_lda` or `fit_softmax`
+    """
+    if kind not in CLASSIFIER_KINDS:
+        raise ValueError(f"Unknown classifier kind {kind}, expected one of {CLASSIFIER_KINDS}")
+    classes, targets = np.unique(labels, return_inverse=True)
+    mean, scale = _standardization(features)
+    fit = fit_lda if kind == "lda" else fit_softmax
+    weights, bias = fit((features - mean) / scale, targets, len(classes), **fit_args)
+    # fold the standardization into the weights: ((x - mean) / scale) @ W == x @ (W / scale) - (mean / scale) @ W
+    weights = weights / scale[:, np.newaxis]
+    bias = bias - mean @ weights
+    class_grips = [grips.get(int(label), Grip.Name(Grip.UNDEFINED_GRIP)) for label in classes]
+    return GripClassifier(weights, bias, classes, class_grips, window, step, threshold, preprocessing)
+
+
+class ClassifierStage:
+    """
+    Decision stage classifying the processed stream into grips, an alternative to the threshold
+    `ActivationStateMachine`. A grip is only decided on once it was predicted for
+    `min_consecutive` windows in a row, which suppresses single misclassified windows.
+    """
+
+    def __init__(self, model: GripClassifier, min_consecutive=1):
+        self.model = model
+        self.min_consecutive = min_consecutive
+        self.extractor = FeatureExtractor(model.window, model.step, model.channels, model.threshold)
+        # grip currently decided on, None before the first decision
+        self.grip = None
+        self._candidate = None
+        self._count = 0
+
+    def update(self, block: np.ndarray):
+        """
+        :param block: (samples x channels) block of processed samples, see `EmgPipeline.update`
+        :return: Name of the newly decided `Grip`, or None if the decision did not change
+        """
+        features = self.extractor.update(block)
+        if not len(features):
+            return None
+        decided = None
+        for grip in self.model.grips[self.model.predict(features)]:
+            if grip == self._candidate:
+                self._count += 1
+            else:
+                self._candidate, self._count = grip, 1
+            if self._count >= self.min_consecutive and grip != self.grip:
+                self.grip = decided = str(grip)
+        return decided
+
+
+def classifier_stage_from_config(channels: int, sample_rate) -> ClassifierStage:
+    """
+    Loads the classifier decision stage configured in the `processing` section, checking that
+    it was trained on samples preprocessed as the configured pipeline does
+    """
+    processing_config = config["processing"]
+    path = processing_config["classifier_model_file"].as_filename()
+    model = GripClassifier.load(path)
+    if model.channels != channels:
+        raise ValueError(f"Classifier {path} was trained on {model.channels} channels, expected {channels}")
+    settings = preprocessing_settings(sample_rate)
+    if model.preprocessing != settings:
+        raise ValueError(
+            f"Classifier {path} was trained on samples preprocessed with {model.preprocessing}, "
+            f"but the pipeline is configured with {settings}, retrain it"
+        )
+    logger.info(f"Loaded {len(model.labels)} class classifier from {path}")
+    return ClassifierStage(model, processing_config["classifier_min_consecutive_windows"].as_number())
+
+
+def _parse_grip(text: str) -> tuple[int, str]:
+    label, grip = text.split("=")
+    Grip.Value(grip)
+    return int(label), grip
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trains a grip classifier on labelled recordings")
+    parser.add_argument("recordings", nargs="+", help="Labelled recordings, e.g. data/[0-3].csv")
+    parser.add_argument("--output", required=True, help="Model file to write, e.g. grip.npz")
+    parser.add_argument("--kind", choices=CLASSIFIER_KINDS, default="lda")
+    parser.add_argument("--channels", type=int, nargs=2, default=(0, 1), help="Inner and outer columns")
+    parser.add_argument("--window", type=int, default=40, help="Feature window in processed samples")
+    parser.add_argument("--step", type=int, default=10, help="Processed samples between feature windows")
+    parser.add_argument("--threshold", type=float, default=0.0, help="Amplitude threshold of ZC, SSC and WAMP")
+    parser.add_argument("--grip", type=_parse_grip, action="append", metavar="LABEL=GRIP",
+                        help="Grip of a label, e.g. 0=FIST, defaults to the Myo gesture captures")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Trailing fraction of each recording to test on")
+    args = parser.parse_args()
+
+    analytics.initialize_config_and_logging()
+    adc_config = config["adc"]
+    # recordings are treated as sampled at the ADC rate, as when replaying them
+    sample_rate = adc_config["sample_rate_in_hz"].as_number()
+    train_sets, test_sets = [], []
+    for path in args.recordings:
+        recording = load_recording(path)
+        if recording.labels is None:
+            raise ValueError(f"Recording {path} is not labelled")
+        # a fresh pipeline per recording, so that no filter state carries over between them
+        pipeline = pipeline_from_config(
+            sample_rate,
+            adc_config["inner_read_buffer_size"].as_number(),
+            adc_config["outer_read_buffer_size"].as_number(),
+        )
+        samples, labels = preprocess_labelled(
+            pipeline, recording.samples[:, list(args.channels)], np.asarray(recording.labels)
+        )
+        features, labels = windowed_dataset(samples, labels, args.window, args.step, args.threshold)
+        split = int(len(features) * (1 - args.holdout))
+        train_sets.append((features[:split], labels[:split]))
+        test_sets.append((features[split:], labels[split:]))
+    grips = dict(args.grip) if args.grip else DEFAULT_RECORDING_GRIPS
+    model = train(
+        np.concatenate([f for f, _ in train_sets]),
+        np.concatenate([l for _, l in train_sets]),
+        grips,
+        args.window,
+        args.step,
+        args.threshold,
+        args.kind,
+        preprocessing_settings(sample_rate),
+    )
+    test_features = np.concatenate([f for f, _ in test_sets])
+    test_labels = np.concatenate([l for _, l in test_sets])
+    if len(test_labels):
+        accuracy = np.mean(model.labels[model.predict(test_features)] == test_labels)
+        print(f"Held-out accuracy over {len(test_labels)} windows: {accuracy:.3f}")
+    model.save(args.output)
+    print(f"Saved {args.kind} classifier of labels {model.labels.tolist()} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from analytics.gpm.constants import MAESTRO_CLOSE_FIST, MAESTRO_OPEN_FIST
+
 # Activation threshold constants must be between 0 and 1
 INNER_THRESHOLD = 0.8 #0.65 albert threshold
 OUTER_THRESHOLD = 0.8
@@ -9,3 +11,11 @@ OUTER_LOWER_THRESHOLD = 1.5
 
 # Calibration configs
 CALIBRATION_DURATION_IN_SECONDS = 5
+
+# Classifier decision stage configs
+# grips of the labels of the Myo gesture captures in `data/`: 0 is a fist (rock), 2 an open hand (paper)
+DEFAULT_RECORDING_GRIPS = {0: "FIST", 2: "OPEN"}
+# Maestro task sent when the classifier decides on a grip, other grips send nothing
+GRIP_TASKS = {"OPEN": MAESTRO_OPEN_FIST, "FIST": MAESTRO_CLOSE_FIST}
+# budget for classifying one hop of samples, from feature extraction to the decided grip
+CLASSIFIER_LATENCY_BUDGET_IN_SECONDS = 0.001
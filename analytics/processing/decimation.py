@@ -0,0 +1,62 @@
+import numpy as np
+import scipy
+from numpy.lib.stride_tricks import as_strided
+
+
+def decimated_length(num_samples, factor: int):
+    """Number of samples `PolyphaseDecimator` outputs for the first `num_samples` input samples"""
+    return -(-num_samples // factor)
+
+
+def design_decimation_filter(factor: int) -> np.ndarray:
+    """Kaiser windowed lowpass at the decimated Nyquist rate, as `scipy.signal.resample_poly` designs"""
+    if factor == 1:
+        return np.ones(1)
+    half_length = 10 * factor
+    return scipy.signal.firwin(2 * half_length + 1, 1 / factor, window=("kaiser", 5.0))
+
+
+class PolyphaseDecimator:
+    """
+    Streaming FIR decimation keeping every `factor`th sample of the filtered signal, sample 0
+    first, like `scipy.signal.upfirdn(taps, x, down=factor)`. As in a polyphase decimator,
+    filtered samples that would be discarded are never computed: every kept output is a single
+    dot product of the taps with a strided view of the input samples it spans, i.e. the sum of
+    all polyphase components at once. The last `len(taps) - 1` input samples are carried across
+    blocks of any size, and an output is produced as soon as the input sample it falls on arrives.
+    """
+
+    def __init__(self, factor: int, channels: int, taps: np.ndarray = None):
+        """
+        :param factor: Decimation factor
+        :param channels: Number of channels
+        :param taps: FIR filter, `design_decimation_filter(factor)` by default
+        """
+        if factor < 1:
+            raise ValueError("Decimation factor must be at least 1.")
+        self.factor = factor
+        self.channels = channels
+        self.taps = design_decimation_filter(factor) if taps is None else np.asarray(taps, dtype=np.float64)
+        self._reversed_taps = np.ascontiguousarray(self.taps[::-1])
+        # input samples from the span of the next output on, zero before the signal starts
+        self._pending = np.zeros((len(self.taps) - 1, channels))
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        :param block: (samples x channels) block of new samples
+        :return: (outputs x channels) decimated samples whose input samples are in `block`
+        """
+        if self.factor == 1:
+            return block
+        signals = np.concatenate((self._pending, np.asarray(block, dtype=np.float64)))
+        count = max(0, (len(signals) - len(self.taps)) // self.factor + 1)
+        sample_stride, channel_stride = signals.strides
+        # (outputs x channels x taps) view of the samples each output spans
+        spans = as_strided(
+            signals,
+            (count, self.channels, len(self.taps)),
+            (self.factor * sample_stride, channel_stride, sample_stride),
+            writeable=False,
+        )
+        self._pending = signals[count * self.factor :]
+        return spans @ self._reversed_taps
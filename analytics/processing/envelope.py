@@ -0,0 +1,117 @@
+from collections import deque
+import numpy as np
+from analytics.common.ringbuffer import RingBuffer
+
+# How often (in samples) the moving sum is recomputed from scratch to stop rounding error from
+# accumulating over long sessions
+_RESYNC_INTERVAL = 1 << 20
+
+
+def rectify(block: np.ndarray) -> np.ndarray:
+    return np.abs(block)
+
+
+class MovingAverage:
+    """
+    Streaming moving average (or RMS) over the last `window` samples of every channel. The
+    window sum is carried across blocks and updated with a cumulative sum of (entering - leaving)
+    samples, so each block costs O(block size) regardless of the window length. Until `window`
+    samples have been seen the average is taken over the samples available.
+    """
+
+    def __init__(self, window: int, channels: int, rms: bool = False):
+        """
+        :param window: Number of samples to average over
+        :param channels: Number of channels in the (samples x channels) blocks
+        :param rms: Whether to compute the root mean square instead of the mean
+        """
+        self.window = window
+        self.rms = rms
+        self._history = RingBuffer(window, channels=channels)
+        self._sum = np.zeros(channels)
+        self._since_resync = 0
+
+    def _leaving(self, values: np.ndarray) -> np.ndarray:
+        """Values that drop out of the window as each of `values` enters it"""
+        n, window = len(values), self.window
+        # samples before the start of the signal count as zero
+        padding = min(n, window - self._history.count)
+        from_history = min(n, window) - padding
+        older, newer = self._history.views()
+        parts = [
+            np.zeros((padding,) + values.shape[1:]),
+            older[:from_history],
+            newer[: max(0, from_history - len(older))],
+        ]
+        if n > window:
+            parts.append(values[: n - window])
+        return np.concatenate(parts)
+
+    def update(self, block: np.ndarray) -> np.ndarray:
+        """
+        :param block: (samples x channels) array of new samples
+        :return: (samples x channels) array of the moving average ending at each new sample
+        """
+        values = np.square(block) if self.rms else np.asarray(block, dtype=np.float64)
+        n = len(values)
+        if n == 0:
+            return values
+        seen = self._history.total_written
+        sums = self._sum + np.cumsum(values - self._leaving(values), axis=0)
+        self._history.extend(values)
+        self._sum = sums[-1]
+        self._since_resync += n
+        if self._since_resync >= _RESYNC_INTERVAL:
+            self._sum = self._history.snapshot().sum(axis=0)
+            self._since_resync = 0
+
+        counts = np.minimum(np.arange(seen + 1, seen + n + 1), self.window)[:, np.newaxis]
+        averages = sums / counts
+        return np.sqrt(np.maximum(averages, 0)) if self.rms else averages
+
+
+class SlidingMax:
+    """
+    Tracks the maximum of the last `window` samples of a single channel with a monotonic deque,
+    in amortized O(1) per sample. Each block is first reduced with NumPy to the samples that are
+    larger than everything after them in the block (the only ones that can ever become the
+    window maximum), so the Python-level deque work is proportional to that, usually tiny, set.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        # (absolute sample index, value) pairs with strictly decreasing values
+        self._candidates = deque()
+        self.total_written = 0
+
+    def update(self, block: np.ndarray) -> float:
+        """
+        :param block: 1D array of new samples
+        :return: Maximum of the last `window` samples, or -inf if no samples were seen yet
+        """
+        n = len(block)
+        if n:
+            block = block[-self.window :]
+            offset = self.total_written + n - len(block)
+            suffix_max = np.maximum.accumulate(block[::-1])[::-1]
+            is_candidate = np.empty(len(block), dtype=bool)
+            is_candidate[:-1] = block[:-1] > suffix_max[1:]
+            is_candidate[-1] = True
+            indices = np.flatnonzero(is_candidate)
+
+            candidates = self._candidates
+            block_max = block[indices[0]]
+            while candidates and candidates[-1][1] <= block_max:
+                candidates.pop()
+            candidates.extend(zip((indices + offset).tolist(), block[indices].tolist()))
+            self.total_written += n
+
+        oldest = self.total_written - self.window
+        candidates = self._candidates
+        while candidates and candidates[0][0] < oldest:
+            candidates.popleft()
+        return self.maximum
+
+    @property
+    def maximum(self) -> float:
+        return self._candidates[0][1] if self._candidates else float("-inf")
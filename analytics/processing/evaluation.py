@@ -0,0 +1,134 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from analytics.adc.constants import INNER_CHANNEL, OUTER_CHANNEL
+from analytics.processing.decimation import decimated_length
+from analytics.processing.offline import OfflineResult
+from analytics.processing.pipeline import ActivationStateMachine, EmgPipeline
+from analytics.recording.constants import EVENT_ACTIVATE, EVENT_DEACTIVATE
+
+# Number of windows reduced at once, bounds the memory of the strided window maxima
+_WINDOW_BATCH = 4096
+
+TIMELINE_DTYPE = np.dtype([("sample", "<i8"), ("kind", "<u4")])
+
+
+def preprocess_batch(samples: np.ndarray, pipeline: EmgPipeline, warmup: int, hop_size: int) -> np.ndarray:
+    """
+    Preprocesses a whole recording as the live loop would. Filters carry their state exactly,
+    so without an envelope or decimator the recording is filtered in one call. The moving
+    average sums and the decimator's FIR states depend on how samples are split into blocks, so
+    with either the recording is fed in the live loop's blocks: `warmup` samples, then one
+    block per hop.
+    """
+    if pipeline.envelope is None and pipeline.decimator is None:
+        return pipeline.preprocess(samples)
+    ends = [min(warmup, len(samples)), *range(warmup + hop_size, len(samples), hop_size), len(samples)]
+    blocks = [pipeline.preprocess(samples[start:end]) for start, end in zip([0, *ends], ends)]
+    return np.concatenate(blocks)
+
+
+def window_maximums_at(signal: np.ndarray, window: int, ends: np.ndarray) -> np.ndarray:
+    """
+    Maxima of `signal[end - window : end]` for every `end`, over the samples available if
+    `end < window`, like `SlidingMax` after consuming `end` samples.
+
+    :param signal: 1D signal
+    :param window: Window length in samples
+    :param ends: Exclusive end index of every window
+    """
+    # pad so that every window is full, the padding never wins a maximum
+    padded = np.concatenate((np.full(window, -np.inf), signal))
+    windows = sliding_window_view(padded, window)
+    maximums = np.empty(len(ends))
+    for start in range(0, len(ends), _WINDOW_BATCH):
+        batch = ends[start : start + _WINDOW_BATCH]
+        # padded window `end` covers signal[end - window : end]
+        maximums[start : start + len(batch)] = windows[batch].max(axis=1)
+    return maximums
+
+
+def evaluate_state_machine(maximums: np.ndarray, state_machine: ActivationStateMachine):
+    """
+    Evaluates `state_machine` over a sequence of (inner, outer) window maxima at once, leaving
+    it in its final state.
+
+    :param maximums: (decisions x 2) inner and outer window maxima
+    :return: (activation state after each decision, `EVENT_*` for state changes or 0)
+    """
+    machine = state_machine
+    max_inner, max_outer = maximums[:, 0], maximums[:, 1]
+    # the same comparisons as `ActivationStateMachine.update`, for every decision at once
+    activate = (max_inner > machine.inner_threshold * machine.inner_max_signal) & (
+        max_outer < machine.outer_lower_threshold * machine.outer_max_signal
+    )
+    deactivate = (max_outer > machine.outer_threshold * machine.outer_max_signal) & (
+        max_inner < machine.inner_lower_threshold * machine.inner_max_signal
+    )
+    if np.any(activate & deactivate):
+        # only possible with negative maxima, where the state alone decides, so step through
+        states = np.empty(len(maximums), dtype=bool)
+        transitions = np.zeros(len(maximums), dtype=np.int64)
+        for i, (inner, outer) in enumerate(maximums):
+            transitions[i] = machine.update(inner, outer) or 0
+            states[i] = machine.activation_state
+        return states, transitions
+
+    # the state only ever changes to activated where `activate` holds and back where
+    # `deactivate` does, so each decision takes the state of the latest such condition
+    marks = np.where(activate, 1, np.where(deactivate, 0, -1))
+    latest = np.maximum.accumulate(np.where(marks >= 0, np.arange(len(marks)), -1))
+    initial = int(machine.activation_state)
+    states = np.where(latest >= 0, marks[np.maximum(latest, 0)], initial).astype(bool)
+    previous = np.concatenate(([bool(initial)], states[:-1]))
+    transitions = np.where(
+        states & ~previous, EVENT_ACTIVATE, np.where(~states & previous, EVENT_DEACTIVATE, 0)
+    )
+    if len(states):
+        machine.activation_state = bool(states[-1])
+    return states, transitions
+
+
+def evaluate_recording(
+    samples: np.ndarray,
+    pipeline: EmgPipeline,
+    state_machine: ActivationStateMachine,
+    hop_size: int,
+    warmup: int = None,
+) -> OfflineResult:
+    """
+    Evaluates the live decision logic over a whole (samples x channels) recording in bulk.
+    Decisions are made at the same samples and on the same window maxima as the live loop
+    (and `run_offline`), but the maxima come from strided window reductions and the state
+    machine is evaluated over all of them at once.
+
+    :param warmup: Number of samples processed before the first hop, defaults to the largest
+                   decision window like the live reader buffers
+    """
+    if warmup is None:
+        warmup = max(pipeline.inner_window_size, pipeline.outer_window_size)
+    processed = preprocess_batch(np.asarray(samples, dtype=np.float64), pipeline, warmup, hop_size)
+    ends = np.arange(warmup + hop_size, len(samples) + 1, hop_size)
+    # decision windows over decimated samples, which are produced as their input samples arrive
+    factor = pipeline.decimation_factor
+    processed_ends = decimated_length(ends, factor)
+    maximums = np.column_stack(
+        (
+            window_maximums_at(
+                processed[:, INNER_CHANNEL], decimated_length(pipeline.inner_window_size, factor), processed_ends
+            ),
+            window_maximums_at(
+                processed[:, OUTER_CHANNEL], decimated_length(pipeline.outer_window_size, factor), processed_ends
+            ),
+        )
+    )
+    states, transitions = evaluate_state_machine(maximums, state_machine)
+    return OfflineResult(ends, maximums, states, transitions)
+
+
+def timeline(result: OfflineResult) -> np.ndarray:
+    """Activation and deactivation events of a result, as a `TIMELINE_DTYPE` array"""
+    changes = np.flatnonzero(result.transitions)
+    events = np.empty(len(changes), dtype=TIMELINE_DTYPE)
+    events["sample"] = result.decision_samples[changes]
+    events["kind"] = result.transitions[changes]
+    return events
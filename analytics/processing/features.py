@@ -0,0 +1,115 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Time-domain EMG features, in the order of the rows of a feature matrix
+FEATURE_NAMES = ("mav", "rms", "wl", "zc", "ssc", "wamp")
+NUM_FEATURES = len(FEATURE_NAMES)
+
+
+def num_windows(num_samples: int, window: int, step: int) -> int:
+    """Number of windows of `window` samples every `step` samples that fit in `num_samples`"""
+    return max(0, (num_samples - window) // step + 1)
+
+
+def feature_columns(channels: int) -> list[str]:
+    """Names of the columns of a feature matrix, e.g. "rms_3" for the RMS of channel 3"""
+    return [f"{name}_{channel}" for name in FEATURE_NAMES for channel in range(channels)]
+
+
+def _window_sums(series: np.ndarray, window: int, step: int, count: int) -> np.ndarray:
+    """Sums of `series` over the first `count` windows of `window` samples every `step`"""
+    windows = sliding_window_view(series, window, axis=0)[::step][:count]
+    return windows.sum(axis=-1)
+
+
+def extract_features(signals: np.ndarray, window: int, step: int, threshold=0.0, out=None) -> np.ndarray:
+    """
+    Computes the standard time-domain EMG features of every channel over windows of `window`
+    samples, one window every `step` samples:
+    - MAV: mean absolute value
+    - RMS: root mean square
+    - WL: waveform length, the summed absolute differences between consecutive samples
+    - ZC: zero crossings with a jump of at least `threshold`
+    - SSC: slope sign changes, where (x[i] - x[i-1]) * (x[i] - x[i+1]) exceeds `threshold`
+    - WAMP: Willison amplitude, the number of jumps larger than `threshold`
+
+    Per-sample terms are computed once for the whole signal and summed over strided window
+    views, so only the sums cost O(window) per window. Differences only pair samples within the
+    same window, so a window's features depend on its samples alone.
+
+    :param signals: (samples x channels) signal
+    :param window: Window length in samples
+    :param step: Number of samples between the starts of consecutive windows
+    :param threshold: Amplitude threshold of ZC, SSC and WAMP
+    :param out: Optional preallocated C-contiguous (windows x features * channels) matrix to
+                write to
+    :return: (windows x features * channels) matrix with columns as in `feature_columns`
+    """
+    signals = np.asarray(signals, dtype=np.float64)
+    count = num_windows(len(signals), window, step)
+    channels = signals.shape[1]
+    if out is None:
+        out = np.empty((count, NUM_FEATURES * channels))
+    features = out[:count].reshape(count, NUM_FEATURES, channels)
+    if count == 0:
+        return out[:0]
+
+    # terms of pairs and triples of consecutive samples, indexed by their first sample
+    deltas = np.diff(signals, axis=0)
+    jumps = np.abs(deltas)
+    pairs = np.stack(
+        (jumps, (signals[:-1] * signals[1:] < 0) & (jumps >= threshold), jumps > threshold), axis=1
+    )
+    slope_changes = (deltas[:-1] * -deltas[1:]) > threshold
+
+    features[:, 0] = _window_sums(np.abs(signals), window, step, count) / window
+    features[:, 1] = np.sqrt(_window_sums(np.square(signals), window, step, count) / window)
+    pair_sums = _window_sums(pairs, window - 1, step, count)
+    features[:, 2] = pair_sums[:, 0]
+    features[:, 3] = pair_sums[:, 1]
+    features[:, 5] = pair_sums[:, 2]
+    features[:, 4] = _window_sums(slope_changes, window - 2, step, count)
+    return out[:count]
+
+
+class FeatureExtractor:
+    """
+    Streaming counterpart of `extract_features`: consumes (samples x channels) blocks of any
+    size and returns the features of the windows they complete. Only the samples of the next
+    incomplete window are carried over, and the features are identical to computing them over
+    the whole signal at once.
+    """
+
+    def __init__(self, window: int, step: int, channels: int, threshold=0.0):
+        """
+        :param window: Window length in samples
+        :param step: Number of samples between the starts of consecutive windows
+        :param channels: Number of channels
+        :param threshold: Amplitude threshold of ZC, SSC and WAMP
+        """
+        if window < 3:
+            raise ValueError("Windows must hold at least 3 samples for slope sign changes.")
+        self.window = window
+        self.step = step
+        self.channels = channels
+        self.threshold = threshold
+        self._carry = np.empty((0, channels))
+        # samples to drop before the next window starts, when `step` exceeds `window`
+        self._skip = 0
+
+    def update(self, block: np.ndarray, out=None) -> np.ndarray:
+        """
+        :param block: (samples x channels) block of new samples
+        :param out: Optional preallocated matrix, see `extract_features`
+        :return: (windows x features * channels) features of the windows completed by `block`
+        """
+        block = np.asarray(block, dtype=np.float64)
+        skipped = min(self._skip, len(block))
+        self._skip -= skipped
+        signals = np.concatenate((self._carry, block[skipped:]))
+        features = extract_features(signals, self.window, self.step, self.threshold, out)
+        consumed = len(features) * self.step
+        self._carry = signals[consumed:]
+        if consumed > len(signals):
+            self._skip = consumed - len(signals)
+        return features
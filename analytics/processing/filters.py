@@ -1,19 +1,32 @@
 import numpy as np
-import time
 import logging
-import scipy
+import threading
 from analytics.adc.mockreader import MockAdcReader
-from analytics.gpm.client import Client, GpmOfflineError
-from analytics.processing.constants import (
-    INNER_THRESHOLD,
-    OUTER_THRESHOLD,
-    INNER_LOWER_THRESHOLD,
-    OUTER_LOWER_THRESHOLD,
-    CALIBRATION_DURATION_IN_SECONDS,
-)
+from analytics.gpm.dispatcher import CommandDispatcher, start_command_dispatcher
+from analytics.processing.constants import CALIBRATION_DURATION_IN_SECONDS, GRIP_TASKS
 from analytics.common.loggerutils import detail_trace
+from analytics.common.ringbuffer import RingBuffer
+from analytics.processing.calibration import PhaseStatistics
+from analytics.processing.classifier import classifier_stage_from_config
+from analytics.processing.decimation import decimated_length
+from analytics.processing.pipeline import ActivationStateMachine, pipeline_from_config
+from analytics.adc.constants import NUM_CHANNELS, INNER_CHANNEL, OUTER_CHANNEL
+from analytics.metrics.exporter import (
+    PROCESSING_HOPS,
+    PROCESSING_MISSED_HOPS,
+    PROCESSING_DROPPED_SAMPLES,
+    PROCESSING_HOP_LATENCY,
+    PROCESSING_RESAMPLED_GAPS,
+    PROCESSING_RESAMPLED_DUPLICATES,
+    PROCESSING_MEAN_FREQUENCY,
+    PROCESSING_MEDIAN_FREQUENCY,
+    PROCESSING_BAND_POWER,
+)
+from analytics.processing.resample import StreamingResampler
+from analytics.processing.spectral import SpectralFeatures, spectral_estimator_from_config
+from analytics.recording.constants import EVENT_ACTIVATE, EVENT_DEACTIVATE
+from analytics.recording.writer import SessionRecorder
 from analytics.gpm.constants import *
-from analytics.common.decorators import retryable
 from analytics import config
 
 logger = logging.getLogger(__name__)
@@ -26,37 +39,123 @@ class EmgProcessor:
     to make a decision on the next state of the arm (i.e Open or Close).
     """
 
-    def __init__(self, adc_reader: MockAdcReader):
+    def __init__(
+        self,
+        adc_reader: MockAdcReader,
+        recorder: SessionRecorder = None,
+        dispatcher: CommandDispatcher = None,
+    ):
+        """
+        :param adc_reader: Reader providing the raw samples
+        :param recorder: Optional session recorder that decision events are written to
+        :param dispatcher: Dispatcher sending commands to GPM, one connecting to the configured
+                           GPM in the background is started by default
+        """
         self._adc_reader = adc_reader
-        try:
-            self.gpm_client = Client()
-        except Exception as e:
-            logger.error(f"Failed to connect to GPM because of error={e}")
-            self.gpm_client = None
-        self.activation_state = False
-        self.inner_threshold = INNER_THRESHOLD
-        self.outer_threshold = OUTER_THRESHOLD
-        self.inner_lower_threshold = INNER_LOWER_THRESHOLD
-        self.outer_lower_threshold = OUTER_LOWER_THRESHOLD
-        self.inner_max_signal = float('-inf')
-        self.outer_max_signal = float('-inf')
+        self._recorder = recorder
+        # commands are handed off without blocking, GPM being slow or down never stalls processing
+        self.gpm_dispatcher = dispatcher if dispatcher is not None else start_command_dispatcher()
+        self.state_machine = ActivationStateMachine()
         self.config = config["processing"]
         logger.info(f"Processing module configs: {self.config}")
-        self._sleep_duration = self.config[
-            "sleep_between_processing_in_seconds"
-        ].as_number()
-        self._buffers = None
+        self._hop_size = self.config["hop_size_in_samples"].as_number()
+        self._inner_window_size = adc_reader._inner_read_buffer_size
+        self._outer_window_size = adc_reader._outer_read_buffer_size
+        self.pipeline = pipeline_from_config(
+            adc_reader.sample_rate, self._inner_window_size, self._outer_window_size
+        )
+        # decision windows in processed samples, fewer than acquired ones when decimating
+        self._processed_inner_window_size = decimated_length(self._inner_window_size, self.pipeline.decimation_factor)
+        self._processed_outer_window_size = decimated_length(self._outer_window_size, self.pipeline.decimation_factor)
+        # preprocessed samples of the current decision window
+        self._processed = RingBuffer(
+            max(self._processed_inner_window_size, self._processed_outer_window_size), channels=NUM_CHANNELS
+        )
+        self._buffers_ready = threading.Event()
+        self._resampler = None
+        if self.config["resample_to_sample_rate"].get(bool):
+            self._resampler = StreamingResampler(adc_reader.sample_rate)
+        self.spectral = spectral_estimator_from_config(adc_reader.sample_rate, NUM_CHANNELS)
+        self._spectral_gauges = None
+        if self.spectral is not None:
+            # labelled children are resolved once rather than on every update
+            channels = [str(channel) for channel in range(NUM_CHANNELS)]
+            bands = [f"{low}-{high}" for low, high in self.config["spectral_bands_in_hz"].get(list)]
+            self._spectral_gauges = (
+                [PROCESSING_MEAN_FREQUENCY.labels(channel) for channel in channels],
+                [PROCESSING_MEDIAN_FREQUENCY.labels(channel) for channel in channels],
+                [[PROCESSING_BAND_POWER.labels(channel, band) for channel in channels] for band in bands],
+            )
+        # classifies grips instead of thresholding the window maxima when configured
+        self.classifier_stage = None
+        if self.config["decision_stage"].get() == "classifier":
+            self.classifier_stage = classifier_stage_from_config(NUM_CHANNELS, adc_reader.sample_rate)
+        self._calibration_quantile = self.config["calibration_quantile"].as_number()
+        self.calibration_phases = []
+        # absolute index of the next acquired sample to process, None until primed
+        self._position = None
+        self.hops_processed = 0
+        self.missed_hops = 0
+        self.dropped_samples = 0
+
+    @property
+    def activation_state(self) -> bool:
+        return self.state_machine.activation_state
+
+    @property
+    def inner_max_signal(self) -> float:
+        return self.state_machine.inner_max_signal
+
+    @inner_max_signal.setter
+    def inner_max_signal(self, value: float):
+        self.state_machine.inner_max_signal = value
+
+    @property
+    def outer_max_signal(self) -> float:
+        return self.state_machine.outer_max_signal
+
+    @outer_max_signal.setter
+    def outer_max_signal(self, value: float):
+        self.state_machine.outer_max_signal = value
 
     # calibration visualizer is None if not being used
     def calibrate(self, calibration_visualizer):
+        # phases follow each other without a gap, starting once the buffers are full
+        self._consume_new_samples()
+        phase_start = self._position
+        # processed samples consumed past the end of the previous phase, and where they start
+        overshoot, overshoot_start = np.empty((0, NUM_CHANNELS)), phase_start
+
         def calibrate_threshold(duration, message):
+            nonlocal phase_start, overshoot, overshoot_start
             logger.warn(message)
-            end_time = time.time() + duration
-            while time.time() < end_time:
-                time.sleep(0.01) # the main thread needs some time to update the visualization
-                inner_signal, outer_signal = self._adc_reader.get_current_buffers()
-                self.inner_max_signal = max(self.inner_max_signal, np.max(inner_signal))
-                self.outer_max_signal = max(self.outer_max_signal, np.max(outer_signal))
+            # phases are measured in acquired samples rather than wall-clock time
+            end = phase_start + round(duration * self._adc_reader.sample_rate)
+            factor = self.pipeline.decimation_factor
+            phase = PhaseStatistics(NUM_CHANNELS)
+            # the maximum of the decision window leading into the phase counts too, as the
+            # detection loop sees it, but none of its samples enter the quantiles
+            phase.include_maximum(self._window_maximums())
+            processed, start = overshoot, overshoot_start
+            while True:
+                # samples past the end of this phase belong to the next one
+                split = max(0, decimated_length(end, factor) - decimated_length(start, factor))
+                phase.update(processed[:split])
+                overshoot, overshoot_start = processed[split:], max(start, end)
+                if self._position >= end:
+                    break
+                self._adc_reader.wait_for_samples(min(self._position + self._hop_size, end))
+                start = self._position
+                processed = self._consume_new_samples()
+            phase_start = end
+            self.calibration_phases.append(phase)
+            inner_max, outer_max = phase.quantile(self._calibration_quantile)
+            self.inner_max_signal = max(self.inner_max_signal, float(inner_max))
+            self.outer_max_signal = max(self.outer_max_signal, float(outer_max))
+            logger.info(
+                f"Calibration phase samples={phase.count} p50={phase.quantile(0.5)} "
+                f"p99={phase.quantile(0.99)} max={phase.maximum}"
+            )
 
         calibrate_threshold(
             CALIBRATION_DURATION_IN_SECONDS,
@@ -87,107 +186,184 @@ class EmgProcessor:
         '''
         # return self.inner_max_signal, self.outer_max_signal
 
-    def preprocess(self, signals):
-        # TODO determine values for following parameters
-        # sampling_freq
-        # highpass (for inner and outer)
-        # lowpass (for inner and outer)
-        # smoothing_window = 100
-        # notch_filter = True # if we decide to use the notch filter
-
-        def bandpass_filter(signal, sampling_freq, highpass_freq, lowpass_freq):
-            b, a = scipy.signal.butter(
-                4, [highpass_freq, lowpass_freq], btype="bandpass", fs=sampling_freq
-            )
-            filtered_signal = scipy.signal.filtfilt(b, a, signal)
-            return filtered_signal
-
-        # rectify, normalize, smooth
-        def normalize_and_smooth(
-            signal, smoothing_window: int, max_value: int
-        ) -> np.ndarray:
-            rectified_signal = np.abs(signal)
-            normalized_signal = rectified_signal / max_value
-            smoothed_signal = np.convolve(
-                normalized_signal,
-                np.ones(smoothing_window) / smoothing_window,
-                mode="valid",
-            )
-            return normalized_signal
-
-        def notch_filter(signal, sampling_freq, f0, Q):
-            if f0 > sampling_freq / 2:
-                raise Exception(
-                    "notch frequency must be less than or equal to fs/2 (f0 <= fs/2"
-                )
-            b, a = scipy.signal.iirnotch(f0, Q, sampling_freq)
-            notched_filtered_data = scipy.signal.filtfilt(b, a, signal)
-            return notched_filtered_data
+    def preprocess(self, signals: np.ndarray) -> np.ndarray:
+        """
+        Preprocesses a block of newly acquired samples.
 
-        inner_signal = signals[0]
-        outer_signal = signals[1]
-
-        return inner_signal, outer_signal
+        :param signals: (samples x channels) block of raw ADC values
+        :return: (samples x channels) block of processed values
+        """
+        return self.pipeline.preprocess(signals)
 
     def run_detect_activation_loop(self):
+        """
+        Runs the activation detection once for every `hop_size_in_samples` newly acquired
+        samples. The loop sleeps on the reader's sample watermark rather than polling, and each
+        hop only preprocesses the samples that arrived since the previous one.
+        """
+        self._consume_new_samples()
         while True:
+            position = self._position
+            watermark = position + self._hop_size
+            self._adc_reader.wait_for_samples(watermark)
             with detail_trace(
                 "Processing signals", logger, log_start=False
             ) as trace_step:
-                signal_buffer = (
-                    self._adc_reader.get_current_buffers()
-                )  # returns a 2d numpy array [[inner_signal], [outer_signal]]
-                trace_step("Read signal buffer")
-                self._buffers = self.preprocess(signal_buffer)
-                inner_signal, outer_signal = self._buffers
-                max_inner = np.max(inner_signal) if len(inner_signal) != 0 else 0
-                max_outer = np.max(outer_signal) if len(outer_signal) != 0 else 0
-                if self.activation_state is False: # anytime receive debug messages is when both are activated
-                    if max_inner > self.inner_threshold*self.inner_max_signal:
-                        if max_outer < self.outer_lower_threshold*self.outer_max_signal:
-                            logger.warning(
-                                f"Received inner_signal={max_inner} greater than inner_threshold={self.inner_threshold}, sending activation."
-                            )
-                            self.activation_state = True
-                            print('grip activated')
-                            if self.gpm_client is not None:
-                                self.gpm_client.send_message(
-                                    MAESTRO_RESOURCE, MAESTRO_OPEN_FIST
-                                )
-
-                            else:
-                                logger.error( # change later
-                                    "GPM connection failed earlier -- cannot send activation command to Grasp."
-                                )
-                        
-
+                processed = self._consume_new_samples()
+                trace_step("Processed new samples")
+                if self.classifier_stage is not None:
+                    self._update_grip(processed)
+                    trace_step("Classified grip")
                 else:
-                    if max_outer > self.outer_threshold*self.outer_max_signal:
-                        if max_inner < self.inner_lower_threshold*self.inner_max_signal:
-                            logger.warning(
-                                f"Received outer_signal={max_outer} greater than outer_threshold={self.outer_threshold}, sending de-activation."
-                            )
-                            self.activation_state = False
-                            print('grip de-activated')
-                            if self.gpm_client is not None:
-                                self.gpm_client.send_message(
-                                    MAESTRO_RESOURCE, MAESTRO_CLOSE_FIST
-                                )
-                            else:
-                                logger.error(
-                                    "GPM connection failed earlier -- cannot send deactivation command to Grasp."
-                                )
-            time.sleep(self._sleep_duration)
-
-    @retryable(base_delay_in_seconds=0.1, logger=logger)
-    def get_current_buffers(self):
-        if self._buffers is None:
+                    max_inner, max_outer = self._window_maximums()
+                    transition = self._update_activation_state(max_inner, max_outer)
+                    trace_step("Updated activation state")
+                    if transition is not None:
+                        self._record_decision(transition, max_inner, max_outer)
+            self._record_hop(position, watermark, self._position)
+
+    def _consume_new_samples(self) -> np.ndarray:
+        """
+        Preprocesses every sample acquired since the previous call and feeds it to the decision
+        window. The first call waits for the reader's buffers to fill and takes all of them.
+
+        :return: (samples x channels) block of the newly processed samples
+        """
+        reader = self._adc_reader
+        if self._position is None:
+            reader.wait_until_full()
+            self._position = 0
+        new_samples, start = reader.buffer.snapshot_since(self._position)
+        if start > self._position and self._position > 0:
+            self._count_dropped_samples(start - self._position)
+        self._position = start + len(new_samples)
+        if self._resampler is not None:
+            new_samples = self._resample(new_samples, start)
+
+        if self.spectral is not None and self.spectral.update(new_samples) is not None:
+            self._export_spectral_features(self.spectral.features)
+        processed = self.pipeline.update(new_samples)
+        self._processed.extend(processed)
+        self._buffers_ready.set()
+        return processed
+
+    def _resample(self, new_samples: np.ndarray, start: int) -> np.ndarray:
+        """
+        Resamples the acquired samples starting at absolute index `start` onto the uniform grid
+        the filters are designed for, using their acquisition timestamps.
+        """
+        timestamps, timestamps_start = self._adc_reader.timestamps.snapshot_since(start)
+        # the reader publishes samples before their timestamps, the newest may not be stamped yet
+        offset = timestamps_start - start
+        if offset > 0:
+            # the timestamps of the oldest samples were overwritten already
+            self._count_dropped_samples(offset)
+        new_samples = new_samples[offset : offset + len(timestamps)]
+        self._position = start + offset + len(new_samples)
+        timestamps = timestamps[: len(new_samples)]
+        resampler = self._resampler
+        gaps = resampler.gaps
+        duplicates = resampler.duplicates + resampler.out_of_order
+        _, resampled = resampler.process(timestamps, new_samples)
+        PROCESSING_RESAMPLED_GAPS.inc(resampler.gaps - gaps)
+        PROCESSING_RESAMPLED_DUPLICATES.inc(resampler.duplicates + resampler.out_of_order - duplicates)
+        return resampled.reshape(-1, NUM_CHANNELS)
+
+    def _count_dropped_samples(self, dropped: int):
+        logger.warning(f"Processing fell behind, {dropped} samples were overwritten")
+        self.dropped_samples += dropped
+        PROCESSING_DROPPED_SAMPLES.inc(dropped)
+
+    @property
+    def spectral_features(self) -> SpectralFeatures | None:
+        """Spectral features of the latest acquired samples, None until the first segment completes"""
+        return None if self.spectral is None else self.spectral.features
+
+    def _export_spectral_features(self, features: SpectralFeatures):
+        mean_gauges, median_gauges, band_gauges = self._spectral_gauges
+        for gauge, value in zip(mean_gauges, features.mean_frequency):
+            gauge.set(value)
+        for gauge, value in zip(median_gauges, features.median_frequency):
+            gauge.set(value)
+        for gauges, powers in zip(band_gauges, features.band_powers):
+            for gauge, value in zip(gauges, powers):
+                gauge.set(value)
+
+    def _record_hop(self, position: int, watermark: int, end: int):
+        """
+        Records statistics for a hop that started at `position`, was triggered by the sample
+        watermark `watermark` and consumed samples up to `end`.
+        """
+        self.hops_processed += 1
+        PROCESSING_HOPS.inc()
+        missed = (end - position) // self._hop_size - 1
+        if missed > 0:
+            self.missed_hops += missed
+            PROCESSING_MISSED_HOPS.inc(missed)
+        timestamps, start = self._adc_reader.timestamps.snapshot_since(watermark - 1)
+        if start == watermark - 1 and len(timestamps):
+            # time from the sample that completed this hop being acquired until it was processed
+            clock = self._adc_reader.scheduler.clock
+            PROCESSING_HOP_LATENCY.observe(clock() - timestamps[0])
+
+    def _record_decision(self, transition: int, max_inner: float, max_outer: float):
+        if self._recorder is None:
+            return
+        self._recorder.record_event(
+            transition,
+            self._position,
+            self._adc_reader.scheduler.clock(),
+            max_inner,
+            max_outer,
+            self.inner_max_signal,
+            self.outer_max_signal,
+        )
+
+    def _window_maximums(self) -> tuple[float, float]:
+        return self.pipeline.window_maximums()
+
+    def _update_activation_state(self, max_inner: float, max_outer: float) -> int | None:
+        machine = self.state_machine
+        transition = machine.update(max_inner, max_outer)
+        if transition == EVENT_ACTIVATE:
+            logger.warning(
+                f"Received inner_signal={max_inner} greater than inner_threshold={machine.inner_threshold}, sending activation."
+            )
+            print('grip activated')
+            self.gpm_dispatcher.submit(MAESTRO_RESOURCE, MAESTRO_OPEN_FIST)
+        elif transition == EVENT_DEACTIVATE:
+            logger.warning(
+                f"Received outer_signal={max_outer} greater than outer_threshold={machine.outer_threshold}, sending de-activation."
+            )
+            print('grip de-activated')
+            self.gpm_dispatcher.submit(MAESTRO_RESOURCE, MAESTRO_CLOSE_FIST)
+        return transition
+
+    def _update_grip(self, processed: np.ndarray) -> str | None:
+        grip = self.classifier_stage.update(processed)
+        if grip is None:
+            return None
+        logger.warning(f"Classified grip={grip}.")
+        task = GRIP_TASKS.get(grip)
+        if task is not None:
+            self.gpm_dispatcher.submit(MAESTRO_RESOURCE, task)
+        return grip
+
+    def get_current_buffers(self, timeout=None):
+        """
+        Get the most recently processed buffers, blocking until the first ones are available.
+
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely
+        """
+        if not self._buffers_ready.wait(timeout):
             raise Exception("Buffers have not yet been initialized")
-        inner, outer = self._buffers
+        window = self._processed.snapshot()
+        inner = window[-self._processed_inner_window_size :, INNER_CHANNEL]
+        outer = window[-self._processed_outer_window_size :, OUTER_CHANNEL]
         return (inner, outer)
 
     def get_thresholds(self):
-        return self.inner_threshold, self.outer_threshold
+        return self.state_machine.inner_threshold, self.state_machine.outer_threshold
     
     def get_maximums(self):
         return self.inner_max_signal, self.outer_max_signal
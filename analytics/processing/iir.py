@@ -0,0 +1,88 @@
+import functools
+import numpy as np
+import scipy
+
+
+@functools.lru_cache(maxsize=None)
+def design_bandpass(sampling_freq, highpass_freq, lowpass_freq, order=4) -> np.ndarray:
+    """
+    Designs a Butterworth bandpass filter as second-order sections. Designs are cached per
+    (sampling_freq, band, order), so repeated calls are free.
+    """
+    return scipy.signal.butter(
+        order, [highpass_freq, lowpass_freq], btype="bandpass", fs=sampling_freq, output="sos"
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def design_notch(sampling_freq, f0, Q) -> np.ndarray:
+    """Designs a notch filter at `f0` as second-order sections, cached like `design_bandpass`"""
+    if f0 > sampling_freq / 2:
+        raise Exception("notch frequency must be less than or equal to fs/2 (f0 <= fs/2")
+    b, a = scipy.signal.iirnotch(f0, Q, sampling_freq)
+    return scipy.signal.tf2sos(b, a)
+
+
+class SosFilter:
+    """
+    A streaming IIR filter over (samples x channels) blocks. The filter state (`zi`) of every
+    channel is carried across calls to `process`, so filtering a signal block by block gives
+    the same result as filtering it in one go, and each call only costs the new samples.
+
+    With `zero_phase=True` every block is instead filtered forwards and backwards with
+    `sosfiltfilt`. That is only meaningful when the block is a whole recording, i.e. for
+    offline analysis.
+    """
+
+    def __init__(self, sos, channels, zero_phase=False):
+        """
+        :param sos: Second-order sections, e.g. from `design_bandpass`
+        :param channels: Number of channels in the blocks that will be processed
+        :param zero_phase: Whether to use non-causal forward-backward filtering
+        """
+        self.sos = np.asarray(sos)
+        self.channels = channels
+        self.zero_phase = zero_phase
+        self._zi = None
+
+    def reset(self):
+        """Forgets the filter state, the next block is treated as the start of a new signal"""
+        self._zi = None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Filters a block of samples.
+
+        :param block: (samples x channels) array
+        :return: Filtered (samples x channels) array
+        """
+        if len(block) == 0:
+            return np.asarray(block, dtype=np.float64)
+        if self.zero_phase:
+            return scipy.signal.sosfiltfilt(self.sos, block, axis=0)
+        if self._zi is None:
+            # start in steady state for the first sample to avoid a large onset transient
+            self._zi = scipy.signal.sosfilt_zi(self.sos)[:, :, np.newaxis] * block[0]
+        filtered, self._zi = scipy.signal.sosfilt(self.sos, block, axis=0, zi=self._zi)
+        return filtered
+
+
+def make_emg_filter(
+    sampling_freq,
+    channels,
+    highpass_freq,
+    lowpass_freq,
+    order=4,
+    notch_freq=None,
+    notch_quality=30,
+    zero_phase=False,
+) -> SosFilter:
+    """
+    Builds the EMG preprocessing filter: a bandpass, optionally followed by a notch for mains
+    hum. Both stages are cascaded into a single set of sections so a block is filtered in one
+    `sosfilt` call.
+    """
+    sections = [design_bandpass(sampling_freq, highpass_freq, lowpass_freq, order)]
+    if notch_freq:
+        sections.append(design_notch(sampling_freq, notch_freq, notch_quality))
+    return SosFilter(np.vstack(sections), channels, zero_phase=zero_phase)
@@ -0,0 +1,161 @@
+import argparse
+import logging
+import numpy as np
+from typing import Iterable, NamedTuple
+import analytics
+from analytics import config
+from analytics.adc.basereader import configured_buffer_size
+from analytics.data import load_recording
+from analytics.processing.decimation import decimated_length
+from analytics.processing.pipeline import (
+    ActivationStateMachine,
+    EmgPipeline,
+    pipeline_from_config,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+class OfflineResult(NamedTuple):
+    # absolute index of the sample each decision was made after
+    decision_samples: np.ndarray
+    # (decisions x 2) inner and outer window maxima each decision was made on
+    maximums: np.ndarray
+    # activation state after each decision
+    states: np.ndarray
+    # `EVENT_ACTIVATE`/`EVENT_DEACTIVATE` for state changes, 0 otherwise
+    transitions: np.ndarray
+
+
+def iter_chunks(samples: np.ndarray, chunk_size=DEFAULT_CHUNK_SIZE, channels=None):
+    """
+    Yields a (samples x channels) array in chunks. For memory-mapped recordings from
+    `analytics.data` only the chunk being yielded is read into memory.
+
+    :param channels: Columns to select, all of them if None
+    """
+    for start in range(0, len(samples), chunk_size):
+        chunk = samples[start : start + chunk_size]
+        yield np.asarray(chunk if channels is None else chunk[:, channels], dtype=np.float64)
+
+
+def run_offline(
+    chunks: Iterable[np.ndarray],
+    pipeline: EmgPipeline,
+    state_machine: ActivationStateMachine,
+    hop_size: int,
+    warmup: int = None,
+    out: np.ndarray = None,
+) -> OfflineResult:
+    """
+    Runs a recording through the live preprocessing and decision logic, chunk by chunk. Chunks
+    are re-split into exactly the blocks `EmgProcessor.run_detect_activation_loop` consumes when
+    it keeps up: `warmup` samples while the reader's buffers fill, then one block per hop with
+    a decision after each. The results are therefore bit-for-bit those of the live loop,
+    whatever the chunk size, and memory use only depends on the chunk size and the number of
+    decisions.
+
+    :param chunks: (samples x channels) chunks of the recording, in order
+    :param pipeline: Pipeline to run, usually fresh from `pipeline_from_config`
+    :param state_machine: State machine with calibrated maxima
+    :param hop_size: Number of samples per decision
+    :param warmup: Number of samples processed before the first hop, defaults to the largest
+                   decision window like the live reader buffers
+    :param out: Optional (processed samples x channels) array, e.g. a memmap, receiving the processed
+                samples. With a decimator it holds `decimated_length(samples, factor)` rows.
+    """
+    if warmup is None:
+        warmup = max(pipeline.inner_window_size, pipeline.outer_window_size)
+    decisions = []
+    pending, pending_size = [], 0
+    position, boundary = 0, warmup
+    # rows of `out` written so far, fewer than `position` once decimating
+    written = 0
+
+    def process():
+        nonlocal written
+        segment = pending[0] if len(pending) == 1 else np.concatenate(pending)
+        processed = pipeline.update(segment)
+        if out is not None:
+            out[written : written + len(processed)] = processed
+        written += len(processed)
+
+    for chunk in chunks:
+        offset = 0
+        while offset < len(chunk):
+            take = min(boundary - position - pending_size, len(chunk) - offset)
+            pending.append(chunk[offset : offset + take])
+            pending_size += take
+            offset += take
+            if position + pending_size < boundary:
+                continue
+            process()
+            if boundary > warmup:
+                max_inner, max_outer = pipeline.window_maximums()
+                transition = state_machine.update(max_inner, max_outer)
+                decisions.append(
+                    (boundary, max_inner, max_outer, state_machine.activation_state, transition or 0)
+                )
+            pending, pending_size = [], 0
+            position, boundary = boundary, boundary + hop_size
+    if pending_size:
+        # a trailing partial hop is processed but, as live, not decided on
+        process()
+
+    if not decisions:
+        return OfflineResult(np.empty(0, np.int64), np.empty((0, 2)), np.empty(0, bool), np.empty(0, np.int64))
+    samples, max_inner, max_outer, states, transitions = zip(*decisions)
+    return OfflineResult(
+        np.array(samples, dtype=np.int64),
+        np.column_stack((max_inner, max_outer)),
+        np.array(states, dtype=bool),
+        np.array(transitions, dtype=np.int64),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs a recording through the EMG processing and decision logic"
+    )
+    parser.add_argument("recording", help="Recording to process, see analytics.data")
+    parser.add_argument("--inner-max", type=float, required=True, help="Calibrated inner maximum")
+    parser.add_argument("--outer-max", type=float, required=True, help="Calibrated outer maximum")
+    parser.add_argument("--channels", type=int, nargs=2, default=(0, 1), help="Inner and outer columns")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--output", help="Optional .npy file receiving the processed samples")
+    args = parser.parse_args()
+
+    analytics.initialize_config_and_logging()
+    adc_config = config["adc"]
+    samples = load_recording(args.recording).samples
+    pipeline = pipeline_from_config(
+        adc_config["sample_rate_in_hz"].as_number(),
+        adc_config["inner_read_buffer_size"].as_number(),
+        adc_config["outer_read_buffer_size"].as_number(),
+    )
+    out = None
+    if args.output:
+        out = np.lib.format.open_memmap(
+            args.output, mode="w+", shape=(decimated_length(len(samples), pipeline.decimation_factor), 2)
+        )
+    result = run_offline(
+        iter_chunks(samples, args.chunk_size, list(args.channels)),
+        pipeline,
+        ActivationStateMachine(args.inner_max, args.outer_max),
+        config["processing"]["hop_size_in_samples"].as_number(),
+        warmup=configured_buffer_size(),
+        out=out,
+    )
+    if out is not None:
+        out.flush()
+    changes = np.flatnonzero(result.transitions)
+    print(f"{len(samples)} samples, {len(result.states)} decisions, {len(changes)} state changes")
+    for i in changes:
+        state = "activated" if result.states[i] else "deactivated"
+        print(f"  sample {result.decision_samples[i]}: {state}")
+
+
+if __name__ == "__main__":
+    main()
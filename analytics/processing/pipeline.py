@@ -0,0 +1,177 @@
+import numpy as np
+from analytics import config
+from analytics.adc.constants import INNER_CHANNEL, OUTER_CHANNEL, NUM_CHANNELS
+from analytics.processing.constants import (
+    INNER_THRESHOLD,
+    OUTER_THRESHOLD,
+    INNER_LOWER_THRESHOLD,
+    OUTER_LOWER_THRESHOLD,
+)
+from analytics.processing.decimation import PolyphaseDecimator, decimated_length
+from analytics.processing.envelope import MovingAverage, SlidingMax, rectify
+from analytics.processing.iir import SosFilter, make_emg_filter
+from analytics.recording.constants import EVENT_ACTIVATE, EVENT_DEACTIVATE
+
+
+class EmgPipeline:
+    """
+    The streaming preprocessing shared by live and offline processing: filters, envelope and
+    decimation applied to each new block of samples, and the maxima of the inner and outer
+    decision windows. All state is carried across calls to `update`, so the live loop and the
+    offline runner produce identical results when fed identical blocks.
+
+    With a decimator, everything downstream of it runs at the decimated rate. Window sizes are
+    still given in acquired samples and cover the decimated samples of that span.
+    """
+
+    def __init__(
+        self,
+        inner_window_size: int,
+        outer_window_size: int,
+        filter: SosFilter = None,
+        envelope: MovingAverage = None,
+        decimator: PolyphaseDecimator = None,
+        decimate_before_envelope=False,
+    ):
+        """
+        :param inner_window_size: Number of acquired samples in the inner decision window
+        :param outer_window_size: Number of acquired samples in the outer decision window
+        :param filter: Optional filter applied to the raw samples
+        :param envelope: Optional smoothing applied to the rectified samples
+        :param decimator: Optional decimation of the filtered samples or of the envelope
+        :param decimate_before_envelope: Whether to decimate before rectifying and smoothing,
+                                         so that the envelope runs at the decimated rate
+        """
+        self.filter = filter
+        self.envelope = envelope
+        self.decimator = decimator
+        self.decimate_before_envelope = decimate_before_envelope
+        self.decimation_factor = 1 if decimator is None else decimator.factor
+        self.inner_window_size = inner_window_size
+        self.outer_window_size = outer_window_size
+        self._inner_max = SlidingMax(decimated_length(inner_window_size, self.decimation_factor))
+        self._outer_max = SlidingMax(decimated_length(outer_window_size, self.decimation_factor))
+
+    def preprocess(self, signals: np.ndarray) -> np.ndarray:
+        """
+        Preprocesses a block of newly acquired samples.
+
+        :param signals: (samples x channels) block of raw ADC values
+        :return: (samples x channels) block of processed values, at the decimated rate
+        """
+        # bandpass and notch filter only the new samples, the filter carries its state
+        if self.filter is not None:
+            signals = self.filter.process(signals)
+        if self.decimator is not None and self.decimate_before_envelope:
+            signals = self.decimator.process(signals)
+        # rectify and smooth into an envelope
+        if self.envelope is not None:
+            signals = self.envelope.update(rectify(signals))
+        if self.decimator is not None and not self.decimate_before_envelope:
+            signals = self.decimator.process(signals)
+        return signals
+
+    def update(self, signals: np.ndarray) -> np.ndarray:
+        """
+        Preprocesses a block of newly acquired samples and slides the decision windows over it.
+
+        :param signals: (samples x channels) block of raw ADC values
+        :return: (samples x channels) block of processed values, at the decimated rate
+        """
+        processed = self.preprocess(signals)
+        self._inner_max.update(processed[:, INNER_CHANNEL])
+        self._outer_max.update(processed[:, OUTER_CHANNEL])
+        return processed
+
+    def window_maximums(self) -> tuple[float, float]:
+        return self._inner_max.maximum, self._outer_max.maximum
+
+
+def pipeline_from_config(sample_rate, inner_window_size, outer_window_size) -> EmgPipeline:
+    """Builds the `EmgPipeline` described by the `processing` config"""
+    processing_config = config["processing"]
+    filter = None
+    if processing_config["enable_filters"].get(bool):
+        filter = make_emg_filter(
+            sample_rate,
+            NUM_CHANNELS,
+            processing_config["highpass_freq_in_hz"].as_number(),
+            processing_config["lowpass_freq_in_hz"].as_number(),
+            order=processing_config["bandpass_order"].as_number(),
+            notch_freq=processing_config["notch_freq_in_hz"].as_number(),
+            notch_quality=processing_config["notch_quality"].as_number(),
+        )
+    decimator = None
+    factor = processing_config["decimation_factor"].as_number()
+    if factor > 1:
+        decimator = PolyphaseDecimator(factor, NUM_CHANNELS)
+    decimate_before_envelope = processing_config["decimation_placement"].get() == "before_envelope"
+    envelope = None
+    smoothing_window = processing_config["smoothing_window_in_samples"].as_number()
+    if smoothing_window > 0:
+        if decimate_before_envelope:
+            # the window is configured in acquired samples
+            smoothing_window = decimated_length(smoothing_window, factor)
+        envelope = MovingAverage(
+            smoothing_window, NUM_CHANNELS, rms=processing_config["use_rms_envelope"].get(bool)
+        )
+    return EmgPipeline(inner_window_size, outer_window_size, filter, envelope, decimator, decimate_before_envelope)
+
+
+def preprocessing_settings(sample_rate) -> dict:
+    """
+    The `processing` config shaping what `pipeline_from_config` outputs, e.g. to check that a
+    model is fed samples preprocessed as those it was trained on
+    """
+    processing_config = config["processing"]
+    keys = (
+        "enable_filters",
+        "highpass_freq_in_hz",
+        "lowpass_freq_in_hz",
+        "bandpass_order",
+        "notch_freq_in_hz",
+        "notch_quality",
+        "decimation_factor",
+        "decimation_placement",
+        "smoothing_window_in_samples",
+        "use_rms_envelope",
+    )
+    return {"sample_rate_in_hz": sample_rate, **{key: processing_config[key].get() for key in keys}}
+
+
+class ActivationStateMachine:
+    """
+    The open/close hysteresis deciding the state of the arm from the decision window maxima.
+    A contraction of the inner muscle above `inner_threshold` of its calibrated maximum, with
+    the outer muscle below `outer_lower_threshold` of its own, activates the grip. The opposite
+    deactivates it.
+    """
+
+    def __init__(self, inner_max_signal=float("-inf"), outer_max_signal=float("-inf")):
+        """
+        :param inner_max_signal: Calibrated maximum of the inner muscle
+        :param outer_max_signal: Calibrated maximum of the outer muscle
+        """
+        self.activation_state = False
+        self.inner_threshold = INNER_THRESHOLD
+        self.outer_threshold = OUTER_THRESHOLD
+        self.inner_lower_threshold = INNER_LOWER_THRESHOLD
+        self.outer_lower_threshold = OUTER_LOWER_THRESHOLD
+        self.inner_max_signal = inner_max_signal
+        self.outer_max_signal = outer_max_signal
+
+    def update(self, max_inner: float, max_outer: float) -> int | None:
+        """
+        :return: `EVENT_ACTIVATE` or `EVENT_DEACTIVATE` if the state changed, None otherwise
+        """
+        if self.activation_state is False:
+            if max_inner > self.inner_threshold * self.inner_max_signal:
+                if max_outer < self.outer_lower_threshold * self.outer_max_signal:
+                    self.activation_state = True
+                    return EVENT_ACTIVATE
+        else:
+            if max_outer > self.outer_threshold * self.outer_max_signal:
+                if max_inner < self.inner_lower_threshold * self.inner_max_signal:
+                    self.activation_state = False
+                    return EVENT_DEACTIVATE
+        return None
@@ -0,0 +1,139 @@
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from analytics.data import Recording
+
+
+class ResampleStats(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    input_samples: int
+    output_samples: int
+    duplicates: int
+    out_of_order: int
+    gaps: int
+    max_interval_in_seconds: float
+    mean_interval_in_seconds: float
+
+
+def _latest_before(timestamps: np.ndarray, previous: float) -> np.ndarray:
+    """Latest timestamp seen before each of `timestamps`, starting from `previous`"""
+    return np.maximum.accumulate(np.concatenate(([previous], timestamps[:-1])))
+
+
+class StreamingResampler:
+    """
+    Resamples irregularly timed (timestamps, values) blocks onto a uniform grid at `rate_in_hz`
+    by linear interpolation. The last input sample of every block is carried over, so grid
+    points falling between blocks are interpolated exactly as if the whole stream had been
+    processed at once. Duplicate and out-of-order timestamps are dropped, intervals longer
+    than `gap_factor` periods are counted as gaps and interpolated across.
+    """
+
+    def __init__(self, rate_in_hz: float, gap_factor: float = 2.0):
+        """
+        :param rate_in_hz: Rate of the output grid
+        :param gap_factor: Number of output periods an input interval must exceed to count as a gap
+        """
+        if rate_in_hz <= 0:
+            raise ValueError("Sample rate must be positive.")
+        self.rate_in_hz = rate_in_hz
+        self._gap_threshold = gap_factor / rate_in_hz
+        self._origin = None
+        self._last_time = -np.inf
+        self._last_value = None
+        self.input_samples = 0
+        self.output_samples = 0
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.gaps = 0
+        self.max_interval = 0.0
+        self._interval_sum = 0.0
+        self._intervals = 0
+
+    def process(self, timestamps, values) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :param timestamps: Acquisition time of every sample in seconds
+        :param values: (samples,) or (samples x channels) block of samples
+        :return: (grid times, resampled values) for every grid point up to the last timestamp
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        self.input_samples += len(timestamps)
+        if len(timestamps) == 0:
+            return timestamps, values
+        latest = _latest_before(timestamps, self._last_time)
+        keep = timestamps > latest
+        self.duplicates += int(np.count_nonzero(timestamps == latest))
+        self.out_of_order += int(np.count_nonzero(timestamps < latest))
+        timestamps, values = timestamps[keep], values[keep]
+        if len(timestamps) == 0:
+            return timestamps, values
+        if self._last_value is not None:
+            timestamps = np.concatenate(([self._last_time], timestamps))
+            values = np.concatenate((self._last_value[np.newaxis], values))
+        if self._origin is None:
+            self._origin = timestamps[0]
+        self._record_intervals(np.diff(timestamps))
+        self._last_time, self._last_value = timestamps[-1], values[-1]
+
+        last = int(np.floor((timestamps[-1] - self._origin) * self.rate_in_hz))
+        grid = self._origin + np.arange(self.output_samples, last + 1) / self.rate_in_hz
+        # rounding can push the last grid point just past the input
+        grid = grid[grid <= timestamps[-1]]
+        self.output_samples += len(grid)
+        if len(timestamps) == 1:
+            return grid, np.repeat(values, len(grid), axis=0)
+        left = np.clip(np.searchsorted(timestamps, grid, side="right") - 1, 0, len(timestamps) - 2)
+        fraction = (grid - timestamps[left]) / (timestamps[left + 1] - timestamps[left])
+        if values.ndim > 1:
+            fraction = fraction[:, np.newaxis]
+        return grid, values[left] + (values[left + 1] - values[left]) * fraction
+
+    def _record_intervals(self, intervals: np.ndarray):
+        if len(intervals) == 0:
+            return
+        self.gaps += int(np.count_nonzero(intervals > self._gap_threshold))
+        self.max_interval = max(self.max_interval, float(intervals.max()))
+        self._interval_sum += float(intervals.sum())
+        self._intervals += len(intervals)
+
+    def stats(self) -> ResampleStats:
+        return ResampleStats(
+            input_samples=self.input_samples,
+            output_samples=self.output_samples,
+            duplicates=self.duplicates,
+            out_of_order=self.out_of_order,
+            gaps=self.gaps,
+            max_interval_in_seconds=self.max_interval,
+            mean_interval_in_seconds=self._interval_sum / self._intervals if self._intervals else 0.0,
+        )
+
+
+def resample(timestamps, values, rate_in_hz, gap_factor=2.0):
+    """
+    Resamples a whole capture onto a uniform grid, see `StreamingResampler`.
+
+    :return: (grid times, resampled values, `ResampleStats`)
+    """
+    resampler = StreamingResampler(rate_in_hz, gap_factor)
+    grid, resampled = resampler.process(timestamps, values)
+    return grid, resampled, resampler.stats()
+
+
+def resample_recording(recording: Recording, rate_in_hz, gap_factor=2.0):
+    """
+    Resamples a timestamped recording from `analytics.data` onto a uniform grid. Labels are
+    taken from the latest input sample at or before each grid point.
+
+    :return: (resampled `Recording`, `ResampleStats`)
+    """
+    if recording.timestamps is None:
+        raise ValueError("Recording has no timestamps to resample by")
+    grid, samples, stats = resample(recording.timestamps, recording.samples, rate_in_hz, gap_factor)
+    labels = recording.labels
+    if labels is not None:
+        timestamps = np.asarray(recording.timestamps)
+        keep = timestamps > _latest_before(timestamps, -np.inf)
+        timestamps = timestamps[keep]
+        labels = np.asarray(labels)[keep][np.searchsorted(timestamps, grid, side="right") - 1]
+    return Recording(samples, grid, labels), stats
@@ -0,0 +1,121 @@
+import numpy as np
+import scipy
+from typing import NamedTuple
+from numpy.lib.stride_tricks import sliding_window_view
+from analytics import config
+
+
+class SpectralFeatures(NamedTuple):
+    # (bins x channels) power spectral density in units^2/Hz
+    psd: np.ndarray
+    # power-weighted mean frequency of every channel in Hz
+    mean_frequency: np.ndarray
+    # frequency splitting the power of every channel in halves, in Hz
+    median_frequency: np.ndarray
+    # (bands x channels) power within each band
+    band_powers: np.ndarray
+
+
+class WelchEstimator:
+    """
+    Streaming Welch power spectral density over the latest `num_segments` segments, updated
+    from blocks of any size. Segments overlap by `segment_size - step` samples and are
+    detrended and Hann windowed as by `scipy.signal.welch`. Each segment is transformed once
+    when it completes and its periodogram kept in a ring, so an update only costs the FFTs of
+    the segments it completes, and the estimate always equals `welch` over the same segments.
+    """
+
+    def __init__(self, sample_rate: float, segment_size: int, channels: int, num_segments=8, step=None, bands=()):
+        """
+        :param sample_rate: Sample rate in Hz
+        :param segment_size: Number of samples per segment
+        :param channels: Number of channels
+        :param num_segments: Number of latest segment periodograms averaged
+        :param step: Number of samples between the starts of segments, half a segment by default
+        :param bands: (low, high) frequency bands in Hz to sum the power of, low inclusive
+        """
+        self.segment_size = segment_size
+        self.step = step or segment_size // 2
+        self.channels = channels
+        self.num_segments = num_segments
+        # everything depending only on the segment size is computed once
+        self._window = scipy.signal.get_window("hann", segment_size)
+        self.frequencies = np.fft.rfftfreq(segment_size, 1 / sample_rate)
+        resolution = self.frequencies[1] - self.frequencies[0]
+        # one-sided density: bins besides DC and Nyquist also hold the negative frequencies
+        self._scale = np.full(len(self.frequencies), 2 / (sample_rate * np.sum(self._window**2)))
+        self._scale[0] /= 2
+        if segment_size % 2 == 0:
+            self._scale[-1] /= 2
+        self._band_weights = np.array(
+            [(self.frequencies >= low) & (self.frequencies < high) for low, high in bands], dtype=np.float64
+        ).reshape(len(bands), len(self.frequencies)) * resolution
+
+        self._spectra = np.zeros((num_segments, channels, len(self.frequencies)))
+        self._filled = 0
+        self._next = 0
+        self._carry = np.empty((0, channels))
+        # samples to drop before the next segment starts, when `step` exceeds `segment_size`
+        self._skip = 0
+        self.features = None
+
+    def update(self, block: np.ndarray):
+        """
+        :param block: (samples x channels) block of new samples
+        :return: `SpectralFeatures` if `block` completed a segment, None otherwise
+        """
+        block = np.asarray(block, dtype=np.float64)
+        skipped = min(self._skip, len(block))
+        self._skip -= skipped
+        signals = np.concatenate((self._carry, block[skipped:]))
+        count = max(0, (len(signals) - self.segment_size) // self.step + 1)
+        consumed = count * self.step
+        self._carry = signals[consumed:]
+        if consumed > len(signals):
+            self._skip = consumed - len(signals)
+        if count == 0:
+            return None
+
+        # only the segments that remain in the ring are transformed
+        first = max(0, count - self.num_segments)
+        segments = sliding_window_view(signals, self.segment_size, axis=0)[first * self.step :: self.step][: count - first]
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        spectra = np.abs(np.fft.rfft(segments * self._window, axis=-1)) ** 2 * self._scale
+        for spectrum in spectra:
+            self._spectra[self._next] = spectrum
+            self._next = (self._next + 1) % self.num_segments
+        self._filled = min(self._filled + len(spectra), self.num_segments)
+
+        psd = self._spectra[: self._filled].mean(axis=0)
+        self.features = spectral_features(psd.T, self.frequencies, self._band_weights)
+        return self.features
+
+
+def spectral_features(psd: np.ndarray, frequencies: np.ndarray, band_weights: np.ndarray) -> SpectralFeatures:
+    """
+    :param psd: (bins x channels) power spectral density
+    :param frequencies: Frequency of every bin
+    :param band_weights: (bands x bins) weight of every bin in each band power
+    """
+    total = psd.sum(axis=0)
+    nonzero = np.where(total > 0, total, 1)
+    mean_frequency = frequencies @ psd / nonzero
+    cumulative = np.cumsum(psd, axis=0)
+    median_bins = np.argmax(cumulative >= total / 2, axis=0)
+    median_frequency = np.where(total > 0, frequencies[median_bins], 0.0)
+    return SpectralFeatures(psd, mean_frequency, median_frequency, band_weights @ psd)
+
+
+def spectral_estimator_from_config(sample_rate, channels) -> WelchEstimator | None:
+    """Builds the `WelchEstimator` described by the `processing` config, None if disabled"""
+    processing_config = config["processing"]
+    segment_size = processing_config["spectral_segment_size_in_samples"].as_number()
+    if segment_size <= 0:
+        return None
+    return WelchEstimator(
+        sample_rate,
+        segment_size,
+        channels,
+        processing_config["spectral_segments_averaged"].as_number(),
+        bands=[tuple(band) for band in processing_config["spectral_bands_in_hz"].get(list)],
+    )
@@ -0,0 +1,68 @@
+import numpy as np
+
+# Session files are little-endian throughout:
+#   file header | chunk header + payload | ... | chunk index | trailer
+FILE_MAGIC = b"EMGREC01"
+INDEX_MAGIC = b"EMGRIDX1"
+FORMAT_VERSION = 1
+FILE_EXTENSION = ".emgrec"
+
+# Payload dtypes are fixed so files can be memory-mapped without any decoding
+SAMPLE_DTYPE = np.dtype("<f4")
+TIMESTAMP_DTYPE = np.dtype("<f8")
+
+# Chunk kinds
+SAMPLE_CHUNK = 1
+EVENT_CHUNK = 2
+
+# Decision event kinds
+EVENT_ACTIVATE = 1
+EVENT_DEACTIVATE = 2
+
+# Payloads are padded so every column starts on an 8 byte boundary
+ALIGNMENT = 8
+
+# A full recorder queue is logged on the first dropped block and then once per this many
+DROPPED_BLOCKS_LOG_INTERVAL = 1000
+
+FILE_HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("channels", "<u4"),
+        ("sample_rate", "<f8"),
+        ("created", "<f8"),
+    ]
+)
+
+# A sample chunk holds `count` samples stored channel after channel, i.e. one contiguous column
+# per channel. An event chunk holds `count` EVENT_DTYPE records. The timestamps are the
+# acquisition times of the first and last sample, or of the first and last event.
+CHUNK_HEADER_DTYPE = np.dtype(
+    [
+        ("kind", "<u4"),
+        ("count", "<u4"),
+        ("first_sample", "<i8"),
+        ("first_time", "<f8"),
+        ("last_time", "<f8"),
+        ("payload_size", "<u8"),
+    ]
+)
+
+# The index footer repeats every chunk header together with the chunk's file offset
+INDEX_DTYPE = np.dtype(CHUNK_HEADER_DTYPE.descr + [("offset", "<u8")])
+
+TRAILER_DTYPE = np.dtype([("index_offset", "<u8"), ("index_count", "<u8"), ("magic", "S8")])
+
+EVENT_DTYPE = np.dtype(
+    [
+        ("sample", "<i8"),
+        ("time", "<f8"),
+        ("kind", "<u4"),
+        ("max_inner", "<f4"),
+        ("max_outer", "<f4"),
+        ("inner_max_signal", "<f4"),
+        ("outer_max_signal", "<f4"),
+        ("_pad", "<u4"),
+    ]
+)
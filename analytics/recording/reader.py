@@ -0,0 +1,118 @@
+import logging
+import numpy as np
+from analytics.recording.constants import (
+    CHUNK_HEADER_DTYPE,
+    EVENT_CHUNK,
+    EVENT_DTYPE,
+    FILE_HEADER_DTYPE,
+    FILE_MAGIC,
+    FORMAT_VERSION,
+    INDEX_DTYPE,
+    INDEX_MAGIC,
+    SAMPLE_CHUNK,
+    SAMPLE_DTYPE,
+    TRAILER_DTYPE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidRecording(Exception):
+    pass
+
+
+class SessionRecording:
+    """
+    Read-only view of a session file written by `SessionRecorder`. The file is memory-mapped,
+    so opening an hour-long session only reads its index and samples are paged in on access.
+    Sessions that were not closed cleanly have no index footer, their chunks are then found by
+    walking the chunk headers and a truncated last chunk is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self._data) < FILE_HEADER_DTYPE.itemsize:
+            raise InvalidRecording(f"{path} is too short to be a session recording")
+        header = self._data[: FILE_HEADER_DTYPE.itemsize].view(FILE_HEADER_DTYPE)[0]
+        if header["magic"] != FILE_MAGIC:
+            raise InvalidRecording(f"{path} is not a session recording")
+        if header["version"] != FORMAT_VERSION:
+            raise InvalidRecording(f"{path} has unsupported version {header['version']}")
+        self.channels = int(header["channels"])
+        self.sample_rate = float(header["sample_rate"])
+        self.created = float(header["created"])
+        self.index = self._read_index()
+        self.sample_chunks = self.index[self.index["kind"] == SAMPLE_CHUNK]
+        self.num_samples = int(self.sample_chunks["count"].sum())
+
+    def _read_index(self) -> np.ndarray:
+        data = self._data
+        if len(data) >= FILE_HEADER_DTYPE.itemsize + TRAILER_DTYPE.itemsize:
+            trailer = data[-TRAILER_DTYPE.itemsize :].view(TRAILER_DTYPE)[0]
+            if trailer["magic"] == INDEX_MAGIC:
+                start = int(trailer["index_offset"])
+                end = start + int(trailer["index_count"]) * INDEX_DTYPE.itemsize
+                return data[start:end].view(INDEX_DTYPE)
+        logger.warning(f"{self.path} has no index, it was not closed cleanly")
+        entries = []
+        offset = FILE_HEADER_DTYPE.itemsize
+        while offset + CHUNK_HEADER_DTYPE.itemsize <= len(data):
+            header = data[offset : offset + CHUNK_HEADER_DTYPE.itemsize].view(CHUNK_HEADER_DTYPE)[0]
+            end = offset + CHUNK_HEADER_DTYPE.itemsize + int(header["payload_size"])
+            if end > len(data):
+                break
+            entries.append(tuple(header) + (offset,))
+            offset = end
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    def _payload(self, entry, dtype, count) -> np.ndarray:
+        start = int(entry["offset"]) + CHUNK_HEADER_DTYPE.itemsize
+        return self._data[start : start + count * dtype.itemsize].view(dtype)
+
+    def chunk(self, i) -> np.ndarray:
+        """Zero-copy (samples x channels) view of the `i`th sample chunk"""
+        entry = self.sample_chunks[i]
+        count = int(entry["count"])
+        return self._payload(entry, SAMPLE_DTYPE, count * self.channels).reshape(-1, count).T
+
+    def chunk_timestamps(self, i) -> np.ndarray:
+        """Acquisition times of the samples in the `i`th sample chunk"""
+        entry = self.sample_chunks[i]
+        return np.linspace(entry["first_time"], entry["last_time"], int(entry["count"]))
+
+    def read_samples(self, start=0, stop=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Reads the recorded samples with absolute indices in [`start`, `stop`). Only the chunks
+        overlapping the range are touched. Samples dropped while recording are missing from the
+        result, compare the returned indices to find them.
+
+        :return: ((samples x channels) array, absolute index of every sample)
+        """
+        chunks = self.sample_chunks
+        firsts = chunks["first_sample"]
+        if stop is None:
+            stop = int(firsts[-1] + chunks["count"][-1]) if len(chunks) else 0
+        first = max(np.searchsorted(firsts, start, side="right") - 1, 0)
+        last = np.searchsorted(firsts, stop, side="left")
+        blocks, indices = [], []
+        for i in range(first, last):
+            chunk_start = int(firsts[i])
+            lo = max(start - chunk_start, 0)
+            hi = min(stop - chunk_start, int(chunks["count"][i]))
+            if lo < hi:
+                blocks.append(self.chunk(i)[lo:hi])
+                indices.append(np.arange(chunk_start + lo, chunk_start + hi))
+        if not blocks:
+            return np.empty((0, self.channels), dtype=SAMPLE_DTYPE), np.empty(0, dtype=np.int64)
+        return np.concatenate(blocks), np.concatenate(indices)
+
+    @property
+    def events(self) -> np.ndarray:
+        """All decision events, as an `EVENT_DTYPE` array"""
+        event_chunks = self.index[self.index["kind"] == EVENT_CHUNK]
+        if len(event_chunks) == 0:
+            return np.empty(0, dtype=EVENT_DTYPE)
+        return np.concatenate(
+            [self._payload(entry, EVENT_DTYPE, int(entry["count"])) for entry in event_chunks]
+        )
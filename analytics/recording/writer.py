@@ -0,0 +1,245 @@
+import logging
+import os
+import queue
+import threading
+import time
+import numpy as np
+from analytics import config
+from analytics.recording.constants import (
+    ALIGNMENT,
+    CHUNK_HEADER_DTYPE,
+    DROPPED_BLOCKS_LOG_INTERVAL,
+    EVENT_CHUNK,
+    EVENT_DTYPE,
+    FILE_EXTENSION,
+    FILE_HEADER_DTYPE,
+    FILE_MAGIC,
+    FORMAT_VERSION,
+    INDEX_DTYPE,
+    INDEX_MAGIC,
+    SAMPLE_CHUNK,
+    SAMPLE_DTYPE,
+    TRAILER_DTYPE,
+)
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class SessionRecorder:
+    """
+    Records acquired sample blocks and decision events to an append-only session file in the
+    background. Producers only enqueue references to their blocks, a dedicated writer thread
+    batches them into fixed-size columnar chunks and appends those with one sequential write
+    each, which is what SD cards are good at. The chunk index is written as a footer on
+    `close`. See `analytics.recording.constants` for the layout and
+    `analytics.recording.reader.SessionRecording` to read sessions back.
+
+    The queue is bounded: when the writer cannot keep up, blocks are dropped and counted rather
+    than stalling acquisition. A chunk never spans a gap, so dropped samples show up as a jump
+    in `first_sample` between chunks.
+    """
+
+    def __init__(
+        self, path, channels, sample_rate, chunk_size=4096, queue_size=256, event_chunk_size=64
+    ):
+        """
+        :param path: Session file to create
+        :param channels: Number of channels in every sample block
+        :param sample_rate: Nominal sample rate in Hz, stored in the file header
+        :param chunk_size: Number of samples per sample chunk
+        :param queue_size: Maximum number of blocks and events waiting for the writer thread
+        :param event_chunk_size: Number of events per event chunk
+        """
+        self.path = path
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.dropped_blocks = 0
+        self.dropped_samples = 0
+        self.dropped_events = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._chunk_size = chunk_size
+        # samples are buffered column-major so each channel is written as one contiguous column
+        self._samples = np.empty((channels, chunk_size), dtype=SAMPLE_DTYPE)
+        self._times = np.empty(chunk_size)
+        self._buffered = 0
+        self._first_sample = None
+        self._events = np.zeros(event_chunk_size, dtype=EVENT_DTYPE)
+        self._buffered_events = 0
+        self._index = []
+        self._closed = False
+        self._file = open(path, "wb")
+        header = np.zeros(1, dtype=FILE_HEADER_DTYPE)
+        header[0] = (FILE_MAGIC, FORMAT_VERSION, channels, sample_rate, time.time())
+        self._file.write(header.tobytes())
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+        logger.info(f"Recording session to {path}")
+
+    def record_block(self, block: np.ndarray, first_sample: int, timestamps: np.ndarray):
+        """
+        Queues a (samples x channels) block for writing, never blocks. The block must not be
+        modified afterwards. Blocks recorded after `close` are ignored.
+
+        :param block: Newly acquired samples
+        :param first_sample: Absolute index of the first sample in `block`
+        :param timestamps: Acquisition time of every sample in `block`
+        """
+        if self._closed:
+            # acquisition outlives the session on shutdown
+            return
+        try:
+            self._queue.put_nowait((block, first_sample, timestamps))
+        except queue.Full:
+            self.dropped_blocks += 1
+            self.dropped_samples += len(block)
+            # this runs on the acquisition thread, a stalled disk must not flood the logs too
+            if self.dropped_blocks % DROPPED_BLOCKS_LOG_INTERVAL == 1:
+                logger.warning(
+                    f"Recorder queue full, dropped {self.dropped_samples} samples in "
+                    f"{self.dropped_blocks} blocks so far"
+                )
+
+    def record_event(self, kind, sample, timestamp, max_inner, max_outer, inner_max, outer_max):
+        """
+        Queues a decision event for writing, never blocks.
+
+        :param kind: `EVENT_ACTIVATE` or `EVENT_DEACTIVATE`
+        :param sample: Absolute index of the sample the decision was made at
+        :param timestamp: Time the decision was made at, on the acquisition clock
+        :param max_inner: Inner window maximum that triggered the decision
+        :param max_outer: Outer window maximum that triggered the decision
+        :param inner_max: Calibrated inner maximum signal
+        :param outer_max: Calibrated outer maximum signal
+        """
+        if self._closed:
+            return
+        event = (sample, timestamp, kind, max_inner, max_outer, inner_max, outer_max, 0)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped_events += 1
+            logger.warning(f"Recorder queue full, dropped event {event}")
+
+    def close(self):
+        """Writes everything queued so far and the chunk index, then closes the file"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.dropped_blocks or self.dropped_events:
+            logger.warning(
+                f"Session {self.path} is missing {self.dropped_samples} samples in "
+                f"{self.dropped_blocks} blocks and {self.dropped_events} events"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                if len(item) == 3:
+                    self._buffer_block(*item)
+                else:
+                    self._buffer_event(item)
+            self._flush_samples()
+            self._flush_events()
+            self._write_index()
+        except Exception:
+            logger.exception(f"Failed to write session {self.path}")
+        finally:
+            self._file.close()
+
+    def _buffer_block(self, block, first_sample, timestamps):
+        if self._buffered and first_sample != self._first_sample + self._buffered:
+            # samples were dropped, start a new chunk at the gap
+            self._flush_samples()
+        offset = 0
+        while offset < len(block):
+            if self._buffered == 0:
+                self._first_sample = first_sample + offset
+            take = min(len(block) - offset, self._chunk_size - self._buffered)
+            end = self._buffered + take
+            self._samples[:, self._buffered : end] = block[offset : offset + take].T
+            self._times[self._buffered : end] = timestamps[offset : offset + take]
+            self._buffered = end
+            offset += take
+            if self._buffered == self._chunk_size:
+                self._flush_samples()
+
+    def _buffer_event(self, event):
+        self._events[self._buffered_events] = event
+        self._buffered_events += 1
+        if self._buffered_events == len(self._events):
+            self._flush_events()
+
+    def _flush_samples(self):
+        count = self._buffered
+        if count == 0:
+            return
+        payload = self._samples[:, :count].tobytes()
+        self._write_chunk(
+            SAMPLE_CHUNK, count, self._first_sample, self._times[0], self._times[count - 1], payload
+        )
+        self._buffered = 0
+
+    def _flush_events(self):
+        count = self._buffered_events
+        if count == 0:
+            return
+        events = self._events[:count]
+        self._write_chunk(
+            EVENT_CHUNK,
+            count,
+            events["sample"][0],
+            events["time"][0],
+            events["time"][-1],
+            events.tobytes(),
+        )
+        self._buffered_events = 0
+
+    def _write_chunk(self, kind, count, first_sample, first_time, last_time, payload):
+        padding = -len(payload) % ALIGNMENT
+        header = np.zeros(1, dtype=CHUNK_HEADER_DTYPE)
+        header[0] = (kind, count, first_sample, first_time, last_time, len(payload) + padding)
+        offset = self._file.tell()
+        self._file.write(header.tobytes() + payload + bytes(padding))
+        # a crash loses at most the chunks still buffered in memory
+        self._file.flush()
+        self._index.append(tuple(header[0]) + (offset,))
+
+    def _write_index(self):
+        index = np.array(self._index, dtype=INDEX_DTYPE)
+        trailer = np.zeros(1, dtype=TRAILER_DTYPE)
+        trailer[0] = (self._file.tell(), len(index), INDEX_MAGIC)
+        self._file.write(index.tobytes() + trailer.tobytes())
+
+
+def start_session_recorder(channels, sample_rate) -> SessionRecorder | None:
+    """
+    Starts recording a new session in the configured directory.
+
+    :return: The recorder, or None if recording is disabled
+    """
+    recording_config = config["recording"]
+    if not recording_config["enabled"].get(bool):
+        return None
+    directory = recording_config["directory"].as_filename()
+    os.makedirs(directory, exist_ok=True)
+    name = time.strftime("session-%Y%m%d-%H%M%S") + FILE_EXTENSION
+    return SessionRecorder(
+        os.path.join(directory, name),
+        channels,
+        sample_rate,
+        chunk_size=recording_config["chunk_size_in_samples"].as_number(),
+        queue_size=recording_config["queue_size"].as_number(),
+    )
@@ -0,0 +1,56 @@
+"""
+Measures the CPU time of the full detection path, hop by hop as live, on EMG acquired at high
+rates, with and without decimating to a lower processing rate before or after the envelope.
+
+Run with `poetry run python -m benchmarks.bench_decimation`.
+"""
+
+import timeit
+from analytics.adc.synthetic import SyntheticEmgGenerator
+from analytics.processing.decimation import PolyphaseDecimator, decimated_length
+from analytics.processing.envelope import MovingAverage
+from analytics.processing.iir import make_emg_filter
+from analytics.processing.offline import iter_chunks, run_offline
+from analytics.processing.pipeline import ActivationStateMachine, EmgPipeline
+
+SAMPLE_RATES = (4000, 16000)
+DURATION_IN_SECONDS = 60
+WINDOW_IN_SECONDS = 0.5
+HOP_IN_SECONDS = 0.05
+SMOOTHING_IN_SECONDS = 0.05
+
+
+def _pipeline(sample_rate, factor, before_envelope):
+    decimator = PolyphaseDecimator(factor, 2) if factor > 1 else None
+    smoothing = round(SMOOTHING_IN_SECONDS * sample_rate)
+    if before_envelope:
+        smoothing = decimated_length(smoothing, factor)
+    window = round(WINDOW_IN_SECONDS * sample_rate)
+    return EmgPipeline(
+        window, window, make_emg_filter(sample_rate, 2, 20, 450), MovingAverage(smoothing, 2), decimator, before_envelope
+    )
+
+
+def bench_decimation():
+    for sample_rate in SAMPLE_RATES:
+        samples = SyntheticEmgGenerator(sample_rate, seed=0).generate(sample_rate * DURATION_IN_SECONDS)
+        hop = round(HOP_IN_SECONDS * sample_rate)
+        baseline = None
+        for factor, before_envelope in ((1, False), (4, False), (4, True), (8, False), (8, True)):
+
+            def run():
+                pipeline = _pipeline(sample_rate, factor, before_envelope)
+                run_offline(iter_chunks(samples), pipeline, ActivationStateMachine(1, 1), hop)
+
+            t = min(timeit.repeat(run, number=1, repeat=5))
+            baseline = baseline or t
+            placement = "before envelope" if before_envelope else "after envelope"
+            label = f"{sample_rate} Hz factor={factor} {placement if factor > 1 else ''}"
+            print(
+                f"{label:<38} {t / DURATION_IN_SECONDS * 1e3:>6.2f} ms CPU per second of EMG, "
+                f"{100 * (1 - t / baseline):>5.1f}% saved"
+            )
+
+
+if __name__ == "__main__":
+    bench_decimation()
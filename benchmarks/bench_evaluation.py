@@ -0,0 +1,44 @@
+"""
+Measures how fast an hour of EMG is evaluated by the hop-by-hop offline runner and by the
+vectorized batch evaluation, compared with replaying it in real time.
+
+Run with `poetry run python -m benchmarks.bench_evaluation`.
+"""
+
+import timeit
+from analytics.adc.synthetic import SyntheticEmgGenerator
+from analytics.processing.envelope import MovingAverage
+from analytics.processing.evaluation import evaluate_recording
+from analytics.processing.iir import make_emg_filter
+from analytics.processing.offline import iter_chunks, run_offline
+from analytics.processing.pipeline import ActivationStateMachine, EmgPipeline
+
+SAMPLE_RATE = 1000
+DURATION_IN_SECONDS = 3600
+WINDOW = 200
+HOP = 50
+
+
+def _pipeline(smoothing):
+    envelope = MovingAverage(smoothing, 2) if smoothing else None
+    return EmgPipeline(WINDOW, WINDOW, make_emg_filter(SAMPLE_RATE, 2, 20, 450), envelope)
+
+
+def bench_evaluation():
+    samples = SyntheticEmgGenerator(SAMPLE_RATE, seed=0).generate(SAMPLE_RATE * DURATION_IN_SECONDS)
+    for smoothing in (None, 50):
+        label = f"envelope={smoothing}"
+
+        def offline():
+            run_offline(iter_chunks(samples), _pipeline(smoothing), ActivationStateMachine(1, 1), HOP)
+
+        def batch():
+            evaluate_recording(samples, _pipeline(smoothing), ActivationStateMachine(1, 1), HOP)
+
+        for name, run in (("run_offline", offline), ("evaluate_recording", batch)):
+            t = min(timeit.repeat(run, number=1, repeat=3))
+            print(f"{name:<18} {label:<13} {t:>7.2f} s  {DURATION_IN_SECONDS / t:>8,.0f}x real time")
+
+
+if __name__ == "__main__":
+    bench_evaluation()
@@ -0,0 +1,46 @@
+"""
+Measures how fast time-domain features are extracted from all 8 channels of the Myo captures in
+`data/`, in batch and streamed in the 8-sample rows they were recorded in, relative to real time.
+
+Run with `poetry run python -m benchmarks.bench_features`.
+"""
+
+import os
+import timeit
+import numpy as np
+from analytics.data import load_directory
+from analytics.processing.features import FeatureExtractor, extract_features
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "data")
+# the Myo armband samples at 200 Hz
+SAMPLE_RATE = 200
+WINDOW = 40
+STEP = 10
+BLOCK_SIZE = 8
+
+
+def bench_features():
+    recordings = [
+        np.ascontiguousarray(recording.samples)
+        for recording in load_directory(DATA_DIR).values()
+        if recording.samples.shape[1] == 8
+    ]
+    duration = sum(len(samples) for samples in recordings) / SAMPLE_RATE
+
+    def batch():
+        for samples in recordings:
+            extract_features(samples, WINDOW, STEP, threshold=5)
+
+    def streaming():
+        for samples in recordings:
+            extractor = FeatureExtractor(WINDOW, STEP, 8, threshold=5)
+            for i in range(0, len(samples), BLOCK_SIZE):
+                extractor.update(samples[i : i + BLOCK_SIZE])
+
+    for name, run in (("batch", batch), (f"streaming (block={BLOCK_SIZE})", streaming)):
+        t = min(timeit.repeat(run, number=1, repeat=3))
+        print(f"{name:<22} {duration:.0f} s of 8-channel EMG in {t:.3f} s, {duration / t:>9,.0f}x real time")
+
+
+if __name__ == "__main__":
+    bench_features()
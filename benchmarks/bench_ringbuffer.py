@@ -0,0 +1,90 @@
+"""
+Measures the per-sample cost of appending to and snapshotting the sample buffers.
+
+Run with `poetry run python -m benchmarks.bench_ringbuffer`.
+"""
+
+import timeit
+import numpy as np
+from analytics.common.ringbuffer import RingBuffer
+
+WINDOW_SIZE = 2000
+CHANNELS = 2
+BLOCK_SIZE = 32
+REPEATS = 5
+
+
+def _report(name, seconds, samples):
+    print(f"{name:<40} {seconds / samples * 1e9:>10.1f} ns/sample")
+
+
+def _legacy_list_buffer(size):
+    """The list-backed implementation `CircularList` used before `RingBuffer`"""
+    data, index = [], 0
+
+    def append(value):
+        nonlocal index
+        if len(data) == size:
+            data[index] = value
+        else:
+            data.append(value)
+        index = (index + 1) % size
+
+    def snapshot():
+        return np.array(data[index:] + data[:index])
+
+    return append, snapshot
+
+
+def bench_append():
+    n = 100_000
+    values = np.random.default_rng(0).standard_normal((n, CHANNELS))
+    rows = [tuple(row) for row in values]
+
+    buf = RingBuffer(WINDOW_SIZE, channels=CHANNELS)
+    t = min(timeit.repeat(lambda: [buf.append(r) for r in rows], number=1, repeat=REPEATS))
+    _report("RingBuffer.append", t, n)
+
+    blocks = [values[i : i + BLOCK_SIZE] for i in range(0, n, BLOCK_SIZE)]
+    t = min(timeit.repeat(lambda: [buf.extend(b) for b in blocks], number=1, repeat=REPEATS))
+    _report(f"RingBuffer.extend (block={BLOCK_SIZE})", t, n)
+
+    appends = [_legacy_list_buffer(WINDOW_SIZE)[0] for _ in range(CHANNELS)]
+
+    def legacy():
+        for r in rows:
+            for append, v in zip(appends, r):
+                append(v)
+
+    t = min(timeit.repeat(legacy, number=1, repeat=REPEATS))
+    _report("legacy list append (per channel)", t, n)
+
+
+def bench_snapshot():
+    number = 2000
+    buf = RingBuffer(WINDOW_SIZE, channels=CHANNELS)
+    buf.extend(np.random.default_rng(0).standard_normal((WINDOW_SIZE + 123, CHANNELS)))
+    out = np.empty((WINDOW_SIZE, CHANNELS))
+
+    t = min(timeit.repeat(buf.snapshot, number=number, repeat=REPEATS))
+    _report("RingBuffer.snapshot", t, number * WINDOW_SIZE)
+    t = min(timeit.repeat(lambda: buf.snapshot(out=out), number=number, repeat=REPEATS))
+    _report("RingBuffer.snapshot (preallocated)", t, number * WINDOW_SIZE)
+    t = min(timeit.repeat(buf.views, number=number, repeat=REPEATS))
+    _report("RingBuffer.views", t, number * WINDOW_SIZE)
+
+    snapshots = []
+    for _ in range(CHANNELS):
+        append, snapshot = _legacy_list_buffer(WINDOW_SIZE)
+        for v in range(WINDOW_SIZE + 123):
+            append(float(v))
+        snapshots.append(snapshot)
+    t = min(
+        timeit.repeat(lambda: [s() for s in snapshots], number=number, repeat=REPEATS)
+    )
+    _report("legacy list snapshot (per channel)", t, number * WINDOW_SIZE)
+
+
+if __name__ == "__main__":
+    bench_append()
+    bench_snapshot()
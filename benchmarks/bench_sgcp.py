@@ -0,0 +1,48 @@
+"""
+Compares encoding SGCP requests through the generated protobuf classes, as
+`gpm.Client.send_message` used to, with the precomputed frames and `encode_request` of
+`analytics.gpm.codec`.
+
+Run with `poetry run python -m benchmarks.bench_sgcp`.
+"""
+
+import timeit
+import analytics.protobuf.maestro_pb2 as maestro
+import analytics.protobuf.sgcp_pb2 as sgcp
+from analytics.gpm.codec import encode_request, request_frame
+from analytics.gpm.constants import MAESTRO_OPEN_FIST, MAESTRO_RESOURCE, PREFIX_LENGTH_SIZE
+
+NUMBER = 100000
+TARGETS = [40, 80, 120, 160, 200]
+CHANNELS = [0, 1, 2, 3, 4]
+
+
+def _protobuf_command() -> bytes:
+    request = sgcp.Request()
+    request.resource = sgcp.Resource.Value(MAESTRO_RESOURCE)
+    request.taskCode = MAESTRO_OPEN_FIST
+    buf = request.SerializeToString()
+    return len(buf).to_bytes(PREFIX_LENGTH_SIZE, "big") + buf
+
+
+def _protobuf_task_data() -> bytes:
+    request = sgcp.Request(resource=sgcp.Resource.Value(MAESTRO_RESOURCE), taskCode=MAESTRO_OPEN_FIST)
+    request.maestroData.CopyFrom(maestro.TaskData(targets=TARGETS, channels=CHANNELS))
+    buf = request.SerializeToString()
+    return len(buf).to_bytes(PREFIX_LENGTH_SIZE, "big") + buf
+
+
+def bench_sgcp():
+    cases = (
+        ("command, protobuf", _protobuf_command),
+        ("command, precomputed frame", lambda: request_frame(MAESTRO_RESOURCE, MAESTRO_OPEN_FIST)),
+        ("task data, protobuf", _protobuf_task_data),
+        ("task data, encode_request", lambda: encode_request(MAESTRO_RESOURCE, MAESTRO_OPEN_FIST, TARGETS, CHANNELS)),
+    )
+    for name, run in cases:
+        t = min(timeit.repeat(run, number=NUMBER, repeat=5))
+        print(f"{name:<28} {t / NUMBER * 1e9:>8.0f} ns")
+
+
+if __name__ == "__main__":
+    bench_sgcp()
@@ -0,0 +1,39 @@
+"""
+Compares the cost per hop of the streaming Welch PSD against recomputing `scipy.signal.welch`
+over the whole decision buffer on every hop, for the default live settings.
+
+Run with `poetry run python -m benchmarks.bench_spectral`.
+"""
+
+import timeit
+import numpy as np
+import scipy
+from analytics.processing.spectral import WelchEstimator
+
+SAMPLE_RATE = 1000
+CHANNELS = 2
+BUFFER_SIZE = 2000
+HOP_SIZE = 50
+SEGMENT_SIZE = 256
+HOPS = 2000
+
+
+def bench_spectral():
+    signals = np.random.default_rng(0).standard_normal((BUFFER_SIZE + HOPS * HOP_SIZE, CHANNELS))
+
+    def full():
+        for end in range(BUFFER_SIZE, len(signals), HOP_SIZE):
+            scipy.signal.welch(signals[end - BUFFER_SIZE : end], SAMPLE_RATE, nperseg=SEGMENT_SIZE, axis=0)
+
+    def incremental():
+        estimator = WelchEstimator(SAMPLE_RATE, SEGMENT_SIZE, CHANNELS, bands=[(20, 50), (50, 150), (150, 450)])
+        for start in range(0, len(signals), HOP_SIZE):
+            estimator.update(signals[start : start + HOP_SIZE])
+
+    for name, run in (("welch per hop", full), ("incremental", incremental)):
+        t = min(timeit.repeat(run, number=1, repeat=3))
+        print(f"{name:<14} {t / HOPS * 1e6:>8.1f} us per hop")
+
+
+if __name__ == "__main__":
+    bench_spectral()
@@ -0,0 +1,53 @@
+"""
+Measures how fast the mock reader's synthetic EMG generator produces samples, compared with the
+per-sample generator it replaced.
+
+Run with `poetry run python -m benchmarks.bench_synthetic`.
+"""
+
+import random
+import timeit
+import numpy as np
+from analytics.adc.synthetic import SyntheticEmgGenerator
+
+SAMPLE_RATE = 20000
+CHANNELS = 2
+BLOCK_SIZE = 1024
+NUM_SAMPLES = 200_000
+
+
+def _legacy_samples(buffer_size=100):
+    burst = np.random.uniform(-1, 1, size=buffer_size)
+    quiet = np.random.uniform(-0.05, 0.05, size=buffer_size)
+    actions = {"activated": burst, "resting": quiet}
+    while True:
+        for i in actions[random.choice(list(actions))]:
+            yield i
+
+
+def bench_generator():
+    generator = SyntheticEmgGenerator(SAMPLE_RATE, CHANNELS, seed=0, hum_amplitude=0.1)
+
+    def run():
+        for _ in range(NUM_SAMPLES // BLOCK_SIZE):
+            generator.generate(BLOCK_SIZE)
+
+    t = min(timeit.repeat(run, number=1, repeat=3))
+    print(f"SyntheticEmgGenerator (block={BLOCK_SIZE}) {NUM_SAMPLES / t:>14,.0f} samples/s")
+
+    inner, outer = _legacy_samples(), _legacy_samples()
+
+    def legacy():
+        # as `BaseAdcReader._read_block` consumed it, one sample per channel at a time
+        for _ in range(NUM_SAMPLES // BLOCK_SIZE):
+            block = np.empty((BLOCK_SIZE, CHANNELS))
+            for i in range(BLOCK_SIZE):
+                block[i, 0] = next(inner)
+                block[i, 1] = next(outer)
+
+    t = min(timeit.repeat(legacy, number=1, repeat=3))
+    print(f"legacy per-sample generator        {NUM_SAMPLES / t:>14,.0f} samples/s")
+
+
+if __name__ == "__main__":
+    bench_generator()
@@ -0,0 +1,52 @@
+import time
+import numpy as np
+from prometheus_client import REGISTRY
+from analytics.adc.acquisition import SharedSamplingStats, start_acquisition_process
+from analytics.adc.mockreader import MockAdcReader
+from analytics.adc.scheduler import SamplingScheduler
+
+
+def _wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_shared_sampling_stats():
+    scheduler = SamplingScheduler(500)
+    for _ in range(3):
+        scheduler.wait()
+    stats = SharedSamplingStats()
+    attached = SharedSamplingStats(stats.spec())
+
+    stats.publish(scheduler)
+
+    assert attached.rate_in_hz == 500
+    assert attached.achieved_rate_in_hz > 0
+    assert (attached.overruns, attached.skipped_samples) == (scheduler.overruns, scheduler.skipped_samples)
+    assert attached.max_jitter == scheduler.max_jitter
+    attached.close()
+    stats.close()
+    stats.unlink()
+
+
+def test_acquisition_process_exports_stats_and_blocks():
+    process, reader = start_acquisition_process(MockAdcReader)
+    blocks = []
+    reader.add_block_listener(lambda block, first_sample, timestamps: blocks.append((block, first_sample, timestamps)))
+    try:
+        assert reader.wait_for_samples(2 * reader.buffer.size, timeout=30)
+        _wait_for(lambda: REGISTRY.get_sample_value("adc_achieved_rate_hz") > 0)
+        assert REGISTRY.get_sample_value("adc_target_rate_hz") == reader.sample_rate
+        _wait_for(lambda: len(blocks) > 1)
+    finally:
+        process.terminate()
+        process.join()
+
+    for block, first_sample, timestamps in blocks:
+        assert len(block) == len(timestamps) > 0
+        assert np.all(np.diff(timestamps) >= 0)
+    # blocks follow each other without overlapping, with gaps only if the follower fell behind
+    for (previous, previous_first, _), (_, first, _) in zip(blocks, blocks[1:]):
+        assert first >= previous_first + len(previous)
@@ -0,0 +1,59 @@
+import threading
+import time
+import numpy as np
+import pytest
+from analytics.adc.basereader import BufferNotFull
+from analytics.adc.mockreader import MockAdcReader
+
+
+def _publish(reader, num_samples):
+    now = reader.scheduler.clock()
+    reader._publish(np.zeros((num_samples, 2)), now, now)
+
+
+def test_waits_for_sample_watermark():
+    reader = MockAdcReader()
+    _publish(reader, 10)
+    assert reader.wait_for_samples(10, timeout=0)
+
+    publisher = threading.Timer(0.05, _publish, (reader, 5))
+    publisher.start()
+    start = time.monotonic()
+    assert reader.wait_for_samples(15, timeout=5)
+    assert time.monotonic() - start >= 0.04
+    publisher.join()
+
+
+def test_sample_watermark_wait_times_out():
+    reader = MockAdcReader()
+    _publish(reader, 10)
+
+    start = time.monotonic()
+    assert not reader.wait_for_samples(11, timeout=0.05)
+    assert time.monotonic() - start >= 0.04
+
+
+def test_waits_until_full():
+    reader = MockAdcReader()
+    _publish(reader, reader.buffer.size - 1)
+    assert not reader.wait_until_full(timeout=0)
+
+    publisher = threading.Timer(0.05, _publish, (reader, 1))
+    publisher.start()
+    start = time.monotonic()
+    inner, outer = reader.get_current_buffers(timeout=5)
+    assert time.monotonic() - start >= 0.04
+    assert len(inner) == reader._inner_read_buffer_size
+    assert len(outer) == reader._outer_read_buffer_size
+    publisher.join()
+
+
+def test_raises_when_not_full_in_time():
+    reader = MockAdcReader()
+    _publish(reader, reader.buffer.size - 1)
+
+    start = time.monotonic()
+    with pytest.raises(BufferNotFull):
+        reader.get_current_buffers(timeout=0.05)
+    assert time.monotonic() - start >= 0.04
+    assert not reader.wait_until_full(timeout=0.01)
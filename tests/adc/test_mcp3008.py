@@ -0,0 +1,68 @@
+import numpy as np
+from analytics.adc.mcp3008 import Mcp3008
+
+
+class FakeChipSelect:
+    def __init__(self):
+        self.value = None
+
+    def switch_to_output(self, value):
+        self.value = value
+
+
+class FakeSpiBus:
+    """Emulates an MCP3008 behind a busio.SPI, returning `codes[channel]` for each conversion"""
+
+    def __init__(self, cs, codes):
+        self.cs = cs
+        self.codes = codes
+        self.locked = False
+        self.transfers = 0
+
+    def try_lock(self):
+        if self.locked:
+            return False
+        self.locked = True
+        return True
+
+    def unlock(self):
+        self.locked = False
+
+    def configure(self, baudrate, polarity, phase):
+        assert (polarity, phase) == (0, 0)
+
+    def write_readinto(self, out_buf, in_buf):
+        assert self.locked and self.cs.value is False
+        assert out_buf[0] == 0x01 and out_buf[1] & 0x80
+        code = self.codes[(out_buf[1] >> 4) & 0x07]
+        in_buf[0] = 0xFF
+        in_buf[1] = 0xF8 | (code >> 8)
+        in_buf[2] = code & 0xFF
+        self.transfers += 1
+
+
+def test_read_block_decodes_all_channels():
+    cs = FakeChipSelect()
+    spi = FakeSpiBus(cs, codes=[1023, 512, 7, 0, 0, 0, 0, 300])
+    mcp = Mcp3008(spi, cs, channels=(0, 1, 7), block_size=2)
+
+    block = mcp.read_block(5)
+
+    assert block.shape == (5, 3)
+    assert block.dtype == np.uint16
+    np.testing.assert_array_equal(block, np.tile([1023, 512, 300], (5, 1)))
+    assert spi.transfers == 15
+    assert not spi.locked
+    assert cs.value is True
+
+
+def test_read_block_into_preallocated_array():
+    cs = FakeChipSelect()
+    spi = FakeSpiBus(cs, codes=[5, 6, 0, 0, 0, 0, 0, 0])
+    mcp = Mcp3008(spi, cs, channels=(1, 0))
+    out = np.zeros((3, 2), dtype=np.int32)
+
+    result = mcp.read_block(3, out=out)
+
+    assert result is out
+    np.testing.assert_array_equal(out, [[6, 5]] * 3)
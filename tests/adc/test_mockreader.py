@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from analytics import config
+from analytics.adc.mockreader import MockAdcReader
+
+
+@pytest.fixture
+def mock():
+    """Creates a `MockAdcReader` with the given `adc.mock_*` settings"""
+
+    def make(**settings):
+        config.set({"adc": {f"mock_{key}": value for key, value in settings.items()}})
+        return MockAdcReader()
+
+    yield make
+    config.sources.pop(0)
+
+
+def test_follows_configured_schedule(mock):
+    reader = mock(seed=0, noise_floor=0.0, co_contraction=0.0, schedule=[[1000, [1, 0]], [1000, [0, 1]]])
+
+    first, second = reader._read_block(1000), reader._read_block(1000)
+
+    assert first[200:, 0].std() > 0.5 and first[:, 1].std() == 0
+    assert second[200:, 1].std() > 0.5 and np.abs(second[200:, 0]).max() < 0.05
+
+
+def test_simulates_extra_channels(mock):
+    schedule = [[1000, [0, 0, 1]]]
+    reader = mock(seed=0, noise_floor=0.0, co_contraction=0.5, channels=3, schedule=schedule)
+
+    block = reader._read_block(1000)
+
+    # only the inner and outer muscle are buffered, the third channel leaks into both
+    assert block.shape == (1000, 2)
+    assert 0.2 < block[200:].std(axis=0).min()
+
+
+def test_rejects_fewer_channels_than_buffered(mock):
+    with pytest.raises(ValueError):
+        mock(channels=1)
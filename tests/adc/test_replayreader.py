@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from analytics import config
+from analytics.adc.replayreader import ReplayAdcReader
+
+
+@pytest.fixture
+def replay(tmp_path):
+    """Creates a `ReplayAdcReader` of rows `samples` with the given replay settings"""
+
+    def make(samples, channels=(0, 1), loop=False, speed=0.0):
+        path = tmp_path / "recording.csv"
+        path.write_text("\n".join(",".join(map(str, row)) for row in samples))
+        config.set(
+            {
+                "adc": {
+                    "replay_file": str(path),
+                    "replay_channels": list(channels),
+                    "replay_loop": loop,
+                    "replay_speed": speed,
+                    "sample_rate_in_hz": 500,
+                }
+            }
+        )
+        return ReplayAdcReader()
+
+    yield make
+    config.sources.pop(0)
+
+
+def _rows(count):
+    return np.arange(count * 3, dtype=np.float64).reshape(count, 3)
+
+
+def test_maps_recording_columns_to_channels(replay):
+    reader = replay(_rows(4), channels=(2, 0))
+
+    np.testing.assert_array_equal(reader._read_block(2), [[2, 0], [5, 3]])
+
+
+def test_rejects_missing_channels(replay):
+    with pytest.raises(ValueError):
+        replay(_rows(4), channels=(0, 3))
+
+
+def test_stops_at_the_end_without_looping(replay):
+    reader = replay(_rows(5))
+
+    np.testing.assert_array_equal(reader._read_block(3)[:, 0], [0, 3, 6])
+    # the last block is cut short, then the recording is exhausted
+    np.testing.assert_array_equal(reader._read_block(3)[:, 0], [9, 12])
+    assert len(reader._read_block(3)) == 0
+
+
+def test_wraps_around_when_looping(replay):
+    reader = replay(_rows(5), loop=True)
+
+    np.testing.assert_array_equal(reader._read_block(3)[:, 0], [0, 3, 6])
+    np.testing.assert_array_equal(reader._read_block(4)[:, 0], [9, 12, 0, 3])
+    # blocks longer than the recording wrap several times
+    np.testing.assert_array_equal(reader._read_block(7)[:, 1], [7, 10, 13, 1, 4, 7, 10])
+
+
+def test_replays_whole_recording_into_the_buffers(replay):
+    rows = _rows(450)
+    reader = replay(rows)
+
+    # returns once the recording is exhausted
+    reader.start_reading()
+
+    assert reader.buffer.total_written == len(rows)
+    assert reader.is_full()
+    inner, outer = reader.get_current_buffers()
+    np.testing.assert_array_equal([inner[-1], outer[-1]], rows[-1, :2])
+
+
+@pytest.mark.parametrize("speed, rate", [(1.0, 500), (4.0, 2000), (0.0, None)])
+def test_paces_playback(replay, speed, rate):
+    reader = replay(_rows(4), speed=speed)
+
+    assert reader.scheduler.rate_in_hz == rate
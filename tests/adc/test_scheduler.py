@@ -0,0 +1,57 @@
+import pytest
+from analytics.adc.scheduler import SamplingScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_sleeps_until_absolute_deadlines():
+    clock = FakeClock()
+    scheduler = SamplingScheduler(100, clock=clock, sleep=clock.sleep)
+
+    assert scheduler.wait() == 1
+    # simulate 3 ms of read latency, the next deadline is still at +10 ms
+    clock.now += 0.003
+    assert scheduler.wait() == 1
+    assert clock.now == pytest.approx(100.01)
+    assert scheduler.overruns == 0
+
+
+def test_batches_when_behind():
+    clock = FakeClock()
+    scheduler = SamplingScheduler(100, max_batch_size=4, clock=clock, sleep=clock.sleep)
+    scheduler.wait()
+    clock.now += 0.035
+    assert scheduler.wait() == 3
+    assert scheduler.overruns == 1
+    # the schedule does not drift: the next sample is due at +40 ms
+    assert scheduler.wait() == 1
+    assert clock.now == pytest.approx(100.04)
+
+    clock.now += 0.105
+    assert scheduler.wait() == 4
+    assert scheduler.skipped_samples == 6
+
+
+def test_stats():
+    clock = FakeClock()
+    scheduler = SamplingScheduler(1000, clock=clock, sleep=clock.sleep)
+    for _ in range(1000):
+        scheduler.wait()
+    stats = scheduler.stats()
+    assert stats.samples == 1000
+    assert stats.achieved_rate_in_hz == pytest.approx(1000, rel=1e-2)
+    assert stats.max_jitter_in_seconds == pytest.approx(0, abs=1e-9)
+
+
+def test_as_fast_as_possible():
+    scheduler = SamplingScheduler(None, max_batch_size=16)
+    assert scheduler.wait() == 16
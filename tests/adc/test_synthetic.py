@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from analytics.adc.synthetic import SyntheticEmgGenerator
+
+
+def test_seeded_stream_is_independent_of_block_size():
+    whole = SyntheticEmgGenerator(2000, seed=7, hum_amplitude=0.1).generate(1000)
+    blocks = SyntheticEmgGenerator(2000, seed=7, hum_amplitude=0.1)
+    chunked = np.concatenate([blocks.generate(n) for n in (1, 99, 400, 500)])
+    assert whole.shape == (1000, 2)
+    np.testing.assert_allclose(chunked, whole)
+
+
+def test_schedule_and_co_contraction():
+    schedule = [(5000, (1.0, 0.0)), (5000, (0.0, 0.0))]
+    generator = SyntheticEmgGenerator(
+        4000, seed=1, schedule=schedule, co_contraction=0.2, noise_floor=0.0
+    )
+    np.testing.assert_allclose(generator.activation_levels(5000)[-1], [1.0, 0.2])
+    np.testing.assert_allclose(generator.activation_levels(5000)[0], [0.0, 0.0])
+
+    signal = SyntheticEmgGenerator(
+        4000, seed=1, schedule=schedule, co_contraction=0.2, noise_floor=0.0
+    ).generate(10000)
+    active, resting = signal[1000:5000].std(axis=0), signal[6000:].std(axis=0)
+    assert 0.7 < active[0] < 1.3
+    assert 0.1 < active[1] < 0.3
+    np.testing.assert_allclose(resting, 0, atol=1e-3)
+
+
+def test_hum_frequency():
+    generator = SyntheticEmgGenerator(
+        20000, channels=1, seed=0, schedule=[(1, (0.0,))], noise_floor=0.0, hum_amplitude=1.0
+    )
+    spectrum = np.abs(np.fft.rfft(generator.generate(20000)[:, 0]))
+    assert np.argmax(spectrum) == 60
+
+
+def test_hum_differs_between_channels():
+    generator = SyntheticEmgGenerator(
+        2000, channels=3, seed=0, schedule=[(1, (0.0, 0.0, 0.0))], noise_floor=0.0, hum_amplitude=1.0
+    )
+    hum = generator.generate(2000)
+
+    np.testing.assert_allclose(np.abs(hum).max(axis=0).max(), 1.0, atol=0.01)
+    assert np.abs(hum).max(axis=0).min() >= 0.49
+    assert not np.allclose(hum[:, 0], hum[:, 1])
+    assert not np.allclose(hum[:, 1], hum[:, 2])
+
+
+def test_rejects_schedule_for_other_channel_count():
+    with pytest.raises(ValueError):
+        SyntheticEmgGenerator(1000, channels=3, schedule=[(10, (1.0, 0.0))])
@@ -0,0 +1,93 @@
+import threading
+import pytest
+import numpy as np
+from analytics.common.ringbuffer import RingBuffer
+
+
+def test_constructor():
+    with pytest.raises(Exception):
+        RingBuffer(0)
+    buf = RingBuffer(4, channels=2, dtype=np.int16)
+    assert len(buf) == 4
+    assert buf.count == 0
+    assert buf.dtype == np.int16
+    assert not buf.is_full()
+
+
+def test_extend_wraps_and_preserves_order():
+    buf = RingBuffer(5, channels=2)
+    block = np.arange(14, dtype=np.float64).reshape(7, 2)
+    buf.extend(block[:3])
+    buf.extend(block[3:])
+
+    assert buf.is_full()
+    assert buf.total_written == 7
+    np.testing.assert_array_equal(buf.snapshot(), block[2:])
+    np.testing.assert_array_equal(np.array(buf), block[2:])
+    np.testing.assert_array_equal(buf.snapshot(2), block[5:])
+
+
+def test_extend_larger_than_buffer():
+    buf = RingBuffer(3)
+    buf.append(-1)
+    buf.extend(np.arange(10))
+    np.testing.assert_array_equal(buf.snapshot(), [7, 8, 9])
+    assert buf.total_written == 11
+
+
+def test_views_are_zero_copy():
+    buf = RingBuffer(4)
+    buf.extend(np.arange(4))
+    buf.extend(np.arange(4, 6))
+    older, newer = buf.views()
+    assert np.shares_memory(older, buf._data)
+    assert np.shares_memory(newer, buf._data)
+    np.testing.assert_array_equal(np.concatenate((older, newer)), [2, 3, 4, 5])
+
+
+def test_snapshot_into_preallocated_array():
+    buf = RingBuffer(4, channels=2)
+    buf.extend(np.ones((6, 2)))
+    out = np.zeros((4, 2))
+    result = buf.snapshot(out=out)
+    assert np.shares_memory(result, out)
+    np.testing.assert_array_equal(out, np.ones((4, 2)))
+
+
+def test_concurrent_snapshots_are_never_torn():
+    buf = RingBuffer(1000, channels=2)
+    done = threading.Event()
+
+    def writer():
+        start = 0
+        for _ in range(2000):
+            block = np.arange(start, start + 37, dtype=np.float64)
+            buf.extend(np.column_stack((block, -block)))
+            start += 37
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    while not done.is_set():
+        snapshot = buf.snapshot()
+        # samples are consecutive integers, so any torn copy would break the ramp
+        assert np.all(np.diff(snapshot[:, 0]) == 1)
+        assert np.array_equal(snapshot[:, 1], -snapshot[:, 0])
+    thread.join()
+
+
+def test_snapshot_since():
+    buf = RingBuffer(4)
+    buf.extend(np.arange(3))
+    samples, start = buf.snapshot_since(1)
+    assert start == 1
+    np.testing.assert_array_equal(samples, [1, 2])
+
+    buf.extend(np.arange(3, 9))
+    # samples 0-4 were overwritten
+    samples, start = buf.snapshot_since(2)
+    assert start == 5
+    np.testing.assert_array_equal(samples, [5, 6, 7, 8])
+
+    samples, start = buf.snapshot_since(9)
+    assert start == 9 and len(samples) == 0
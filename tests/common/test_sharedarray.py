@@ -0,0 +1,15 @@
+import numpy as np
+from analytics.common.sharedarray import SharedArray
+
+
+def test_attached_copy_shares_memory():
+    owner = SharedArray.copy_of(np.arange(12.0).reshape(4, 3))
+    attached = SharedArray.attach(owner.spec())
+
+    owner.array[1, 2] = -1
+    assert attached.array.shape == (4, 3)
+    assert attached.array[1, 2] == -1
+
+    attached.close()
+    owner.close()
+    owner.unlink()
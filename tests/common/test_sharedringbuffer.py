@@ -0,0 +1,67 @@
+import multiprocessing
+import numpy as np
+import pytest
+from analytics.common.sharedringbuffer import SharedRingBuffer
+
+
+@pytest.fixture
+def shared():
+    buf = SharedRingBuffer(8, channels=2)
+    yield buf
+    buf.close()
+    buf.unlink()
+
+
+def _write_ramp(spec, count):
+    writer = SharedRingBuffer.attach(spec, writable=True)
+    for start in range(0, count, 5):
+        block = np.arange(start, start + 5, dtype=np.float64)
+        writer.extend(np.column_stack((block, 2 * block)))
+    writer.close()
+
+
+def test_attached_reader_sees_writes(shared):
+    reader = SharedRingBuffer.attach(shared.spec())
+    shared.extend(np.arange(20.0).reshape(10, 2))
+
+    assert reader.total_written == 10
+    np.testing.assert_array_equal(reader.snapshot(), np.arange(4.0, 20.0).reshape(8, 2))
+    with pytest.raises(ValueError):
+        reader.append((1.0, 2.0))
+    reader.close()
+
+
+def test_writer_in_another_process(shared):
+    process = multiprocessing.get_context("spawn").Process(
+        target=_write_ramp, args=(shared.spec(), 50)
+    )
+    process.start()
+    process.join(timeout=30)
+
+    assert process.exitcode == 0
+    assert shared.total_written == 50
+    snapshot = shared.snapshot()
+    np.testing.assert_array_equal(snapshot[:, 0], np.arange(42.0, 50.0))
+    np.testing.assert_array_equal(snapshot[:, 1], 2 * np.arange(42.0, 50.0))
+
+
+def test_attaching_requires_the_lock(shared):
+    spec = dict(shared.spec(), lock=None)
+    with pytest.raises(ValueError):
+        SharedRingBuffer.attach(spec)
+
+
+def test_snapshots_are_consistent_while_another_process_writes(shared):
+    process = multiprocessing.get_context("spawn").Process(
+        target=_write_ramp, args=(shared.spec(), 200000)
+    )
+    process.start()
+    while process.is_alive():
+        snapshot, start = shared.snapshot_since(0)
+        if len(snapshot):
+            np.testing.assert_array_equal(snapshot[:, 0], np.arange(start, start + len(snapshot)))
+            np.testing.assert_array_equal(snapshot[:, 1], 2 * snapshot[:, 0])
+    process.join(timeout=30)
+
+    assert process.exitcode == 0
+    assert shared.total_written == 200000
@@ -0,0 +1,101 @@
+import os
+import numpy as np
+import pytest
+from analytics.data import Recording, load_directory, load_recording, parse_recording
+
+
+def test_myo_rows_are_unpacked_and_cached(tmp_path):
+    row = np.arange(64.0)
+    path = tmp_path / "capture.csv"
+    path.write_text("\n".join(",".join(map(str, [*row + 100 * i, i + 3])) for i in range(2)))
+
+    recording = load_recording(str(path))
+
+    assert isinstance(recording.samples, np.memmap)
+    assert recording.samples.shape == (16, 8)
+    np.testing.assert_array_equal(recording.samples[1], np.arange(8.0, 16.0))
+    np.testing.assert_array_equal(recording.samples[8], np.arange(100.0, 108.0))
+    np.testing.assert_array_equal(recording.labels, [3] * 8 + [4] * 8)
+    assert recording.timestamps is None
+    assert len(list((tmp_path / ".cache").iterdir())) == 1
+    # a second load maps the existing cache
+    np.testing.assert_array_equal(load_recording(str(path)).samples, recording.samples)
+
+
+def test_openbci_export(tmp_path):
+    path = tmp_path / "openbci.csv"
+    path.write_text(
+        "Sample Index; EXG Channel 0; Timestamp; Timestamp (Formatted)\n"
+        "0;0; 1.706992681841143E9; 2024-02-03 12:38:01.841\n"
+        "1; 1769.18; 1.706992681857236E9; 2024-02-03 12:38:01.857\n"
+    )
+
+    samples, timestamps, labels = parse_recording(path)
+
+    np.testing.assert_array_equal(samples, [[0], [1769.18]])
+    np.testing.assert_array_equal(timestamps, [1.706992681841143e9, 1.706992681857236e9])
+    assert labels is None
+
+
+def test_single_column_recording(tmp_path):
+    path = tmp_path / "run.txt"
+    path.write_text("115\n232\n142\n")
+    np.testing.assert_array_equal(parse_recording(path).samples, [[115], [232], [142]])
+
+
+def test_cache_follows_changes(tmp_path):
+    path = tmp_path / "run.txt"
+    path.write_text("1\n2\n")
+    load_recording(path)
+    path.write_text("1\n2\n3\n")
+
+    assert len(load_recording(path).samples) == 3
+    assert set(load_directory(tmp_path)) == {"run.txt"}
+
+
+def test_stale_caches_are_removed(tmp_path):
+    cache_dir = tmp_path / "cache"
+    path = tmp_path / "run.txt"
+    path.write_text("1\n2\n")
+    # a recording of the same name elsewhere sharing the cache directory
+    other = tmp_path / "other" / "run.txt"
+    other.parent.mkdir()
+    other.write_text("5\n")
+    load_recording(other, cache_dir)
+    load_recording(path, cache_dir)
+    first = set(os.listdir(cache_dir))
+
+    path.write_text("1\n2\n3\n")
+    load_recording(path, cache_dir)
+
+    caches = set(os.listdir(cache_dir))
+    assert len(caches) == 2
+    assert len(caches & first) == 1
+    np.testing.assert_array_equal(load_recording(other, cache_dir).samples, [[5]])
+
+
+def test_malformed_values_are_rejected(tmp_path):
+    path = tmp_path / "run.csv"
+    # the values before the malformed one would still make whole rows
+    path.write_text("1,2\n3,4\nx,6\n")
+    with pytest.raises(ValueError):
+        parse_recording(path)
+
+    path = tmp_path / "run.txt"
+    path.write_text("1\n2\n3a\n4\n")
+    with pytest.raises(ValueError):
+        parse_recording(path)
+
+
+def test_cache_lookup_does_not_read_the_recording(tmp_path, monkeypatch):
+    path = tmp_path / "run.txt"
+    path.write_text("1\n2\n")
+    load_recording(path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("recording parsed again")
+
+    monkeypatch.setattr("analytics.data.loader.parse_recording", fail)
+    # nor even opened, only its cache
+    monkeypatch.setattr("analytics.data.loader.open", fail, raising=False)
+    np.testing.assert_array_equal(load_recording(path).samples, [[1], [2]])
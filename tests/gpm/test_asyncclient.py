@@ -0,0 +1,148 @@
+import asyncio
+import pytest
+import analytics.protobuf.sgcp_pb2 as sgcp
+from analytics.gpm.asyncclient import AsyncClient
+from analytics.gpm.client import GpmOfflineError
+from analytics.gpm.constants import PREFIX_LENGTH_SIZE
+from analytics.gpm.framing import FrameBuffer, frame
+
+
+def _response(status: int, message: str) -> bytes:
+    return frame(sgcp.Response(statusCode=status, message=message).SerializeToString())
+
+
+async def _serve(handler):
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def _read_request(reader) -> sgcp.Request:
+    length = int.from_bytes(await reader.readexactly(PREFIX_LENGTH_SIZE), "big")
+    return sgcp.Request.FromString(await reader.readexactly(length))
+
+
+def test_frame_buffer_splits_partial_and_concatenated_frames():
+    stream = b"".join(frame(payload) for payload in (b"first", b"", b"x" * 100, b"last"))
+    frames = FrameBuffer(16)
+    payloads = []
+    # deliver the stream in uneven pieces, some splitting prefixes
+    for start, end in zip([0, 3, 20, 21, 90], [3, 20, 21, 90, len(stream)]):
+        data = stream[start:end]
+        while data:
+            free = frames.writable()
+            taken = min(len(free), len(data))
+            free[:taken] = data[:taken]
+            frames.commit(taken)
+            data = data[taken:]
+            payloads.extend(bytes(payload) for payload in frames.frames())
+
+    assert payloads == [b"first", b"", b"x" * 100, b"last"]
+
+
+def test_pipelined_requests_resolve_in_order():
+    async def handler(reader, writer):
+        requests = [await _read_request(reader) for _ in range(3)]
+        responses = b"".join(_response(200, request.taskCode) for request in requests)
+        # answer all of them at once, split at arbitrary points
+        for start in range(0, len(responses), 7):
+            writer.write(responses[start : start + 7])
+            await writer.drain()
+            await asyncio.sleep(0)
+        await reader.read()
+        writer.close()
+
+    async def run():
+        server, port = await _serve(handler)
+        async with server, AsyncClient("127.0.0.1", port, read_buffer_size=16) as client:
+            results = await asyncio.gather(
+                client.send_message("MAESTRO", "OPEN_FIST"),
+                client.send_message("MAESTRO", "CLOSE_FIST"),
+                client.send_message("BMS", "STATUS"),
+            )
+            assert client.in_flight == 0
+        return results
+
+    results = asyncio.run(run())
+
+    assert [(r.statusCode, r.message) for r in results] == [
+        (200, "OPEN_FIST"),
+        (200, "CLOSE_FIST"),
+        (200, "STATUS"),
+    ]
+
+
+def test_disconnect_fails_requests_in_flight():
+    async def handler(reader, writer):
+        await _read_request(reader)
+        writer.close()
+
+    async def run():
+        server, port = await _serve(handler)
+        async with server, AsyncClient("127.0.0.1", port) as client:
+            with pytest.raises(GpmOfflineError):
+                await client.send_message("MAESTRO", "OPEN_FIST")
+            assert not client.connected
+            with pytest.raises(GpmOfflineError):
+                await client.send_message("MAESTRO", "OPEN_FIST")
+
+    asyncio.run(run())
+
+
+def test_connect_refused():
+    async def run():
+        server, port = await _serve(lambda reader, writer: None)
+        server.close()
+        await server.wait_closed()
+        with pytest.raises(GpmOfflineError):
+            await AsyncClient("127.0.0.1", port).connect()
+
+    asyncio.run(run())
+
+
+def test_sends_maestro_task_data():
+    received = []
+
+    async def handler(reader, writer):
+        for _ in range(2):
+            received.append(await _read_request(reader))
+            writer.write(_response(200, "OK"))
+        await reader.read()
+        writer.close()
+
+    async def run():
+        server, port = await _serve(handler)
+        async with server, AsyncClient("127.0.0.1", port) as client:
+            await asyncio.gather(
+                client.send_maestro_data("OPEN_FIST", [10, 200], [0, 1]),
+                client.send_maestro_data("CLOSE_FIST", [], [3]),
+            )
+
+    asyncio.run(run())
+
+    assert [(r.taskCode, list(r.maestroData.targets), list(r.maestroData.channels)) for r in received] == [
+        ("OPEN_FIST", [10, 200], [0, 1]),
+        ("CLOSE_FIST", [], [3]),
+    ]
+
+
+def test_requests_waiting_to_be_sent_fail_when_gpm_closes():
+    async def handler(reader, writer):
+        await _read_request(reader)
+        writer.close()
+
+    async def run():
+        server, port = await _serve(handler)
+        async with server, AsyncClient("127.0.0.1", port, max_in_flight=1) as client:
+            # the second request waits for the first one, which GPM never answers
+            return await asyncio.wait_for(
+                asyncio.gather(
+                    client.send_message("MAESTRO", "OPEN_FIST"),
+                    client.send_message("MAESTRO", "CLOSE_FIST"),
+                    return_exceptions=True,
+                ),
+                timeout=5,
+            )
+
+    results = asyncio.run(run())
+
+    assert [type(result) for result in results] == [GpmOfflineError, GpmOfflineError]
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import analytics.protobuf.maestro_pb2 as maestro
+import analytics.protobuf.sgcp_pb2 as sgcp
+from analytics.gpm.codec import encode_request, request_frame
+from analytics.gpm.framing import frame
+
+
+def _reference(resource, task_code, targets=None, channels=None) -> bytes:
+    request = sgcp.Request(resource=sgcp.Resource.Value(resource), taskCode=task_code)
+    if targets is not None or channels is not None:
+        request.maestroData.CopyFrom(maestro.TaskData(targets=targets or [], channels=channels or []))
+    return frame(request.SerializeToString())
+
+
+@pytest.mark.parametrize(
+    "request_fields",
+    [
+        ("MAESTRO", "OPEN_FIST"),
+        ("UNDEFINED_COMPONENT", ""),
+        ("BMS", "é" * 100),
+        ("MAESTRO", "", [], []),
+        ("MAESTRO", "CLOSE_FIST", [0, 1, 127], None),
+        ("MAESTRO", "OPEN_FIST", [128, -1, 2**31 - 1, -(2**31)], [300, 5]),
+    ],
+)
+def test_encodes_like_protobuf(request_fields):
+    assert encode_request(*request_fields) == _reference(*request_fields)
+
+
+def test_task_data_is_maestro_only():
+    with pytest.raises(ValueError):
+        encode_request("BMS", "STATUS", [1])
+
+
+def test_static_frames_are_reused():
+    frame = request_frame("MAESTRO", "OPEN_FIST")
+    assert frame == _reference("MAESTRO", "OPEN_FIST")
+    assert request_frame("MAESTRO", "OPEN_FIST") is frame
+
+
+def test_encodes_numpy_arrays():
+    targets, channels = np.array([10, 200, -3]), np.arange(4, dtype=np.int32)
+
+    encoded = encode_request("MAESTRO", "OPEN_FIST", targets, channels)
+
+    assert encoded == _reference("MAESTRO", "OPEN_FIST", [10, 200, -3], [0, 1, 2, 3])
+    assert encode_request("MAESTRO", "", np.array([], dtype=int)) == _reference("MAESTRO", "", [], [])
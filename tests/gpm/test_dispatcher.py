@@ -0,0 +1,117 @@
+import socket
+import threading
+import time
+import analytics.protobuf.sgcp_pb2 as sgcp
+from analytics.gpm.constants import MAESTRO_CLOSE_FIST, MAESTRO_OPEN_FIST, MAESTRO_RESOURCE, PREFIX_LENGTH_SIZE
+from analytics.gpm.dispatcher import CommandDispatcher
+from analytics.gpm.framing import frame
+
+
+class _Gpm:
+    """GPM stand-in answering every request on one connection, once `gate` is set"""
+
+    def __init__(self, port=0):
+        self.listener = socket.create_server(("127.0.0.1", port))
+        self.port = self.listener.getsockname()[1]
+        self.gate = threading.Event()
+        self.gate.set()
+        self.task_codes = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _read(self, connection, size):
+        data = b""
+        while len(data) < size:
+            chunk = connection.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def _serve(self):
+        connection, _ = self.listener.accept()
+        with connection:
+            try:
+                while True:
+                    length = int.from_bytes(self._read(connection, PREFIX_LENGTH_SIZE), "big")
+                    request = sgcp.Request.FromString(self._read(connection, length))
+                    self.gate.wait()
+                    self.task_codes.append(request.taskCode)
+                    connection.sendall(frame(sgcp.Response(statusCode=200).SerializeToString()))
+            except ConnectionError:
+                pass
+
+    def close(self):
+        self.listener.close()
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_coalesces_superseded_commands():
+    gpm = _Gpm()
+    gpm.gate.clear()
+    dispatcher = CommandDispatcher("127.0.0.1", gpm.port, ack_timeout=5)
+    dispatcher.start()
+    try:
+        dispatcher.submit(MAESTRO_RESOURCE, MAESTRO_OPEN_FIST)
+        _wait_for(lambda: dispatcher.stats().pending == 0)
+        # GPM is stalled on the first command, so only the latest of these is sent
+        start = time.perf_counter()
+        for task_code in (MAESTRO_CLOSE_FIST, MAESTRO_OPEN_FIST, MAESTRO_CLOSE_FIST):
+            dispatcher.submit(MAESTRO_RESOURCE, task_code)
+        assert time.perf_counter() - start < 0.05
+        gpm.gate.set()
+        _wait_for(lambda: dispatcher.stats().acknowledged == 2)
+
+        assert gpm.task_codes == [MAESTRO_OPEN_FIST, MAESTRO_CLOSE_FIST]
+        stats = dispatcher.stats()
+        assert (stats.submitted, stats.coalesced, stats.pending) == (4, 2, 0)
+        assert 0 < stats.mean_latency_in_seconds <= stats.max_latency_in_seconds
+    finally:
+        dispatcher.stop(5)
+        gpm.close()
+
+
+def test_reconnects_in_the_background():
+    # reserve a port nobody listens on yet
+    probe = socket.create_server(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    dispatcher = CommandDispatcher("127.0.0.1", port, base_delay=0.01, max_delay=0.05)
+    dispatcher.start()
+    try:
+        dispatcher.submit(MAESTRO_RESOURCE, MAESTRO_OPEN_FIST)
+        time.sleep(0.1)
+        assert dispatcher.stats().pending == 1
+        gpm = _Gpm(port)
+        _wait_for(lambda: dispatcher.stats().acknowledged == 1)
+        assert gpm.task_codes == [MAESTRO_OPEN_FIST]
+        gpm.close()
+    finally:
+        dispatcher.stop(5)
+
+
+def test_drops_oldest_resource_when_full():
+    dispatcher = CommandDispatcher("127.0.0.1", 1, queue_size=2)
+
+    for resource in ("MAESTRO", "BMS", "EMG"):
+        dispatcher.submit(resource, "STATUS")
+
+    assert list(dispatcher._pending) == ["BMS", "EMG"]
+    assert dispatcher.stats().dropped == 1
+
+
+def test_submit_after_stop_does_not_raise():
+    gpm = _Gpm()
+    dispatcher = CommandDispatcher("127.0.0.1", gpm.port)
+    dispatcher.start()
+    dispatcher.stop(5)
+
+    dispatcher.submit(MAESTRO_RESOURCE, MAESTRO_OPEN_FIST)
+
+    assert dispatcher.stats().pending == 1
+    gpm.close()
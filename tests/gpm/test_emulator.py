@@ -0,0 +1,77 @@
+import time
+import analytics.protobuf.sgcp_pb2 as sgcp
+import pytest
+from analytics.gpm.client import Client, GpmOfflineError
+from analytics.gpm.constants import MAESTRO_CLOSE_FIST, MAESTRO_OPEN_FIST, MAESTRO_RESOURCE, PREFIX_LENGTH_SIZE
+from analytics.gpm.dispatcher import CommandDispatcher
+from analytics.gpm.emulator import GpmEmulator
+
+
+def _response(data: bytes) -> sgcp.Response:
+    assert int.from_bytes(data[:PREFIX_LENGTH_SIZE], "big") == len(data) - PREFIX_LENGTH_SIZE
+    return sgcp.Response.FromString(data[PREFIX_LENGTH_SIZE:])
+
+
+def test_client_reassembles_partial_writes():
+    with GpmEmulator(partial_writes=True, status_code=201, seed=0) as gpm:
+        client = Client("127.0.0.1", gpm.port)
+        try:
+            for task_code in [MAESTRO_OPEN_FIST, MAESTRO_CLOSE_FIST] * 10:
+                response = _response(client.send_message(MAESTRO_RESOURCE, task_code))
+                assert (response.statusCode, response.message) == (201, task_code)
+        finally:
+            client.close()
+
+    assert gpm.stats().responses == 20
+
+
+def test_delays_responses():
+    with GpmEmulator(delay=0.02, jitter=0.01, seed=0) as gpm:
+        client = Client("127.0.0.1", gpm.port)
+        try:
+            start = time.perf_counter()
+            client.send_message(MAESTRO_RESOURCE, MAESTRO_OPEN_FIST)
+            assert 0.02 <= time.perf_counter() - start < 0.5
+        finally:
+            client.close()
+
+
+def test_drops_connections():
+    with GpmEmulator(drop_probability=1.0) as gpm:
+        client = Client("127.0.0.1", gpm.port)
+        try:
+            with pytest.raises((GpmOfflineError, ConnectionError)):
+                client.send_message(MAESTRO_RESOURCE, MAESTRO_OPEN_FIST)
+        finally:
+            client.close()
+
+    assert gpm.stats().dropped_connections == 1
+
+
+def test_dispatcher_recovers_from_dropped_connections():
+    with GpmEmulator(drop_probability=0.3, partial_writes=True, seed=4) as gpm:
+        dispatcher = CommandDispatcher("127.0.0.1", gpm.port, ack_timeout=1, base_delay=0.01, max_delay=0.05)
+        dispatcher.start()
+        try:
+            for _ in range(10):
+                acknowledged = dispatcher.stats().acknowledged
+                dispatcher.submit(MAESTRO_RESOURCE, MAESTRO_OPEN_FIST)
+                deadline = time.monotonic() + 5
+                while dispatcher.stats().acknowledged == acknowledged:
+                    assert time.monotonic() < deadline
+                    time.sleep(0.005)
+        finally:
+            dispatcher.stop(timeout=5)
+
+        stats = dispatcher.stats()
+    assert stats.acknowledged == 10
+    assert stats.reconnects == gpm.stats().dropped_connections > 0
+
+
+def test_start_raises_when_the_port_is_taken():
+    with GpmEmulator() as gpm:
+        emulator = GpmEmulator(port=gpm.port)
+        with pytest.raises(OSError):
+            emulator.start()
+        # nothing to stop, but stopping must not fail either
+        emulator.stop(5)
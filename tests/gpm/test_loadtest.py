@@ -0,0 +1,33 @@
+import pytest
+from analytics.gpm.emulator import GpmEmulator
+from analytics.gpm.loadtest import CLIENTS, run, summarize
+
+
+def test_summarizes_latency_percentiles():
+    result = summarize("client", [i / 1000 for i in range(1, 1001)], errors=2, duration=2.0)
+
+    assert (result.requests, result.errors, result.requests_per_second) == (1000, 2, 500.0)
+    assert result.p50_latency_in_seconds == pytest.approx(0.5005)
+    assert result.p99_latency_in_seconds == pytest.approx(0.99001)
+    assert result.p999_latency_in_seconds == pytest.approx(0.999001)
+    assert result.max_latency_in_seconds == 1.0
+
+
+@pytest.mark.parametrize("client", CLIENTS)
+def test_loads_the_emulator(client):
+    with GpmEmulator(partial_writes=True, seed=1) as gpm:
+        result = run(client, "127.0.0.1", gpm.port, requests=200, concurrency=8)
+
+    assert (result.client, result.requests, result.errors) == (client, 200, 0)
+    assert gpm.stats().responses == 200
+    assert 0 < result.p50_latency_in_seconds <= result.p99_latency_in_seconds <= result.p999_latency_in_seconds
+
+
+@pytest.mark.parametrize("client", CLIENTS)
+def test_reconnects_after_dropped_connections(client):
+    with GpmEmulator(drop_probability=0.02, seed=2) as gpm:
+        result = run(client, "127.0.0.1", gpm.port, requests=300, concurrency=4)
+
+    assert result.errors > 0
+    assert result.requests + result.errors == 300
+    assert gpm.stats().dropped_connections > 0
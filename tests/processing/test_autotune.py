@@ -0,0 +1,52 @@
+import logging
+import numpy as np
+from analytics.adc.synthetic import SyntheticEmgGenerator
+from analytics.processing.autotune import (
+    Preprocessing,
+    Settings,
+    Thresholds,
+    autotune,
+    score_decisions,
+)
+from analytics.recording.constants import EVENT_ACTIVATE, EVENT_DEACTIVATE
+
+
+def test_score_decisions():
+    target = np.array([0, 0, 1, 1, 1, 0, 0, 1, 1, 0], dtype=bool)
+    states = np.array([0, 1, 1, 1, 0, 0, 0, 0, 0, 0], dtype=bool)
+    transitions = np.array([0, EVENT_ACTIVATE, 0, 0, EVENT_DEACTIVATE, 0, 0, 0, 0, 0])
+
+    score = score_decisions(states, transitions, target)
+
+    # activated one decision early, and never during the second labelled activation
+    assert score.false_activations == 1
+    assert score.missed_activations == 1
+    assert score.mismatch == 0.4
+
+
+def _write_myo_capture(path, label, levels, seed):
+    generator = SyntheticEmgGenerator(200, channels=8, seed=seed, schedule=[(4000, levels)])
+    rows = generator.generate(4000).reshape(-1, 64)
+    np.savetxt(path, np.column_stack((rows, np.full(len(rows), label))), delimiter=",")
+
+
+def test_autotune_ranks_and_caches(tmp_path, caplog):
+    paths = [str(tmp_path / "0.csv"), str(tmp_path / "1.csv")]
+    _write_myo_capture(paths[0], 0, (1, 0.1, 0, 0, 0, 0, 0, 0), seed=1)
+    _write_myo_capture(paths[1], 1, (0.1, 1, 0, 0, 0, 0, 0, 0), seed=2)
+    settings = Settings(200, 100, 100, 25, (0, 1), (0,), 1.0)
+    thresholds = [Thresholds(0.5, 0.5, 0.3, 1.0), Thresholds(0.05, 0.05, 0.01, 100)]
+    cache_path = str(tmp_path / "cache.json")
+    caplog.set_level(logging.INFO, logger="analytics.processing.autotune")
+
+    results = autotune(paths, settings, [Preprocessing(20, 0, 0)], thresholds, cache_path, max_workers=2)
+
+    best, worst = results
+    assert best[1] == thresholds[0]
+    assert best[2].false_activations == best[2].missed_activations == 0
+    assert worst[2].false_activations > 0
+    assert "Evaluating 2 of 2 grid points" in caplog.text
+
+    grid = [Preprocessing(20, 0, 0), Preprocessing(0, 20, 450)]
+    assert len(autotune(paths, settings, grid, thresholds, cache_path, max_workers=2)) == 4
+    assert "Evaluating 2 of 4 grid points" in caplog.text
@@ -0,0 +1,45 @@
+import numpy as np
+from analytics.processing.calibration import PhaseStatistics, QuantileSketch
+
+
+def test_quantile_sketch_accuracy():
+    values = np.random.default_rng(0).standard_normal(200_000)
+    sketch = QuantileSketch(capacity=256)
+    for block in np.array_split(values, 997):
+        sketch.update(block)
+
+    assert sketch.count == len(values)
+    qs = np.array([0.01, 0.5, 0.9, 0.99])
+    # compare in rank space, the sketch guarantees rank error rather than value error
+    ranks = np.searchsorted(np.sort(values), sketch.quantile(qs)) / len(values)
+    np.testing.assert_allclose(ranks, qs, atol=0.02)
+
+
+def test_quantile_sketch_memory_is_bounded():
+    sketch = QuantileSketch(capacity=128)
+    stored = []
+    for _ in range(1000):
+        sketch.update(np.arange(1000.0))
+        stored.append(sum(len(level) for level in sketch._levels))
+    # independent of the number of values added
+    assert max(stored) < 3 * 128 + 2 * len(sketch._levels)
+    assert len(sketch._levels) <= 16
+
+
+def test_phase_statistics():
+    stats = PhaseStatistics(channels=2)
+    stats.update(np.array([[1.0, -5.0], [3.0, -4.0]]))
+    stats.update(np.array([[2.0, 7.0]]))
+    assert stats.count == 3
+    np.testing.assert_array_equal(stats.quantile(1.0), [3.0, 7.0])
+    np.testing.assert_array_equal(stats.quantile(0.0), [1.0, -5.0])
+
+
+def test_included_maximum_leaves_quantiles_alone():
+    stats = PhaseStatistics(channels=2)
+    stats.update(np.array([[1.0, 2.0], [3.0, 4.0]]))
+    stats.include_maximum((10.0, 0.0))
+
+    assert stats.count == 2
+    np.testing.assert_array_equal(stats.quantile(1.0), [10.0, 4.0])
+    np.testing.assert_array_equal(stats.quantile(0.99), [3.0, 4.0])
@@ -0,0 +1,128 @@
+import time
+import numpy as np
+import pytest
+from analytics import config
+from analytics.processing.classifier import (
+    ClassifierStage,
+    GripClassifier,
+    classifier_stage_from_config,
+    preprocess_labelled,
+    train,
+    windowed_dataset,
+)
+from analytics.processing.constants import CLASSIFIER_LATENCY_BUDGET_IN_SECONDS
+from analytics.processing.decimation import PolyphaseDecimator
+from analytics.processing.pipeline import EmgPipeline, preprocessing_settings
+
+GRIPS = {0: "OPEN", 1: "FIST"}
+
+
+def _gestures(rng, lengths, amplitudes):
+    """Noise of a different amplitude per channel for every gesture, with its labels"""
+    samples = np.concatenate([rng.standard_normal((n, 2)) * amplitude for n, amplitude in zip(lengths, amplitudes)])
+    labels = np.repeat(np.arange(len(lengths)) % 2, lengths)
+    return samples, labels
+
+
+@pytest.mark.parametrize("kind", ["lda", "softmax"])
+def test_separates_gestures(kind):
+    rng = np.random.default_rng(0)
+    amplitudes = [(1.0, 0.2), (0.2, 1.0)] * 5
+    samples, labels = _gestures(rng, [400] * 10, amplitudes)
+    features, window_labels = windowed_dataset(samples, labels, 40, 10)
+    model = train(features, window_labels, GRIPS, 40, 10, kind=kind)
+
+    test_features, test_labels = windowed_dataset(*_gestures(rng, [400] * 4, amplitudes), 40, 10)
+    assert np.mean(model.labels[model.predict(test_features)] == test_labels) > 0.95
+    probabilities = model.predict_proba(test_features)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1)
+    np.testing.assert_array_equal(probabilities.argmax(axis=1), model.predict(test_features))
+
+
+def test_drops_windows_spanning_label_changes():
+    samples = np.zeros((100, 2))
+    labels = np.repeat([3, 5], 50)
+
+    _, window_labels = windowed_dataset(samples, labels, 20, 10)
+
+    # windows start every 10 samples, the one starting at 40 spans both labels
+    np.testing.assert_array_equal(window_labels, [3, 3, 3, 3, 5, 5, 5, 5])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    rng = np.random.default_rng(1)
+    samples, labels = _gestures(rng, [300] * 4, [(1.0, 0.2), (0.2, 1.0)] * 2)
+    features, window_labels = windowed_dataset(samples, labels, 30, 15, threshold=0.1)
+    model = train(features, window_labels, {1: "FIST"}, 30, 15, threshold=0.1, preprocessing=preprocessing_settings(1000))
+
+    model.save(tmp_path / "model.npz")
+    loaded = GripClassifier.load(tmp_path / "model.npz")
+
+    assert (loaded.window, loaded.step, loaded.threshold, loaded.channels) == (30, 15, 0.1, 2)
+    assert loaded.preprocessing == preprocessing_settings(1000)
+    assert loaded.grips.tolist() == ["UNDEFINED_GRIP", "FIST"]
+    np.testing.assert_array_equal(loaded.decision_function(features), model.decision_function(features))
+
+
+def test_stage_requires_consecutive_predictions():
+    # scores the mean absolute value of channel 0 against that of channel 1
+    weights = np.zeros((12, 2))
+    weights[0], weights[1] = [1, -1], [-1, 1]
+    model = GripClassifier(weights, np.zeros(2), [0, 1], ["OPEN", "FIST"], 10, 10)
+    stage = ClassifierStage(model, min_consecutive=2)
+    open_block, fist_block = np.tile([1.0, 0.0], (10, 1)), np.tile([0.0, 1.0], (10, 1))
+
+    assert stage.update(open_block) is None
+    assert stage.update(open_block) == "OPEN"
+    assert stage.update(open_block) is None
+    assert stage.update(fist_block) is None
+    assert stage.update(open_block) is None
+    # both windows of a block count
+    assert stage.update(np.concatenate((fist_block, fist_block))) == "FIST"
+
+
+def test_classifies_a_hop_within_latency_budget():
+    rng = np.random.default_rng(2)
+    samples, labels = _gestures(rng, [1000] * 4, [(1.0, 0.2), (0.2, 1.0)] * 2)
+    features, window_labels = windowed_dataset(samples, labels, 200, 50)
+    stage = ClassifierStage(train(features, window_labels, GRIPS, 200, 50), min_consecutive=2)
+    hops = rng.standard_normal((500, 50, 2))
+
+    durations = []
+    for hop in hops:
+        start = time.perf_counter()
+        stage.update(hop)
+        durations.append(time.perf_counter() - start)
+
+    assert np.median(durations) < CLASSIFIER_LATENCY_BUDGET_IN_SECONDS
+
+
+def test_labels_follow_decimation():
+    samples = np.zeros((101, 2))
+    labels = np.arange(101)
+    pipeline = EmgPipeline(10, 10, decimator=PolyphaseDecimator(4, 2))
+
+    processed, processed_labels = preprocess_labelled(pipeline, samples, labels)
+
+    assert len(processed) == len(processed_labels) == 26
+    np.testing.assert_array_equal(processed_labels, np.arange(0, 101, 4))
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    path = tmp_path / "model.npz"
+    config.set({"processing": {"classifier_model_file": str(path)}})
+    yield path
+    config.sources.pop(0)
+
+
+def test_stage_requires_matching_preprocessing(model_file):
+    model = GripClassifier(np.zeros((12, 2)), np.zeros(2), [0, 1], ["OPEN", "FIST"], 10, 10)
+    model.preprocessing = preprocessing_settings(1000)
+    model.save(model_file)
+
+    assert classifier_stage_from_config(2, 1000).model.preprocessing == model.preprocessing
+    with pytest.raises(ValueError, match="preprocessed"):
+        classifier_stage_from_config(2, 2000)
+    with pytest.raises(ValueError, match="channels"):
+        classifier_stage_from_config(3, 1000)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import scipy
+from analytics.adc.synthetic import SyntheticEmgGenerator
+from analytics.processing.decimation import PolyphaseDecimator, decimated_length
+from analytics.processing.envelope import MovingAverage
+from analytics.processing.evaluation import evaluate_recording
+from analytics.processing.iir import make_emg_filter
+from analytics.processing.offline import iter_chunks, run_offline
+from analytics.processing.pipeline import ActivationStateMachine, EmgPipeline
+
+
+@pytest.mark.parametrize("factor", [1, 2, 3, 8])
+def test_streams_like_upfirdn(factor):
+    rng = np.random.default_rng(factor)
+    signals = rng.standard_normal((2001, 2))
+    decimator = PolyphaseDecimator(factor, 2)
+
+    splits = np.sort(rng.choice(len(signals), 30, replace=False))
+    outputs = [decimator.process(block) for block in np.split(signals, splits)]
+
+    expected = scipy.signal.upfirdn(decimator.taps, signals, down=factor, axis=0)
+    # every output is produced as soon as the input sample it falls on arrives
+    assert [len(output) for output in outputs] == list(np.diff(decimated_length(np.r_[0, splits, 2001], factor)))
+    np.testing.assert_allclose(np.concatenate(outputs), expected[: decimated_length(2001, factor)], atol=1e-12)
+
+
+def test_suppresses_aliases():
+    t = np.arange(8000) / 1000
+    # 400 Hz would alias to 100 Hz after decimating to 250 Hz
+    signals = np.column_stack((np.sin(2 * np.pi * 20 * t), np.sin(2 * np.pi * 400 * t)))
+
+    decimated = PolyphaseDecimator(4, 2).process(signals)[100:]
+
+    assert np.std(decimated[:, 0]) > 0.65
+    assert np.std(decimated[:, 1]) < 0.01
+
+
+@pytest.mark.parametrize("before_envelope", [False, True])
+def test_pipeline_decisions_match_streaming(before_envelope):
+    schedule = [(1500, (0, 0)), (1500, (1, 0)), (1500, (0, 0)), (1500, (0, 1))]
+    samples = SyntheticEmgGenerator(1000, seed=5, schedule=schedule).generate(20000)
+
+    def pipeline():
+        envelope = MovingAverage(12 if before_envelope else 50, 2)
+        return EmgPipeline(
+            200, 200, make_emg_filter(1000, 2, 20, 450), envelope, PolyphaseDecimator(4, 2), before_envelope
+        )
+
+    expected = run_offline(iter_chunks(samples, 999), pipeline(), ActivationStateMachine(0.4, 0.4), 50)
+    result = evaluate_recording(samples, pipeline(), ActivationStateMachine(0.4, 0.4), 50)
+
+    for actual, wanted in zip(result, expected):
+        np.testing.assert_array_equal(actual, wanted)
+    assert np.count_nonzero(result.transitions) >= 2
@@ -0,0 +1,38 @@
+import numpy as np
+from analytics.processing.envelope import MovingAverage, SlidingMax
+
+
+def _blocks(signal, splits=(1, 7, 8, 150, 400, 401)):
+    return np.array_split(signal, splits)
+
+
+def test_moving_average_matches_convolution():
+    signal = np.random.default_rng(1).standard_normal((600, 2))
+    window = 32
+    averager = MovingAverage(window, channels=2)
+    result = np.concatenate([averager.update(block) for block in _blocks(signal)])
+
+    for c in range(2):
+        expected = np.convolve(signal[:, c], np.ones(window) / window)[: len(signal)]
+        # during warm-up the average is over the samples seen so far
+        expected[: window - 1] *= window / np.arange(1, window)
+        np.testing.assert_allclose(result[:, c], expected, atol=1e-12)
+
+
+def test_moving_rms():
+    signal = np.random.default_rng(2).standard_normal((300, 1))
+    rms = MovingAverage(50, channels=1, rms=True)
+    result = np.concatenate([rms.update(block) for block in _blocks(signal, (20, 90))])
+    np.testing.assert_allclose(result[-1, 0], np.sqrt(np.mean(signal[-50:, 0] ** 2)))
+
+
+def test_sliding_max_matches_rescan():
+    signal = np.random.default_rng(3).standard_normal(600)
+    signal[100:140] = np.linspace(5, 0, 40)  # a long decreasing run
+    window = 64
+    tracker = SlidingMax(window)
+    seen = 0
+    for block in _blocks(signal):
+        maximum = tracker.update(block)
+        seen += len(block)
+        assert maximum == np.max(signal[max(0, seen - window) : seen])
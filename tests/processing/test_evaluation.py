@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from analytics.adc.synthetic import SyntheticEmgGenerator
+from analytics.processing.envelope import MovingAverage
+from analytics.processing.evaluation import (
+    evaluate_recording,
+    evaluate_state_machine,
+    timeline,
+    window_maximums_at,
+)
+from analytics.processing.iir import make_emg_filter
+from analytics.processing.offline import iter_chunks, run_offline
+from analytics.processing.pipeline import ActivationStateMachine, EmgPipeline
+from analytics.recording.constants import EVENT_ACTIVATE, EVENT_DEACTIVATE
+
+
+def _recording():
+    schedule = [(1500, (0, 0)), (1500, (1, 0)), (1500, (0, 0)), (1500, (0, 1))]
+    return SyntheticEmgGenerator(1000, seed=5, schedule=schedule).generate(20000)
+
+
+@pytest.mark.parametrize(
+    "smoothing, inner_window, warmup",
+    [(None, 200, None), (50, 200, None), (25, 300, 120)],
+)
+def test_reproduces_streaming_decisions(smoothing, inner_window, warmup):
+    def pipeline():
+        envelope = MovingAverage(smoothing, 2) if smoothing else None
+        return EmgPipeline(inner_window, 200, make_emg_filter(1000, 2, 20, 450), envelope)
+
+    samples = _recording()
+    expected = run_offline(
+        iter_chunks(samples, 999), pipeline(), ActivationStateMachine(0.4, 0.4), 50, warmup
+    )
+    result = evaluate_recording(samples, pipeline(), ActivationStateMachine(0.4, 0.4), 50, warmup)
+
+    for actual, wanted in zip(result, expected):
+        np.testing.assert_array_equal(actual, wanted)
+    assert len(timeline(result)) >= 2
+
+
+def test_window_maximums_at():
+    signal = np.array([3.0, 1, 4, 1, 5, 9, 2, 6])
+    np.testing.assert_array_equal(window_maximums_at(signal, 3, np.array([1, 3, 5, 8])), [3, 4, 5, 9])
+
+
+def test_state_machine_matches_stepping():
+    rng = np.random.default_rng(0)
+    maximums = rng.uniform(-1, 1, (500, 2))
+    for inner_max, outer_max in [(0.5, 0.5), (-0.5, 0.5), (-0.5, -0.5)]:
+        stepped = ActivationStateMachine(inner_max, outer_max)
+        expected = [stepped.update(*m) or 0 for m in maximums]
+        machine = ActivationStateMachine(inner_max, outer_max)
+
+        states, transitions = evaluate_state_machine(maximums, machine)
+
+        np.testing.assert_array_equal(transitions, expected)
+        assert machine.activation_state == stepped.activation_state
+        assert set(transitions) <= {0, EVENT_ACTIVATE, EVENT_DEACTIVATE}
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from analytics.processing.features import (
+    FEATURE_NAMES,
+    FeatureExtractor,
+    extract_features,
+    feature_columns,
+    num_windows,
+)
+
+
+def _reference(window: np.ndarray, threshold: float) -> np.ndarray:
+    deltas = np.diff(window, axis=0)
+    return np.array(
+        [
+            np.abs(window).mean(axis=0),
+            np.sqrt(np.square(window).mean(axis=0)),
+            np.abs(deltas).sum(axis=0),
+            ((window[:-1] * window[1:] < 0) & (np.abs(deltas) >= threshold)).sum(axis=0),
+            ((deltas[:-1] * -deltas[1:]) > threshold).sum(axis=0),
+            (np.abs(deltas) > threshold).sum(axis=0),
+        ]
+    ).ravel()
+
+
+def test_matches_per_window_definitions():
+    signals = np.random.default_rng(0).standard_normal((1000, 3))
+    features = extract_features(signals, 100, 30, threshold=0.2)
+
+    assert features.shape == (num_windows(1000, 100, 30), len(FEATURE_NAMES) * 3) == (31, 18)
+    for i in (0, 7, 30):
+        np.testing.assert_allclose(features[i], _reference(signals[30 * i : 30 * i + 100], 0.2))
+    assert feature_columns(3)[4] == "rms_1"
+
+
+def test_writes_into_preallocated_matrix():
+    signals = np.random.default_rng(1).standard_normal((500, 8))
+    out = np.full((20, 48), np.nan)
+
+    features = extract_features(signals, 50, 25, out=out)
+
+    assert np.shares_memory(features, out)
+    assert not np.isnan(out[:19]).any() and np.isnan(out[19]).all()
+
+
+@pytest.mark.parametrize("window, step, block_size", [(200, 50, 1), (200, 50, 333), (10, 25, 7)])
+def test_streaming_matches_batch(window, step, block_size):
+    signals = np.random.default_rng(2).standard_normal((3000, 8))
+    extractor = FeatureExtractor(window, step, 8, threshold=0.1)
+
+    streamed = np.concatenate(
+        [extractor.update(signals[i : i + block_size]) for i in range(0, len(signals), block_size)]
+    )
+
+    np.testing.assert_array_equal(streamed, extract_features(signals, window, step, threshold=0.1))
@@ -1 +1,170 @@
-# TODO: @krarpit implement tests for EMG processing filters
+import threading
+import time
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+from analytics import config
+from analytics.adc.mockreader import MockAdcReader
+from analytics.gpm.constants import MAESTRO_CLOSE_FIST, MAESTRO_OPEN_FIST
+from analytics.gpm.dispatcher import CommandDispatcher
+from analytics.gpm.emulator import GpmEmulator
+from analytics.processing.classifier import ClassifierStage, GripClassifier
+from analytics.processing import filters
+from analytics.processing.filters import EmgProcessor
+from analytics.processing.resample import StreamingResampler
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def _publish(reader, num_samples):
+    now = reader.scheduler.clock()
+    reader._publish(np.zeros((num_samples, 2)), now, now)
+
+
+def _hop_latencies() -> float:
+    return REGISTRY.get_sample_value("processing_hop_latency_seconds_count")
+
+
+def test_hop_loop_runs_once_per_hop_of_new_samples():
+    reader = MockAdcReader()
+    processor = EmgProcessor(reader, dispatcher=CommandDispatcher("127.0.0.1", 1))
+    processor.inner_max_signal = processor.outer_max_signal = 1e9
+    hop = processor._hop_size
+    latencies = _hop_latencies()
+    threading.Thread(target=processor.run_detect_activation_loop, daemon=True).start()
+
+    # primes on the full buffers, without a hop
+    _publish(reader, reader.buffer.size)
+    _wait_for(lambda: processor._position == reader.buffer.size)
+    _publish(reader, hop - 1)
+    time.sleep(0.05)
+    assert processor.hops_processed == 0
+
+    # woken by the sample completing the hop
+    _publish(reader, 1)
+    _wait_for(lambda: processor.hops_processed == 1)
+    assert processor.missed_hops == 0
+    _wait_for(lambda: _hop_latencies() == latencies + 1)
+
+    # three hops arriving at once are processed as one, two of them missed
+    _publish(reader, 3 * hop)
+    _wait_for(lambda: processor.hops_processed == 2)
+    assert processor.missed_hops == 2
+    assert processor._position == reader.buffer.size + 4 * hop
+    _wait_for(lambda: _hop_latencies() == latencies + 2)
+
+
+def test_hop_loop_waits_for_samples_without_processing():
+    reader = MockAdcReader()
+    processor = EmgProcessor(reader, dispatcher=CommandDispatcher("127.0.0.1", 1))
+    threading.Thread(target=processor.run_detect_activation_loop, daemon=True).start()
+
+    _publish(reader, reader.buffer.size)
+    _wait_for(lambda: processor._position == reader.buffer.size)
+    # no new samples within the timeout, neither the reader nor the loop moved on
+    assert not reader.wait_for_samples(reader.buffer.size + 1, timeout=0.05)
+    assert processor.hops_processed == 0
+
+
+@pytest.mark.parametrize("quantile", [1.0, 0.9])
+def test_calibrates_on_every_sample_of_every_phase(monkeypatch, quantile):
+    monkeypatch.setattr(filters, "CALIBRATION_DURATION_IN_SECONDS", 0.5)
+    config.set({"processing": {"calibration_quantile": quantile}})
+    try:
+        reader = MockAdcReader()
+        processor = EmgProcessor(reader, dispatcher=CommandDispatcher("127.0.0.1", 1))
+    finally:
+        config.sources.pop(0)
+    phase_length = round(0.5 * reader.sample_rate)
+    # every phase is louder than the ones before, so none of them sees a louder earlier sample
+    rng = np.random.default_rng(0)
+    phases = [level + rng.random((phase_length, 2)) * [1, 2] for level in (1, 3, 5)]
+    calibration = threading.Thread(target=processor.calibrate, args=(None,), daemon=True)
+    calibration.start()
+
+    reader._publish(np.zeros((reader.buffer.size, 2)), 0.0, 0.0)
+    _wait_for(lambda: processor._position is not None)
+    # blocks straddle the phase ends, as they do when acquiring
+    for block in np.array_split(np.concatenate(phases), 3 * phase_length // 37):
+        # no faster than calibration consumes, so that no sample is overwritten
+        _wait_for(lambda: reader.buffer.total_written - processor._position < processor._hop_size)
+        reader._publish(block, 0.0, 0.0)
+    calibration.join(5)
+
+    assert not calibration.is_alive()
+    assert [phase.count for phase in processor.calibration_phases] == [phase_length] * 3
+    for phase, samples in zip(processor.calibration_phases, phases):
+        np.testing.assert_array_equal(phase.maximum, samples.max(axis=0))
+        if quantile == 1.0:
+            np.testing.assert_array_equal(phase.quantile(quantile), samples.max(axis=0))
+        else:
+            # the sketch guarantees rank error rather than value error
+            for column, value in zip(samples.T, phase.quantile(quantile)):
+                assert np.mean(column <= value) == pytest.approx(quantile, abs=0.03)
+    thresholds = np.max([phase.quantile(quantile) for phase in processor.calibration_phases], axis=0)
+    assert processor.get_maximums() == tuple(thresholds)
+
+
+def test_decisions_are_handed_to_the_dispatcher_without_blocking():
+    # GPM takes far longer to answer than a hop may take
+    with GpmEmulator(delay=0.3) as gpm:
+        dispatcher = CommandDispatcher("127.0.0.1", gpm.port, ack_timeout=5)
+        dispatcher.start()
+        try:
+            processor = EmgProcessor(MockAdcReader(), dispatcher=dispatcher)
+            processor.inner_max_signal = processor.outer_max_signal = 1.0
+
+            for max_inner, max_outer in [(1.0, 0.0), (0.0, 1.0)]:
+                start = time.perf_counter()
+                processor._update_activation_state(max_inner, max_outer)
+                assert time.perf_counter() - start < 0.05
+                # sent rather than superseded by the next decision
+                _wait_for(lambda: dispatcher.stats().pending == 0)
+
+            _wait_for(lambda: dispatcher.stats().acknowledged == 2)
+            assert gpm.task_codes == [MAESTRO_OPEN_FIST, MAESTRO_CLOSE_FIST]
+        finally:
+            dispatcher.stop(5)
+
+
+def test_classified_grips_are_handed_to_the_dispatcher():
+    with GpmEmulator() as gpm:
+        dispatcher = CommandDispatcher("127.0.0.1", gpm.port)
+        dispatcher.start()
+        try:
+            processor = EmgProcessor(MockAdcReader(), dispatcher=dispatcher)
+            # scores the mean absolute value of channel 0 against that of channel 1
+            weights = np.zeros((12, 2))
+            weights[0], weights[1] = [1, -1], [-1, 1]
+            model = GripClassifier(weights, np.zeros(2), [0, 1], ["OPEN", "FIST"], 10, 10)
+            processor.classifier_stage = ClassifierStage(model)
+
+            assert processor._update_grip(np.tile([1.0, 0.0], (10, 1))) == "OPEN"
+            _wait_for(lambda: dispatcher.stats().pending == 0)
+            assert processor._update_grip(np.tile([0.0, 1.0], (10, 1))) == "FIST"
+
+            _wait_for(lambda: dispatcher.stats().acknowledged == 2)
+            assert gpm.task_codes == [MAESTRO_OPEN_FIST, MAESTRO_CLOSE_FIST]
+        finally:
+            dispatcher.stop(5)
+
+
+def test_samples_whose_timestamps_were_overwritten_count_as_dropped():
+    reader = MockAdcReader()
+    processor = EmgProcessor(reader, dispatcher=CommandDispatcher("127.0.0.1", 1))
+    processor._resampler = StreamingResampler(reader.sample_rate)
+    size = reader.buffer.size
+    # the timestamp ring is 10 samples ahead, so it overwrote 10 more stamps than samples
+    reader.buffer.extend(np.zeros((size + 50, 2)))
+    reader.timestamps.extend(np.arange(size + 60) / reader.sample_rate)
+    processor._position = 50
+
+    processor._consume_new_samples()
+
+    assert processor.dropped_samples == 10
+    assert processor._position == size + 50
@@ -0,0 +1,35 @@
+import numpy as np
+import scipy
+from analytics.processing.iir import design_bandpass, make_emg_filter
+
+
+def _signal(n=3000, channels=2):
+    return np.random.default_rng(42).standard_normal((n, channels)) + 5.0
+
+
+def test_designs_are_cached():
+    assert design_bandpass(1000, 20, 450, 4) is design_bandpass(1000, 20, 450, 4)
+
+
+def test_streaming_matches_whole_signal():
+    signal = _signal()
+    whole = make_emg_filter(1000, 2, 20, 450, notch_freq=60).process(signal)
+
+    streaming = make_emg_filter(1000, 2, 20, 450, notch_freq=60)
+    blocks = [streaming.process(block) for block in np.array_split(signal, [1, 50, 51, 977])]
+
+    np.testing.assert_allclose(np.concatenate(blocks), whole, rtol=1e-10, atol=1e-10)
+
+
+def test_channels_have_independent_state():
+    signal = _signal()
+    both = make_emg_filter(1000, 2, 20, 450).process(signal)
+    only_outer = make_emg_filter(1000, 1, 20, 450).process(signal[:, 1:])
+    np.testing.assert_allclose(both[:, 1:], only_outer)
+
+
+def test_zero_phase():
+    signal = _signal()
+    sos = design_bandpass(1000, 20, 450, 4)
+    filtered = make_emg_filter(1000, 2, 20, 450, zero_phase=True).process(signal)
+    np.testing.assert_allclose(filtered, scipy.signal.sosfiltfilt(sos, signal, axis=0))
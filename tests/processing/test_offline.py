@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from analytics.adc.synthetic import SyntheticEmgGenerator
+from analytics.processing.decimation import PolyphaseDecimator, decimated_length
+from analytics.processing.envelope import MovingAverage
+from analytics.processing.iir import make_emg_filter
+from analytics.processing.offline import iter_chunks, run_offline
+from analytics.processing.pipeline import ActivationStateMachine, EmgPipeline
+
+WINDOW, HOP = 200, 50
+
+
+def _pipeline(decimator=None):
+    return EmgPipeline(
+        WINDOW, WINDOW, make_emg_filter(1000, 2, 20, 450, notch_freq=60), MovingAverage(50, 2), decimator
+    )
+
+
+def _recording():
+    schedule = [(1500, (0, 0)), (1500, (1, 0)), (1500, (0, 0)), (1500, (0, 1))]
+    return SyntheticEmgGenerator(1000, seed=3, schedule=schedule).generate(12345)
+
+
+def _streaming(samples):
+    """Feeds the pipeline the blocks the live loop consumes when it keeps up"""
+    pipeline, machine = _pipeline(), ActivationStateMachine(0.5, 0.5)
+    processed = [pipeline.update(samples[:WINDOW])]
+    decisions = []
+    for end in range(WINDOW + HOP, len(samples) + 1, HOP):
+        processed.append(pipeline.update(samples[end - HOP : end]))
+        transition = machine.update(*pipeline.window_maximums())
+        decisions.append((end, *pipeline.window_maximums(), machine.activation_state, transition or 0))
+    return np.concatenate(processed), decisions
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000, 1 << 16])
+def test_matches_streaming_bit_for_bit(chunk_size):
+    samples = _recording()
+    expected_processed, expected = _streaming(samples)
+    out = np.zeros_like(samples)
+
+    result = run_offline(
+        iter_chunks(samples, chunk_size), _pipeline(), ActivationStateMachine(0.5, 0.5), HOP, out=out
+    )
+
+    decisions = list(zip(result.decision_samples, *result.maximums.T, result.states, result.transitions))
+    assert decisions == expected
+    np.testing.assert_array_equal(out[: len(expected_processed)], expected_processed)
+    assert np.count_nonzero(result.transitions) >= 2
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000])
+def test_writes_decimated_output(chunk_size):
+    samples = _recording()
+    out = np.full((decimated_length(len(samples), 4), 2), np.nan)
+
+    machine = ActivationStateMachine(0.5, 0.5)
+    run_offline(iter_chunks(samples, chunk_size), _pipeline(PolyphaseDecimator(4, 2)), machine, HOP, out=out)
+
+    np.testing.assert_allclose(out, _pipeline(PolyphaseDecimator(4, 2)).update(samples), atol=1e-12)
+
+
+def test_selects_channels():
+    samples = np.arange(30.0).reshape(10, 3)
+    chunks = list(iter_chunks(samples, 4, channels=[2, 0]))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    np.testing.assert_array_equal(np.concatenate(chunks), samples[:, [2, 0]])
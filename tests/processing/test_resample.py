@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from analytics.data import Recording
+from analytics.processing.resample import StreamingResampler, resample, resample_recording
+
+
+def _jittery_capture(n=500, rate=250, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = np.cumsum(rng.uniform(0.5, 1.5, n)) / rate
+    values = np.column_stack((np.sin(2 * np.pi * 3 * timestamps), timestamps))
+    return timestamps, values
+
+
+def test_interpolates_onto_uniform_grid():
+    timestamps, values = _jittery_capture()
+    grid, resampled, stats = resample(timestamps, values, 100)
+
+    np.testing.assert_allclose(np.diff(grid), 0.01)
+    assert grid[0] == timestamps[0] and grid[-1] <= timestamps[-1]
+    # the second channel is linear in time, so interpolation is exact
+    np.testing.assert_allclose(resampled[:, 1], grid)
+    assert stats.output_samples == len(grid)
+    assert stats.duplicates == stats.out_of_order == 0
+
+
+def test_streaming_matches_batch():
+    timestamps, values = _jittery_capture()
+    grid, resampled, _ = resample(timestamps, values, 300)
+
+    resampler = StreamingResampler(300)
+    blocks = [
+        resampler.process(timestamps[i : i + 17], values[i : i + 17])
+        for i in range(0, len(timestamps), 17)
+    ]
+    np.testing.assert_array_equal(np.concatenate([b[0] for b in blocks]), grid)
+    np.testing.assert_array_equal(np.concatenate([b[1] for b in blocks]), resampled)
+
+
+def test_counts_gaps_and_duplicates():
+    timestamps = np.array([0.0, 0.01, 0.01, 0.02, 0.015, 0.08, 0.09])
+    grid, resampled, stats = resample(timestamps, np.arange(7.0), 100)
+
+    assert stats.duplicates == 1 and stats.out_of_order == 1
+    assert stats.gaps == 1
+    assert stats.max_interval_in_seconds == pytest.approx(0.06)
+    np.testing.assert_allclose(resampled[:4], [0, 1, 3, 3 + 2 / 6])
+
+
+def test_recording_labels_follow_samples():
+    timestamps = np.array([0.0, 0.003, 0.011, 0.019])
+    recording = Recording(np.arange(4.0)[:, np.newaxis], timestamps, np.array([1, 1, 2, 3]))
+    resampled, _ = resample_recording(recording, 200)
+
+    np.testing.assert_array_equal(resampled.timestamps, [0.0, 0.005, 0.01, 0.015])
+    np.testing.assert_array_equal(resampled.labels, [1, 1, 1, 2])
@@ -0,0 +1,51 @@
+import numpy as np
+import scipy
+from analytics.processing.spectral import WelchEstimator
+
+
+def test_matches_welch_over_latest_segments():
+    rng = np.random.default_rng(0)
+    signals = rng.standard_normal((3000, 2)) + 5
+    estimator = WelchEstimator(1000, 128, 2, num_segments=6, step=48)
+
+    splits = np.sort(rng.choice(len(signals), 40, replace=False))
+    for block in np.split(signals, splits):
+        estimator.update(block)
+
+    # 3000 samples complete 60 segments, the latest 6 start at sample 54 * 48
+    start = 54 * 48
+    frequencies, expected = scipy.signal.welch(
+        signals[start : start + 128 + 5 * 48], 1000, nperseg=128, noverlap=80, axis=0
+    )
+    np.testing.assert_allclose(estimator.frequencies, frequencies)
+    np.testing.assert_allclose(estimator.features.psd, expected, rtol=1e-10)
+
+
+def test_only_transforms_segments_kept_in_the_ring():
+    rng = np.random.default_rng(1)
+    signals = rng.standard_normal((2000, 1))
+    whole = WelchEstimator(500, 64, 1, num_segments=4)
+    streamed = WelchEstimator(500, 64, 1, num_segments=4)
+
+    whole.update(signals)
+    for block in np.array_split(signals, 37):
+        streamed.update(block)
+
+    np.testing.assert_allclose(whole.features.psd, streamed.features.psd, rtol=1e-12)
+
+
+def test_frequency_features_of_a_tone():
+    t = np.arange(4096) / 1000
+    signals = np.column_stack((np.sin(2 * np.pi * 100 * t), np.zeros_like(t)))
+    estimator = WelchEstimator(1000, 256, 2, bands=[(50, 150), (150, 500)])
+
+    assert estimator.update(signals[:255]) is None
+    features = estimator.update(signals[255:])
+
+    assert abs(features.mean_frequency[0] - 100) < 2
+    assert abs(features.median_frequency[0] - 100) < 4
+    assert features.band_powers[0, 0] > 100 * features.band_powers[1, 0]
+    # the power of a unit sine is 1/2
+    assert abs(features.band_powers[:, 0].sum() - 0.5) < 0.01
+    # a silent channel has no power and no meaningful frequencies
+    assert features.mean_frequency[1] == features.median_frequency[1] == 0
@@ -0,0 +1,93 @@
+import logging
+import queue
+import numpy as np
+import pytest
+from analytics.recording.constants import (
+    DROPPED_BLOCKS_LOG_INTERVAL,
+    EVENT_ACTIVATE,
+    EVENT_DEACTIVATE,
+    INDEX_DTYPE,
+    TRAILER_DTYPE,
+)
+from analytics.recording.reader import InvalidRecording, SessionRecording
+from analytics.recording.writer import SessionRecorder
+
+
+def _record(path, blocks, chunk_size=32):
+    """Records `blocks` of (first_sample, num_samples) with sample values equal to their index"""
+    with SessionRecorder(path, 2, 1000, chunk_size=chunk_size) as recorder:
+        for first_sample, num_samples in blocks:
+            indices = np.arange(first_sample, first_sample + num_samples)
+            block = np.column_stack((indices, -indices)).astype(np.float64)
+            recorder.record_block(block, first_sample, indices / 1000)
+        recorder.record_event(EVENT_ACTIVATE, 40, 0.04, 0.9, 0.1, 1.0, 1.0)
+        recorder.record_event(EVENT_DEACTIVATE, 90, 0.09, 0.1, 0.9, 1.0, 1.0)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "session.emgrec"
+    _record(path, [(0, 20), (20, 50), (70, 30)])
+    recording = SessionRecording(path)
+
+    assert recording.channels == 2 and recording.sample_rate == 1000
+    assert recording.num_samples == 100
+    assert list(recording.sample_chunks["count"]) == [32, 32, 32, 4]
+    samples, indices = recording.read_samples()
+    np.testing.assert_array_equal(indices, np.arange(100))
+    np.testing.assert_array_equal(samples, np.column_stack((indices, -indices)))
+    np.testing.assert_allclose(recording.chunk_timestamps(1), np.arange(32, 64) / 1000)
+    events = recording.events
+    np.testing.assert_array_equal(events["kind"], [EVENT_ACTIVATE, EVENT_DEACTIVATE])
+    np.testing.assert_array_equal(events["sample"], [40, 90])
+
+
+def test_seek_and_gaps(tmp_path):
+    path = tmp_path / "session.emgrec"
+    # samples 30..39 were dropped
+    _record(path, [(0, 30), (40, 40)])
+    recording = SessionRecording(path)
+
+    assert list(recording.sample_chunks["first_sample"]) == [0, 40, 72]
+    samples, indices = recording.read_samples(25, 45)
+    np.testing.assert_array_equal(indices, [25, 26, 27, 28, 29, 40, 41, 42, 43, 44])
+    np.testing.assert_array_equal(samples[:, 0], indices)
+    assert len(recording.read_samples(30, 40)[0]) == 0
+
+
+def test_unclosed_session_is_recovered(tmp_path):
+    path = tmp_path / "session.emgrec"
+    _record(path, [(0, 100)])
+    data = path.read_bytes()
+    # four sample chunks and the event chunk
+    index_size = 5 * INDEX_DTYPE.itemsize + TRAILER_DTYPE.itemsize
+    # drop the index footer and half of the event chunk, as after a crash
+    path.write_bytes(data[: -index_size - 40])
+
+    recording = SessionRecording(path)
+    assert recording.num_samples == 100
+    np.testing.assert_array_equal(recording.read_samples()[1], np.arange(100))
+    assert len(recording.events) == 0
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("1,2,3\n" * 20)
+    with pytest.raises(InvalidRecording):
+        SessionRecording(path)
+
+
+def test_dropped_blocks_are_counted_and_rarely_logged(tmp_path, caplog):
+    recorder = SessionRecorder(tmp_path / "session.emgrec", 2, 1000)
+    # swap in a full queue that the writer thread, waiting on the original one, never drains
+    writer_queue, recorder._queue = recorder._queue, queue.Queue(maxsize=1)
+    recorder._queue.put(None)
+    block = np.zeros((10, 2))
+
+    with caplog.at_level(logging.WARNING, logger="analytics.recording.writer"):
+        for i in range(2 * DROPPED_BLOCKS_LOG_INTERVAL + 1):
+            recorder.record_block(block, 10 * i, np.zeros(10))
+
+    assert (recorder.dropped_blocks, recorder.dropped_samples) == (2 * DROPPED_BLOCKS_LOG_INTERVAL + 1, 10 * (2 * DROPPED_BLOCKS_LOG_INTERVAL + 1))
+    assert len(caplog.records) == 3
+    recorder._queue = writer_queue
+    recorder.close()